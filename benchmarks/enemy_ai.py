@@ -0,0 +1,881 @@
+"""
+Benchmarks for the enemy AI that run without opening a game window.
+
+Run from the repository root with:
+    python -m benchmarks.enemy_ai
+"""
+import json
+import math
+import random
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pyasge
+import pytmx
+
+from game.gamedata import GameData
+from game.gameobjects.gamemap import build_collision, build_costs, build_navigation
+from game.gameobjects.LineOfSight import smooth_path, walkable_line
+from game.gameobjects.enemyStuff.PathFinding import PathCache, SEARCH_ENGINES, compare_engines, get_neighbours
+from game.gameobjects.enemyStuff.PathScheduler import PathScheduler
+from game.gameobjects.enemyStuff.IncrementalPlanner import IncrementalPlanner, ReplanStats
+from game.gameobjects.enemyStuff.FlowField import FlowField
+from game.gameobjects.TimerWheel import Stopwatch, TimerWheel
+from game.gameobjects.damageType import DamageType
+from game.gameobjects.projectile import ProjectilePool
+from game.gameobjects.SpatialHash import SpatialHash
+from game.gameobjects.enemyStuff.TreeProfiler import TreeProfiler
+from game.gameobjects.enemyStuff.AIExecutor import AIExecutor
+from game.gameobjects.enemyStuff.AIScheduler import AIScheduler
+from game.gameobjects.enemyStuff.Proximity import ProximityTable
+from game.gameobjects.enemyStuff.Transforms import TransformStore
+from game.gameobjects.enemyStuff.InfluenceMap import InfluenceMap
+from game.gameobjects.LineOfSight import SightLines
+from game.gameobjects.enemyStuff.behaviourtree import BehaviourTreeMelee, BehaviourTreeMage, BehaviourTreeRanger, \
+    BehaviourTreeTeleporter, BehaviourTreeBoss, shared_tree
+
+MAP_FILE = "data/map/DungeonMap.tmx"
+
+
+def load_map_data(tmx_file: str = MAP_FILE) -> GameData:
+    # only the cost map is needed, so the tiles are loaded without any textures
+    tmxdata = pytmx.TiledMap(tmx_file)
+
+    data = GameData()
+    tile_size = [int(tmxdata.tilewidth), int(tmxdata.tileheight)]
+    data.game_map = SimpleNamespace(width=tmxdata.width, height=tmxdata.height, tile_size=tile_size)
+    data.costs = build_costs(tmxdata)
+    data.collision = build_collision(tmxdata, tile_size)
+
+    # the teleporters are enough to name every room
+    data.checkpoints = []
+    data.spawns = []
+    data.teleporters = []
+    for obj in tmxdata.layernames["Teleporters"]:
+        data.teleporters.append([obj.Pair, obj.x, obj.y, obj.width, obj.height, obj.Room])
+
+    build_navigation(data, tmxdata.width, tmxdata.height, tile_size)
+    return data
+
+
+def random_queries(data: GameData, count: int, seed: int = 101):
+    # start and goal are picked in the same area, so every query has a path
+    rng = random.Random(seed)
+    areas = [tiles for tiles in data.reachability.component_tiles if len(tiles) > 1]
+    queries = []
+    for i in range(count):
+        tiles = rng.choice(areas)
+        queries.append((rng.choice(tiles), rng.choice(tiles)))
+    return queries
+
+
+def path_engines(count: int = 500) -> None:
+    data = load_map_data()
+    results = compare_engines(data, random_queries(data, count))
+
+    print(f"{'engine':<8} {'queries':>8} {'expansions':>11} {'per query':>10} {'path tiles':>11} {'seconds':>8}")
+    for name, result in results.items():
+        print(f"{name:<8} {result['queries']:>8} {result['expansions']:>11} "
+              f"{result['expansions'] / result['queries']:>10.1f} {result['path_tiles']:>11} "
+              f"{result['seconds']:>8.3f}")
+
+
+def room_graph(count: int = 200, seed: int = 202) -> None:
+    # goals in another room: the flat search floods the whole start room before giving up,
+    # the room graph plans over the teleporters and only searches the walk to the first one
+    data = load_map_data()
+    reachability = data.reachability
+    rng = random.Random(seed)
+    areas = [tiles for tiles in reachability.component_tiles if len(tiles) > 1]
+
+    flat = SEARCH_ENGINES["a_star"]
+    flat_expansions = 0
+    for i in range(count):
+        start_area, goal_area = rng.sample(areas, 2)
+        search = flat.begin(data, rng.choice(start_area), rng.choice(goal_area))
+        search.step()
+        flat_expansions += search.expansions
+
+    # same as RoomGraph.firstLeg, with the search's expansions counted
+    rng = random.Random(seed)
+    graph = data.room_graph
+    leg_expansions = 0
+    leg_tiles = 0
+    for i in range(count):
+        start_area, goal_area = rng.sample(areas, 2)
+        start = rng.choice(start_area)
+        leg_goal = graph.legGoal(start, rng.choice(goal_area))
+        if leg_goal is None:
+            continue
+        search = flat.begin(data, start, leg_goal, reachability.bounds(leg_goal))
+        search.step()
+        leg_expansions += search.expansions
+        leg_tiles += len(search.path())
+
+    print(f"{count} queries across rooms, {len(graph.pads)} teleporter pads")
+    print(f"flat a_star:  {flat_expansions:>7} tile expansions, no path found")
+    print(f"room graph:   {graph.expansions:>7} pad expansions + {leg_expansions} tile expansions, "
+          f"{leg_tiles} first leg tiles")
+
+
+def path_scheduler(count: int = 300, budget: int = 500) -> None:
+    # every query is asked for in the same frame, the scheduler spreads them out
+    data = load_map_data()
+    data.path_cache = PathCache()
+    scheduler = PathScheduler(budget)
+    for start, goal in random_queries(data, count):
+        scheduler.request(data, start, goal)
+
+    while len(scheduler.queue):
+        scheduler.update(data)
+
+    stats = scheduler.stats()
+    print(f"{count} requests in one frame, budget of {budget} expansions a frame")
+    print(f"finished over {scheduler.frames} frames, at most {stats['peak_expansions']} expansions "
+          f"in a frame ({scheduler.expansions} in total), longest wait {stats['peak_wait']} frames")
+
+
+def flow_field(frames: int = 600, budget: int = 500, seed: int = 313) -> None:
+    # the player crosses a tile every frame, far faster than they can walk, and the field still has to keep up
+    data = load_map_data()
+    data.flow_field = FlowField()
+    data.path_cache = PathCache()
+    scheduler = PathScheduler(budget)
+    rng = random.Random(seed)
+    area = max(data.reachability.component_tiles, key=len)
+
+    player_tile = rng.choice(area)
+    visited = {}    # frame the player stepped onto each tile
+    first_ready = None
+    longest_behind = 0
+    for frame in range(frames):
+        neighbours = get_neighbours(data, player_tile, data.game_map.width, data.game_map.height)
+        player_tile = rng.choice(neighbours) if len(neighbours) else player_tile
+        visited[player_tile] = frame
+        data.flow_field.update(data, player_tile)
+        scheduler.update(data)
+
+        if data.flow_field.ready():
+            if first_ready is None:
+                first_ready = frame
+            longest_behind = max(longest_behind, frame - visited[data.flow_field.goal])
+
+    assert first_ready is not None, "the flow field never finished while the player was moving"
+    print(f"player moving a tile a frame over {len(area)} tiles, budget of {budget} expansions a frame")
+    print(f"first field ready on frame {first_ready}, {data.flow_field.builds} fields flooded, "
+          f"the field pointed at most {longest_behind} frames behind the player")
+
+
+def replanning(chases: int = 40, replans: int = 30, seed: int = 303) -> None:
+    # an enemy walks a few tiles down its path, the player wanders a tile or two, then it asks again.
+    # every repair is checked against a full search from a planner with no history
+    data = load_map_data()
+    rng = random.Random(seed)
+    areas = [tiles for tiles in data.reachability.component_tiles if len(tiles) > 50]
+    repair_stats = ReplanStats()
+    full_stats = ReplanStats()
+
+    for i in range(chases):
+        tiles = rng.choice(areas)
+        planner = IncrementalPlanner(repair_stats)
+        start = rng.choice(tiles)
+        goal = rng.choice(tiles)
+
+        for j in range(replans):
+            path = planner.plan(data, start, goal)
+            fresh = IncrementalPlanner(full_stats).plan(data, start, goal)
+            # every walkable tile costs 1, so a path as long as the fresh one is as cheap
+            assert len(path) == len(fresh), f"repair from {start} to {goal} is longer than a full search"
+            assert path[0] == start and path[-1] == goal
+
+            start = path[min(len(path) - 1, rng.randint(1, 4))]
+            for step in range(rng.randint(0, 2)):
+                neighbours = get_neighbours(data, goal, data.game_map.width, data.game_map.height)
+                if len(neighbours):
+                    goal = rng.choice(neighbours)
+
+    print(f"{chases} chases of {replans} replans")
+    print(f"full searches: {full_stats.full_expansions:>7} expansions")
+    print(f"incremental:   {repair_stats.full_expansions + repair_stats.repair_expansions:>7} expansions "
+          f"({repair_stats.full_searches} full searches, {repair_stats.repairs} repairs), "
+          f"every path as short as the full search's")
+
+
+def path_smoothing(count: int = 500) -> None:
+    data = load_map_data()
+    engine = SEARCH_ENGINES["a_star"]
+    tiles = 0
+    waypoints = 0
+    for start, goal in random_queries(data, count):
+        path = engine.search(data, start, goal)
+        smoothed = smooth_path(data.costs, path)
+        # every leg is either a straight walkable line or one of the search's own steps
+        assert all(walkable_line(data.costs, a, b) or max(abs(a[0] - b[0]), abs(a[1] - b[1])) == 1
+                   for a, b in zip(smoothed, smoothed[1:]))
+        tiles += len(path)
+        waypoints += len(smoothed)
+
+    print(f"{count} paths: {tiles} tiles, {waypoints} waypoints after string pulling "
+          f"({waypoints / tiles:.0%})")
+
+
+class BenchEnemy:
+    """ Just enough of an Enemy for the behaviour tree leaves, without any sprites """
+
+    re_route_timer = Stopwatch()
+    attack_timer = Stopwatch()
+    projectile_timer = Stopwatch()
+
+    def __init__(self, data, tile, definition):
+        self.data = data
+        self.position = data.game_map.world(tile)
+        self.route = []
+        self.re_route_timer = random.random()
+        self.attack_timer = 0
+        self.projectile_timer = 0
+        self.attack_player_range = 48
+        self.min_offset_distance = 2
+        self.max_offset_distance = 4
+        self.path_request = None
+        self.planner = IncrementalPlanner(ReplanStats())
+        self.definition = definition
+        self.behaviour = None
+        self.ai_bucket = None
+        self.ai_actions = None
+        self.proximity_row = None
+        self.proximity_frame = None
+
+    def think(self):
+        # same as Enemy.think
+        if self.ai_actions is not None:
+            actions, self.ai_actions = self.ai_actions, None
+            for action, args in actions:
+                action(*args)
+        elif self.data.ai_scheduler.due(self):
+            self.behaviour.root.tick(self, self.data, self.re_route_timer)
+
+    def getMidPosition(self):
+        return pyasge.Point2D(self.position.x, self.position.y)
+
+    def centreRoute(self, path):
+        self.route = path[1:]
+
+    def clearRoute(self):
+        self.route.clear()
+
+    def attack(self):
+        if self.attack_timer > 1:
+            self.attack_timer = 0
+
+    def fireAtPlayer(self):
+        if self.projectile_timer > 1:
+            self.projectile_timer = 0
+            return True
+        return False
+
+    def teleport(self):
+        return False
+
+    def generateRangedEnemyTargetOffset(self):
+        player = self.data.game_map.tile(self.data.player.getMidPosition())
+        return self.data.target_sampler.sample(self.data.game_map.tile(self.position), player,
+                                               self.min_offset_distance, self.max_offset_distance)
+
+    def waited(self, timer, low, high):
+        return getattr(type(self), timer).waited(self, low, high)
+
+    def step(self):
+        # walks one waypoint a frame instead of moving the sprite, the timers run off data.timers
+        if len(self.route) > 1:
+            self.position = self.route.pop(0)
+        elif len(self.route) == 1:
+            self.route.pop(0)
+
+
+def path_cache(count: int = 60, frames: int = 1800, seed: int = 414) -> None:
+    # the pattern the cache is for: chasers that don't use the flow field, spawned in groups, whose route
+    # EnemyPathReset throws away every second, after they walked a few tiles down it
+    data = load_map_data()
+    tile_width, tile_height = data.game_map.tile_size
+    data.game_map.tile = lambda point: (int(point.x / tile_width), int(point.y / tile_height))
+    data.game_map.world = lambda tile: pyasge.Point2D((tile[0] + 0.5) * tile_width, (tile[1] + 0.5) * tile_height)
+    data.chase_flow_field = False
+    area = max(data.reachability.component_tiles, key=len)
+
+    print(f"{'cache':<12} {'lookups':>8} {'hit rate':>9} {'searched':>9} {'expansions':>11}")
+    for name, suffixes in [("exact pairs", False), ("suffixes", True)]:
+        rng = random.Random(seed)
+        random.seed(seed)
+        data.path_cache = PathCache(suffixes=suffixes)
+        data.path_scheduler = PathScheduler(data.path_budget)
+        player_tile = rng.choice(area)
+        data.player = SimpleNamespace(position=data.game_map.world(player_tile))
+        data.player.getMidPosition = lambda: pyasge.Point2D(data.player.position.x, data.player.position.y)
+
+        # a handful of spawn points with a group of enemies each
+        enemies = []
+        for spawn in rng.sample(area, count // 6):
+            for i in range(6):
+                enemy = BenchEnemy(data, spawn, BehaviourTreeMelee)
+                enemy.behaviour = shared_tree(BehaviourTreeMelee)
+                enemies.append(enemy)
+
+        for frame in range(frames):
+            if frame % 120 == 0:
+                neighbours = get_neighbours(data, player_tile, data.game_map.width, data.game_map.height)
+                player_tile = rng.choice(neighbours) if len(neighbours) else player_tile
+                data.player.position = data.game_map.world(player_tile)
+
+            for enemy in enemies:
+                enemy.behaviour.root.tick(enemy, data, enemy.re_route_timer)
+            data.path_scheduler.update(data)
+            data.timers.advance(1 / 60)
+            if frame % 8 == 0:  # walks a waypoint every 8 frames, about a tile at the enemies' speed
+                for enemy in enemies:
+                    enemy.step()
+
+        stats = data.path_cache.stats()
+        expansions = sum(enemy.planner.stats.full_expansions + enemy.planner.stats.repair_expansions
+                         for enemy in enemies)
+        print(f"{name:<12} {stats['hits'] + stats['misses']:>8} {stats['hit_rate']:>9.0%} {stats['misses']:>9} "
+              f"{expansions:>11}")
+
+
+def behaviour_trees(count: int = 500, frames: int = 300, seed: int = 404) -> None:
+    # 500 enemies of every type around a player that wanders, only the ticks are timed
+    data = load_map_data()
+    tile_width, tile_height = data.game_map.tile_size
+    data.game_map.tile = lambda point: (int(point.x / tile_width), int(point.y / tile_height))
+    data.game_map.world = lambda tile: pyasge.Point2D((tile[0] + 0.5) * tile_width, (tile[1] + 0.5) * tile_height)
+    data.flow_field = FlowField()
+    definitions = [BehaviourTreeMelee, BehaviourTreeMage, BehaviourTreeRanger, BehaviourTreeTeleporter,
+                   BehaviourTreeBoss]
+    area = max(data.reachability.component_tiles, key=len)
+
+    # one stand-in class per tree, so the profile names the enemy types
+    types = [type(definition.__name__[len("BehaviourTree"):], (BenchEnemy,), {}) for definition in definitions]
+
+    print(f"{'trees':<12} {'ticks/sec':>10} {'path cache hits':>16}")
+    for name in ["per enemy", "shared", "profiled"]:
+        random.seed(seed)
+        data.bt_profiler = TreeProfiler() if name == "profiled" else None
+        data.path_cache = PathCache()
+        data.path_scheduler = PathScheduler(data.path_budget)
+        player_tile = random.choice(area)
+        data.player = SimpleNamespace(position=data.game_map.world(player_tile))
+        data.player.getMidPosition = lambda: pyasge.Point2D(data.player.position.x, data.player.position.y)
+
+        enemies = []
+        for i in range(count):
+            enemy = types[i % len(definitions)](data, random.choice(area), definitions[i % len(definitions)])
+            if name == "per enemy":
+                enemy.behaviour = enemy.definition()
+            else:
+                enemy.behaviour = shared_tree(enemy.definition, data.bt_profiler)
+            enemies.append(enemy)
+
+        seconds = 0.0
+        for frame in range(frames):
+            if frame % 30 == 0:
+                neighbours = get_neighbours(data, player_tile, data.game_map.width, data.game_map.height)
+                player_tile = random.choice(neighbours) if len(neighbours) else player_tile
+                data.player.position = data.game_map.world(player_tile)
+            data.flow_field.update(data, player_tile)
+
+            timer = time.perf_counter()
+            for enemy in enemies:
+                enemy.behaviour.root.tick(enemy, data, enemy.re_route_timer)
+            seconds += time.perf_counter() - timer
+
+            data.path_scheduler.update(data)
+            data.timers.advance(1 / 60)
+            for enemy in enemies:
+                enemy.step()
+
+        print(f"{name:<12} {count * frames / seconds:>10.0f} {data.path_cache.hitRate():>16.0%}")
+
+    print()
+    print("Behaviour tree profile")
+    print(data.bt_profiler.report())
+
+
+def proximity(counts=(10, 100, 1000), frames: int = 200, seed: int = 505) -> None:
+    # the five distance reads a frame of the old leaves and attack checks against one table pass and five lookups
+    random.seed(seed)
+    player = pyasge.Point2D(400, 300)
+    reads = 5
+
+    print(f"{'enemies':>8} {'distance() ms':>14} {'table ms':>9}")
+    for count in counts:
+        enemies = []
+        for i in range(count):
+            sprite = SimpleNamespace(x=random.uniform(0, 800), y=random.uniform(0, 600), width=16, height=16)
+            enemy = SimpleNamespace(sprite=sprite, proximity_frame=None, proximity_row=None)
+            enemy.getMidPosition = lambda s=sprite: pyasge.Point2D(s.x + s.width / 2, s.y + s.height / 2)
+            enemies.append(enemy)
+
+        timer = time.perf_counter()
+        for frame in range(frames):
+            for enemy in enemies:
+                for read in range(reads):
+                    enemy.getMidPosition().distance(player)
+        direct = (time.perf_counter() - timer) / frames
+
+        table = ProximityTable()
+        timer = time.perf_counter()
+        for frame in range(frames):
+            table.update(enemies, player)
+            for enemy in enemies:
+                for read in range(reads):
+                    table.distance(enemy)
+        tabled = (time.perf_counter() - timer) / frames
+
+        for enemy in enemies:
+            assert abs(table.distance(enemy) - enemy.getMidPosition().distance(player)) < 1e-6
+        print(f"{count:>8} {direct * 1000:>14.3f} {tabled * 1000:>9.3f}")
+
+
+def target_sampling(draws: int = 20000, max_offset: int = 15, seed: int = 606) -> None:
+    # the old retry loop (random offset, reject until walkable and connected) against the ring sampler
+    data = load_map_data()
+    areas = [tiles for tiles in data.reachability.component_tiles if len(tiles) > 50]
+    random.seed(seed)
+    queries = []
+    for i in range(draws // 100):
+        # the player stays on a tile for a while, enemies draw many targets around it
+        area = random.choice(areas)
+        centre = random.choice(area)
+        queries.extend((random.choice(area), centre) for draw in range(100))
+
+    def retry(start, centre):
+        for attempt in range(1, 1001):
+            x = centre[0] + random.choice([-1, 1]) * random.randint(2, max_offset)
+            y = centre[1] + random.choice([-1, 1]) * random.randint(2, max_offset)
+            if 0 <= x < data.game_map.width and 0 <= y < data.game_map.height and \
+                    0 < data.costs[y][x] < 6 and data.reachability.connected(start, (x, y)):
+                return attempt
+        return None
+
+    timer = time.perf_counter()
+    attempts = [retry(start, centre) for start, centre in queries]
+    retry_seconds = time.perf_counter() - timer
+    found = [count for count in attempts if count is not None]
+
+    timer = time.perf_counter()
+    samples = [data.target_sampler.sample(start, centre, 2, max_offset) for start, centre in queries]
+    sample_seconds = time.perf_counter() - timer
+
+    for (start, centre), tile in zip(queries, samples):
+        if tile is not None:
+            assert data.reachability.connected(start, tile)
+            assert 2 <= max(abs(tile[0] - centre[0]), abs(tile[1] - centre[1])) <= max_offset
+
+    print(f"{'targets':<8} {'ms/draw':>8} {'found':>6} {'tries avg':>10} {'tries max':>10}")
+    print(f"{'retry':<8} {retry_seconds / draws * 1000:>8.4f} {len(found):>6} "
+          f"{sum(found) / max(len(found), 1):>10.1f} {max(found, default=0):>10}")
+    print(f"{'sampler':<8} {sample_seconds / draws * 1000:>8.4f} {sum(tile is not None for tile in samples):>6} "
+          f"{1:>10.1f} {1:>10}")
+    print(data.target_sampler.stats())
+
+
+def influence_map(count: int = 30, frames: int = 300, seed: int = 707) -> None:
+    # rangers around a wandering player picking a firing position every frame, random draws against the map.
+    # A target the ranger can't reach would be a path search thrown away, update() is what the map costs a frame
+    data = load_map_data()
+    tile_width, tile_height = data.game_map.tile_size
+    data.game_map.tile = lambda point: (int(point.x / tile_width), int(point.y / tile_height))
+    data.game_map.world = lambda tile: pyasge.Point2D((tile[0] + 0.5) * tile_width, (tile[1] + 0.5) * tile_height)
+    area = max(data.reachability.component_tiles, key=len)
+
+    print(f"{'targets':<10} {'ms/pick':>8} {'unreachable':>12} {'distinct':>9} {'walls near':>11} {'update ms':>10}")
+    for name in ["random", "influence"]:
+        random.seed(seed)
+        data.influence_map = InfluenceMap()
+        player_tile = random.choice(area)
+        data.player = SimpleNamespace(position=data.game_map.world(player_tile))
+        data.player.getMidPosition = lambda: pyasge.Point2D(data.player.position.x, data.player.position.y)
+        rangers = [BenchEnemy(data, random.choice(area), BehaviourTreeRanger) for i in range(count)]
+        for ranger in rangers:
+            ranger.max_offset_distance = 8
+
+        seconds = 0.0
+        update_seconds = 0.0
+        unreachable = 0
+        distinct = 0
+        cover = 0.0
+        for frame in range(frames):
+            if frame % 30 == 0:
+                neighbours = get_neighbours(data, player_tile, data.game_map.width, data.game_map.height)
+                player_tile = random.choice(neighbours) if len(neighbours) else player_tile
+                data.player.position = data.game_map.world(player_tile)
+            timer = time.perf_counter()
+            data.influence_map.update(data, rangers, player_tile)
+            update_seconds += time.perf_counter() - timer
+
+            timer = time.perf_counter()
+            if name == "random":
+                targets = [ranger.generateRangedEnemyTargetOffset() for ranger in rangers]
+            else:
+                targets = [data.influence_map.pick(data, ranger, 2, 8) for ranger in rangers]
+            seconds += time.perf_counter() - timer
+
+            unreachable += sum(target is not None and not data.reachability.connected(
+                data.game_map.tile(ranger.getMidPosition()), target) for ranger, target in zip(rangers, targets))
+            targets = [target for target in targets if target is not None]
+            distinct += len(set(targets))
+            cover += sum(float(data.influence_map.cover[target[1], target[0]]) for target in targets) / \
+                max(len(targets), 1)
+
+            for ranger, target in zip(rangers, targets):
+                ranger.position = data.game_map.world(target)  # everyone walks straight to their pick
+
+        print(f"{name:<10} {seconds / (frames * count) * 1000:>8.4f} {unreachable:>12} {distinct / frames:>9.1f} "
+              f"{cover / frames:>11.2f} {update_seconds / frames * 1000:>10.3f}")
+    print(data.influence_map.stats())
+
+
+def sight_lines(count: int = 40, frames: int = 600, seed: int = 808) -> None:
+    # enemies asking every frame whether they can shoot a player that changes tile every 10 frames
+    data = load_map_data()
+    area = max(data.reachability.component_tiles, key=len)
+    random.seed(seed)
+
+    # a shot marched in quarter tile steps must never get through a line the walk calls blocked
+    for i in range(2000):
+        start, end = random.choice(area), random.choice(area)
+        steps = 4 * max(abs(end[0] - start[0]), abs(end[1] - start[1])) + 1
+        hits_wall = any(data.costs.isWall((int(start[0] + 0.5 + (end[0] - start[0]) * step / steps),
+                                           int(start[1] + 0.5 + (end[1] - start[1]) * step / steps)))
+                        for step in range(steps + 1))
+        assert not hits_wall or not SightLines().visible(data, start, end)
+
+    sight = SightLines()
+    enemies = [random.choice(area) for i in range(count)]
+    player_tile = random.choice(area)
+    timer = time.perf_counter()
+    for frame in range(frames):
+        if frame % 10 == 0:
+            neighbours = get_neighbours(data, player_tile, data.game_map.width, data.game_map.height)
+            player_tile = random.choice(neighbours) if len(neighbours) else player_tile
+        sight.update(data, player_tile)
+        for enemy in enemies:
+            sight.visible(data, enemy, player_tile)
+    seconds = time.perf_counter() - timer
+
+    stats = sight.stats()
+    asked = stats["hits"] + stats["misses"]
+    print(f"{asked} sight checks in {seconds * 1000:.1f} ms, {stats['hits'] / asked:.0%} cached, "
+          f"{stats['blocked'] / stats['misses']:.0%} of the lines blocked (shots not fired)")
+
+
+def parallel_ai(count: int = 500, frames: int = 120, seed: int = 909) -> None:
+    # the same trees ticked in the enemy loop and by the executor's think phase followed by the apply phase
+    data = load_map_data()
+    tile_width, tile_height = data.game_map.tile_size
+    data.game_map.tile = lambda point: (int(point.x / tile_width), int(point.y / tile_height))
+    data.game_map.world = lambda tile: pyasge.Point2D((tile[0] + 0.5) * tile_width, (tile[1] + 0.5) * tile_height)
+    data.flow_field = FlowField()
+    data.ai_scheduler = AIScheduler()   # never given a player, so every enemy thinks every frame
+    definitions = [BehaviourTreeMelee, BehaviourTreeMage, BehaviourTreeRanger, BehaviourTreeTeleporter,
+                   BehaviourTreeBoss]
+    area = max(data.reachability.component_tiles, key=len)
+
+    print(f"{'ai':<10} {'ticks/sec':>10}")
+    for name, workers in [("serial", None), ("2 threads", 2), ("4 threads", 4), ("8 threads", 8)]:
+        random.seed(seed)
+        data.ai_parallel = workers is not None
+        data.ai_executor = AIExecutor(workers)
+        data.path_cache = PathCache()
+        data.path_scheduler = PathScheduler(data.path_budget)
+        player_tile = random.choice(area)
+        data.player = SimpleNamespace(position=data.game_map.world(player_tile))
+        data.player.getMidPosition = lambda: pyasge.Point2D(data.player.position.x, data.player.position.y)
+
+        enemies = []
+        for i in range(count):
+            enemy = BenchEnemy(data, random.choice(area), definitions[i % len(definitions)])
+            enemy.behaviour = shared_tree(enemy.definition)
+            enemies.append(enemy)
+
+        seconds = 0.0
+        for frame in range(frames):
+            if frame % 30 == 0:
+                neighbours = get_neighbours(data, player_tile, data.game_map.width, data.game_map.height)
+                player_tile = random.choice(neighbours) if len(neighbours) else player_tile
+                data.player.position = data.game_map.world(player_tile)
+            data.flow_field.update(data, player_tile)
+
+            timer = time.perf_counter()
+            data.ai_executor.run(data, enemies)
+            for enemy in enemies:
+                enemy.think()
+            seconds += time.perf_counter() - timer
+
+            data.path_scheduler.update(data)
+            data.timers.advance(1 / 60)
+            for enemy in enemies:
+                enemy.step()
+
+        data.ai_executor.close()
+        print(f"{name:<10} {count * frames / seconds:>10.0f}")
+    print(data.ai_executor.stats())
+    data.ai_executor = None
+
+
+def timer_wheel(count: int = 2000, frames: int = 600, seed: int = 1010) -> None:
+    # four cooldowns per entity, counted up every frame against scheduled on the wheel
+    random.seed(seed)
+    timestep = 1 / 60
+
+    counters = [[0.0, 0.0, 0.0, 0.0] for i in range(count)]
+    fired = 0
+    timer = time.perf_counter()
+    for frame in range(frames):
+        for entity in counters:
+            for index in range(4):
+                entity[index] += timestep
+                if entity[index] > random.uniform(1, 3):   # the old nodes drew their interval every frame
+                    entity[index] = 0
+                    fired += 1
+    counted = time.perf_counter() - timer
+
+    wheel = TimerWheel(timestep)
+
+    def cooldown():
+        wheel.scheduleRandom(1, 3, cooldown)   # drawn once per cooldown
+
+    for i in range(count * 4):
+        wheel.scheduleRandom(1, 3, cooldown)
+    timer = time.perf_counter()
+    for frame in range(frames):
+        wheel.advance(timestep)
+    wheeled = time.perf_counter() - timer
+
+    print(f"{'timers':<8} {'ms/frame':>9} {'fired':>8}")
+    print(f"{'counted':<8} {counted / frames * 1000:>9.3f} {fired:>8}")
+    print(f"{'wheel':<8} {wheeled / frames * 1000:>9.3f} {wheel.fired:>8}")
+
+
+def projectiles(counts=(10, 100, 1000), frames: int = 300, seed: int = 1111) -> None:
+    # projectiles in flight kept topped up, moved and wall checked one object at a time against the pool
+    data = load_map_data()
+    with open("game/gameobjects/textures.json", mode="r", encoding="utf8") as textures:
+        data.textures = json.loads(textures.read())
+    game_time = SimpleNamespace(fixed_timestep=1 / 60)
+    tile_width, tile_height = data.game_map.tile_size
+    floor = [tile for tiles in data.reachability.component_tiles for tile in tiles]
+
+    def shot(rng):
+        tile = rng.choice(floor)
+        angle = rng.uniform(0, 2 * math.pi)
+        return tile[0] * tile_width, tile[1] * tile_height, math.cos(angle), math.sin(angle)
+
+    print(f"{'live':>6} {'objects ms':>11} {'pool ms':>8} {'walls':>7}")
+    for count in counts:
+        rng = random.Random(seed)
+        flying = []
+        timer = time.perf_counter()
+        for frame in range(frames):
+            while len(flying) < count:
+                x, y, dx, dy = shot(rng)
+                flying.append([x, y, dx * 150, dy * 150])
+            for projectile in list(flying):
+                projectile[0] += projectile[2] * game_time.fixed_timestep
+                projectile[1] += projectile[3] * game_time.fixed_timestep
+                middle = pyasge.Point2D(projectile[0] + 8, projectile[1] + 8)
+                tile = (int(middle.x / tile_width), int(middle.y / tile_height))
+                if data.costs.isWall(tile):
+                    flying.remove(projectile)
+        objects = time.perf_counter() - timer
+
+        rng = random.Random(seed)
+        pool = ProjectilePool(data)
+        timer = time.perf_counter()
+        for frame in range(frames):
+            while pool.count < count:
+                x, y, dx, dy = shot(rng)
+                pool.spawn("magic", x, y, dx, dy, 5, DamageType.magic_damage, owner=pool)
+            pool.update(game_time, None, [])
+        pooled = time.perf_counter() - timer
+
+        print(f"{count:>6} {objects / frames * 1000:>11.3f} {pooled / frames * 1000:>8.3f} {pool.walls:>7}")
+
+
+def broadphase(cases=((10, 100), (30, 300), (100, 1000)), frames: int = 200, seed: int = 1212) -> None:
+    # hit candidates for projectiles against enemies: every body against every projectile, or the spatial hash
+    data = load_map_data()
+    tile_width, tile_height = data.game_map.tile_size
+    floor = np.array([tile for tiles in data.reachability.component_tiles for tile in tiles], dtype=np.float32)
+
+    print(f"{'bodies':>6} {'shots':>6} {'brute ms':>9} {'hash ms':>8} {'brute pairs':>12} {'hash pairs':>11} {'hits':>6}")
+    for bodies, shots in cases:
+        rng = np.random.default_rng(seed)
+        body_tiles = floor[rng.integers(len(floor), size=bodies)]
+        body_boxes = np.column_stack([body_tiles[:, 0] * tile_width - 8, body_tiles[:, 1] * tile_height - 8,
+                                      body_tiles[:, 0] * tile_width + 8, body_tiles[:, 1] * tile_height + 8])
+        # the shots are kept near the bodies, like projectiles flying at the player
+        origins = body_tiles[rng.integers(bodies, size=shots)]
+        mid_xs = origins[:, 0] * tile_width + rng.uniform(-64, 64, shots).astype(np.float32)
+        mid_ys = origins[:, 1] * tile_height + rng.uniform(-64, 64, shots).astype(np.float32)
+        half = np.float32(4)
+
+        timer = time.perf_counter()
+        for frame in range(frames):
+            brute_hits = 0
+            for min_x, min_y, max_x, max_y in body_boxes.tolist():
+                brute_hits += int(np.count_nonzero((mid_xs + half > min_x) & (mid_xs - half < max_x) &
+                                                   (mid_ys + half > min_y) & (mid_ys - half < max_y)))
+        brute = time.perf_counter() - timer
+
+        grid = SpatialHash(tile_width)
+        timer = time.perf_counter()
+        for frame in range(frames):
+            grid.rebuild(body_boxes[:, 0], body_boxes[:, 1], body_boxes[:, 2], body_boxes[:, 3])
+            boxes, ids = grid.candidates(mid_xs - half, mid_ys - half, mid_xs + half, mid_ys + half)
+            box_bounds = body_boxes[ids]
+            hash_hits = int(np.count_nonzero((mid_xs[boxes] + half > box_bounds[:, 0]) &
+                                             (mid_xs[boxes] - half < box_bounds[:, 2]) &
+                                             (mid_ys[boxes] + half > box_bounds[:, 1]) &
+                                             (mid_ys[boxes] - half < box_bounds[:, 3])))
+        hashed = time.perf_counter() - timer
+        assert brute_hits == hash_hits
+
+        print(f"{bodies:>6} {shots:>6} {brute / frames * 1000:>9.3f} {hashed / frames * 1000:>8.3f} "
+              f"{bodies * shots:>12} {grid.frame_pairs:>11} {hash_hits:>6}")
+
+
+def collision(walkers: int = 200, frames: int = 300, seed: int = 1313) -> None:
+    # player sized boxes walking at random, the old neighbour tile check against sweeping the merged walls
+    data = load_map_data()
+    world = data.collision
+    rng = random.Random(seed)
+    floor = [tile for tiles in data.reachability.component_tiles for tile in tiles]
+    starts = [rng.choice(floor) for i in range(walkers)]
+    moves = [[(rng.choice((-1, 0, 1)), rng.choice((-1, 0, 1))) for i in range(walkers)] for j in range(frames)]
+    step = 85 / 60
+    walls = data.costs.walls
+    row = data.costs.width
+
+    positions = [[x * 16.0, y * 16.0] for x, y in starts]
+    timer = time.perf_counter()
+    for frame in range(frames):
+        for position, (vector_x, vector_y) in zip(positions, moves[frame]):
+            # same as the old Player.tileCollisionCheck and updateMovements
+            index = int((position[1] + 8) / 16) * row + int((position[0] + 8) / 16)
+            wall_y = 2 if walls[index - row] else 1 if walls[index + row] else 0
+            wall_x = 2 if walls[index - 1] else 1 if walls[index + 1] else 0
+            if (vector_x == 1 and wall_x != 1) or (vector_x == -1 and wall_x != 2):
+                position[0] += vector_x * step
+            if (vector_y == 1 and wall_y != 1) or (vector_y == -1 and wall_y != 2):
+                position[1] += vector_y * step
+    tiles = time.perf_counter() - timer
+
+    positions = [[x * 16.0, y * 16.0] for x, y in starts]
+    timer = time.perf_counter()
+    for frame in range(frames):
+        for position, (vector_x, vector_y) in zip(positions, moves[frame]):
+            box = (position[0] + 2, position[1] + 2, position[0] + 14, position[1] + 14)
+            move_x, move_y = world.sweep(box, vector_x * step, vector_y * step)
+            position[0] += move_x
+            position[1] += move_y
+    swept = time.perf_counter() - timer
+
+    solid = sum(walls)
+    print(f"{'walls':<10} {'us/move':>8}")
+    print(f"{'tiles':<10} {tiles / (frames * walkers) * 1e6:>8.2f}   {solid} solid tiles")
+    print(f"{'swept':<10} {swept / (frames * walkers) * 1e6:>8.2f}   {len(world.rects)} merged rectangles, "
+          f"{world.rect_tests / world.sweeps:.2f} tested per move")
+
+
+def transforms(counts=(10, 100, 1000), frames: int = 300, seed: int = 1414) -> None:
+    # enemies walking long straight routes: the old fixedUpdate one at a time, the store's integrate() and sync()
+    rng = random.Random(seed)
+    game_time = SimpleNamespace(fixed_timestep=1 / 60)
+    view = (0, 0, 400, 225)     # about what the zoomed in camera sees of an 800 x 800 area
+
+    print(f"{'enemies':>8} {'fixedUpdate ms':>15} {'integrate ms':>13} {'sync ms':>8} {'synced':>7}")
+    for count in counts:
+        walkers = []
+        for i in range(count):
+            walker = SimpleNamespace(sprite=pyasge.Sprite(), speed=70, transform=None)
+            walker.sprite.width = 16
+            walker.sprite.height = 16
+            start = pyasge.Point2D(rng.uniform(0, 800), rng.uniform(0, 800))
+            angle = rng.uniform(0, 2 * math.pi)
+            walker.route = [pyasge.Point2D(start.x + math.cos(angle) * 10000, start.y + math.sin(angle) * 10000)] * 2
+            walker.direction = pyasge.Point2D(math.cos(angle), math.sin(angle))
+            walker.start = start
+            walkers.append(walker)
+
+        for walker in walkers:
+            walker.sprite.x = walker.start.x
+            walker.sprite.y = walker.start.y
+        timer = time.perf_counter()
+        for frame in range(frames):
+            for walker in walkers:
+                # same as the old Enemy.fixedUpdate, without any waypoint reached
+                position = pyasge.Point2D(walker.sprite.x, walker.sprite.y)
+                if len(walker.route) > 1:
+                    if abs(position.distance(walker.route[0])) < walker.speed * 0.02:
+                        position = walker.route[0]
+                    else:
+                        position += walker.direction * walker.speed * game_time.fixed_timestep
+                    walker.sprite.x = position.x
+                    walker.sprite.y = position.y
+        counted = time.perf_counter() - timer
+
+        store = TransformStore()
+        for walker in walkers:
+            store.add(walker, walker.start.x, walker.start.y)
+            store.follow(walker, walker.route)
+            store.aim(walker, walker.direction.x, walker.direction.y)
+        timer = time.perf_counter()
+        for frame in range(frames):
+            store.integrate(game_time)
+        integrated = time.perf_counter() - timer
+        timer = time.perf_counter()
+        for frame in range(frames):
+            store.sync(view)
+        synced = time.perf_counter() - timer
+
+        print(f"{count:>8} {counted / frames * 1000:>15.3f} {integrated / frames * 1000:>13.3f} "
+              f"{synced / frames * 1000:>8.3f} {store.synced // frames:>7}")
+
+
+if __name__ == "__main__":
+    path_engines()
+    print()
+    room_graph()
+    print()
+    path_scheduler()
+    print()
+    flow_field()
+    print()
+    replanning()
+    print()
+    path_smoothing()
+    print()
+    path_cache()
+    print()
+    behaviour_trees()
+    print()
+    proximity()
+    print()
+    target_sampling()
+    print()
+    influence_map()
+    print()
+    sight_lines()
+    print()
+    parallel_ai()
+    print()
+    timer_wheel()
+    print()
+    projectiles()
+    print()
+    broadphase()
+    print()
+    collision()
+    print()
+    transforms()
@@ -47,3 +47,10 @@ def spriteIntersects(r1: pyasge.Sprite, r2: pyasge.Sprite):
         return True
 
     return False
+
+
+def spriteBounds(sprite: pyasge.Sprite):
+    # world space box of a sprite as min x, min y, max x, max y
+    bounds = sprite.getWorldBounds()
+    return (min(bounds.v1.x, bounds.v2.x), min(bounds.v1.y, bounds.v3.y),
+            max(bounds.v1.x, bounds.v2.x), max(bounds.v1.y, bounds.v3.y))
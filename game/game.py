@@ -1,3 +1,4 @@
+import atexit
 import random
 import json
 
@@ -12,6 +13,7 @@ from game.gamestates.gameplay import GamePlay
 from game.gamestates.gamestate import GameStateID
 from game.gamestates.gamewon import GameWon
 from game.gameobjects.SoundHandler import SoundHandler
+from game.gameobjects.enemyStuff.TreeProfiler import TreeProfiler
 
 
 class MyASGEGame(pyasge.ASGEGame):
@@ -30,6 +32,10 @@ class MyASGEGame(pyasge.ASGEGame):
         """
         pyasge.ASGEGame.__init__(self, settings)
         self.data = GameData()
+        if self.data.bt_profile:
+            # one profile for the whole run, every GamePlay adds to it. Logged with F9 and once on exit
+            self.data.bt_profiler = TreeProfiler()
+            atexit.register(self.data.bt_profiler.log)
         self.renderer.setBaseResolution(self.data.game_res[0], self.data.game_res[1], pyasge.ResolutionPolicy.MAINTAIN)
         random.seed(a=None, version=2)
 
@@ -132,6 +138,9 @@ class MyASGEGame(pyasge.ASGEGame):
         self.data.gamepad = self.inputs.getGamePad()
         self.data.prev_gamepad = self.data.gamepad
 
+        # moves the game clock on, the timers that came due fire here
+        self.data.timers.advance(game_time.fixed_timestep)
+
         # updates the UI handler constantly
         self.data.UserInterface.updateUI(game_time)
 
@@ -1,4 +1,5 @@
 import pyasge
+from game.gameobjects.TimerWheel import TimerWheel
 
 
 class GameData:
@@ -12,6 +13,9 @@ class GameData:
     """
 
     def __init__(self) -> None:
+        # Game clock, advanced once a frame by Game.update, cooldowns and deadlines are scheduled on it
+        self.timers = TimerWheel()
+
         # UI data
         self.UserInterface = None
 
@@ -31,14 +35,48 @@ class GameData:
         self.shaders: dict[str, pyasge.Shader] = {}
         self.retract_enemies = None
         self.bread = 0
+        self.projectiles = None     # ProjectilePool, shared by the player and every ranged enemy
+        self.transforms = None      # TransformStore, where the active enemies are and where they're walking to
 
         # Map loader Data
         self.costs = None
+        self.collision = None   # CollisionWorld, the walls for moving the player
         self.checkpoints = None
         self.spawns = None
         self.chests = None
         self.teleporters = None
         self.spikes = None
 
+        # Pathfinding data
+        self.costs_version = 0  # bumped every time the cost map changes
+        self.flow_field = None
+        self.reachability = None
+        self.target_sampler = None
+        self.path_cache = None
+        self.room_graph = None
+        self.path_scheduler = None
+        self.chase_flow_field = True    # chasing enemies follow the shared flow field instead of running A*
+        self.path_engine = "a_star"     # search used by resolve(), "a_star" or "jps"
+        self.path_hierarchical = False  # targets in other rooms are planned over the teleporters
+        self.path_incremental = True    # enemies repair their last search instead of searching from scratch
+        self.path_smoothing = True      # routes skip the tiles that can be walked past in a straight line
+        self.path_backend = "frame"     # where searches run: "frame" (time sliced), "thread" or "process"
+        self.path_budget = 500          # nodes the queued searches can expand every frame
+        self.path_workers = None        # size of the thread / process pool, None picks from the core count
+
+        # Behaviour trees
+        self.bt_profile = False     # times every node, the report is logged on exit or with F9
+        self.bt_profiler = None
+        self.ai_parallel = False    # behaviour trees tick on a thread pool, see AIExecutor
+        self.ai_workers = None      # size of that pool, None picks from the core count
+        self.ai_executor = None
+        self.ai_scheduler = None
+        self.ai_lod = True          # far away and off screen enemies tick their trees less often
+        self.proximity = None       # distance from every enemy to the player, filled once a frame
+        self.influence_map = None
+        self.ranger_influence = False  # rangers pick firing positions from the influence map instead of at random
+        self.line_of_sight = None
+        self.sight_check = True     # ranged enemies hold their fire while a wall is in the way
+
         # Enemy Textures
         self.textures = None
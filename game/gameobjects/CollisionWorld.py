@@ -0,0 +1,134 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+Box = Tuple[float, float, float, float]  # min x, min y, max x, max y in pixels
+
+
+class CollisionWorld:
+    """
+    The walls of the map for moving boxes around, built once when the map is loaded
+
+    Two views of the same solid tiles are kept:
+
+    - a bit grid, every row of tiles packed 8 to a byte, for answering
+      "is this tile solid" with one lookup.
+    - the solid tiles merged into as few rectangles as possible, growing
+      each one right and then down as far as it goes. Every solid tile
+      knows which rectangle it belongs to.
+
+    sweep() moves a box one axis at a time and stops it where it would
+    run into a rectangle, so it slides along walls and ends up touching
+    them instead of stopping a tile short. Rectangles the box already
+    overlaps don't stop it, so it can always walk out of a wall.
+    """
+
+    def __init__(self, solid: np.ndarray, tile_size) -> None:
+        self.height, self.width = solid.shape
+        self.tile_width, self.tile_height = tile_size
+        self.row_bytes = (self.width + 7) // 8
+        self.bits = np.packbits(solid, axis=1).tobytes()
+
+        self.rects: List[Box] = []
+        self.rect_ids: List[int] = [-1] * (self.width * self.height)   # per tile, -1 if it isn't solid
+        self.merge(solid)
+
+        # statistics
+        self.sweeps = 0
+        self.rect_tests = 0
+        self.blocked = 0
+
+    def merge(self, solid: np.ndarray) -> None:
+        # greedy meshing, each rectangle is as wide as it can be and then as tall as that width allows
+        width = self.width
+        free = solid.tolist()
+        for y in range(self.height):
+            row = free[y]
+            x = 0
+            while x < width:
+                if not row[x]:
+                    x += 1
+                    continue
+                end = x
+                while end < width and row[end]:
+                    end += 1
+                bottom = y + 1
+                while bottom < self.height and all(free[bottom][x:end]):
+                    bottom += 1
+
+                rect_id = len(self.rects)
+                self.rects.append((x * self.tile_width, y * self.tile_height,
+                                   end * self.tile_width, bottom * self.tile_height))
+                for tile_y in range(y, bottom):
+                    free[tile_y][x:end] = [False] * (end - x)
+                    self.rect_ids[tile_y * width + x:tile_y * width + end] = [rect_id] * (end - x)
+                x = end
+
+    def solid(self, tile_x: int, tile_y: int) -> bool:
+        """ Whether a tile is a wall, outside the map counts as open """
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return False
+        return bool(self.bits[tile_y * self.row_bytes + (tile_x >> 3)] & (0x80 >> (tile_x & 7)))
+
+    def solidAt(self, x: float, y: float) -> bool:
+        return self.solid(int(x // self.tile_width), int(y // self.tile_height))
+
+    def rectsAround(self, min_x: float, min_y: float, max_x: float, max_y: float) -> List[Box]:
+        # the rectangles of the solid tiles a box touches, read straight off the bit grid
+        bits = self.bits
+        row_bytes = self.row_bytes
+        first_x = max(int(min_x // self.tile_width), 0)
+        last_x = min(int(max_x // self.tile_width), self.width - 1)
+        first_y = max(int(min_y // self.tile_height), 0)
+        last_y = min(int(max_y // self.tile_height), self.height - 1)
+        rects = []
+        for tile_y in range(first_y, last_y + 1):
+            offset = tile_y * row_bytes
+            for tile_x in range(first_x, last_x + 1):
+                if bits[offset + (tile_x >> 3)] & (0x80 >> (tile_x & 7)):
+                    rect = self.rects[self.rect_ids[tile_y * self.width + tile_x]]
+                    if rect not in rects:
+                        rects.append(rect)
+        return rects
+
+    def sweep(self, box: Box, move_x: float, move_y: float) -> Tuple[float, float]:
+        """ How far a box can go of move_x, move_y before it hits a wall, sideways first """
+        self.sweeps += 1
+        min_x, min_y, max_x, max_y = box
+        if move_x:
+            allowed = move_x
+            rects = self.rectsAround(min_x + min(move_x, 0), min_y, max_x + max(move_x, 0), max_y)
+            self.rect_tests += len(rects)
+            for rect_min_x, rect_min_y, rect_max_x, rect_max_y in rects:
+                if rect_max_y <= min_y or rect_min_y >= max_y:
+                    continue    # beside the box, not in its way
+                if move_x > 0 and rect_min_x >= max_x - 1e-6:
+                    allowed = min(allowed, max(rect_min_x - max_x, 0.0))
+                elif move_x < 0 and rect_max_x <= min_x + 1e-6:
+                    allowed = max(allowed, min(rect_max_x - min_x, 0.0))
+            if allowed != move_x:
+                self.blocked += 1
+            move_x = allowed
+            min_x += move_x
+            max_x += move_x
+
+        if move_y:
+            allowed = move_y
+            rects = self.rectsAround(min_x, min_y + min(move_y, 0), max_x, max_y + max(move_y, 0))
+            self.rect_tests += len(rects)
+            for rect_min_x, rect_min_y, rect_max_x, rect_max_y in rects:
+                if rect_max_x <= min_x or rect_min_x >= max_x:
+                    continue
+                if move_y > 0 and rect_min_y >= max_y - 1e-6:
+                    allowed = min(allowed, max(rect_min_y - max_y, 0.0))
+                elif move_y < 0 and rect_max_y <= min_y + 1e-6:
+                    allowed = max(allowed, min(rect_max_y - min_y, 0.0))
+            if allowed != move_y:
+                self.blocked += 1
+            move_y = allowed
+
+        return move_x, move_y
+
+    def stats(self) -> Dict[str, int]:
+        return {"rects": len(self.rects), "sweeps": self.sweeps, "rect_tests": self.rect_tests,
+                "blocked": self.blocked}
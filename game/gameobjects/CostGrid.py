@@ -0,0 +1,80 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# same order as get_neighbours
+NEIGHBOURS = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+WALL_COST = 10  # anything this expensive blocks the player and the projectiles
+
+
+class CostGrid:
+    """
+    The cost map as a NumPy array with a precomputed neighbour graph
+
+    Tiles are addressed by a flat index, y * width + x. The walkable
+    neighbours of every tile are worked out once when the map is loaded
+    and stored in CSR form: the neighbours of tile i are
+    indices[indptr[i]:indptr[i + 1]], in the same order get_neighbours
+    gives them. adjacency holds the same lists as plain Python lists for
+    the search loops, which are faster to iterate than NumPy slices.
+
+    Indexing the grid with costs[y][x] still works, so code written
+    against the old list of lists doesn't need to change.
+    """
+
+    def __init__(self, grid) -> None:
+        self.grid = np.array(grid, dtype=np.int16)
+        self.height, self.width = self.grid.shape
+        self.size = self.width * self.height
+        self.flat = self.grid.ravel()
+
+        # plain lists are quicker than NumPy for looking up one tile at a time
+        self.rows: List[List[int]] = self.grid.tolist()
+        self.values: List[int] = self.flat.tolist()
+        self.walls: List[bool] = (self.flat >= WALL_COST).tolist()
+        self.xs: List[int] = (np.arange(self.size) % self.width).tolist()
+        self.ys: List[int] = (np.arange(self.size) // self.width).tolist()
+
+        self.indptr, self.indices = self.buildAdjacency()
+        indptr = self.indptr.tolist()
+        indices = self.indices.tolist()
+        self.adjacency: List[List[int]] = [indices[indptr[i]:indptr[i + 1]] for i in range(self.size)]
+
+    def buildAdjacency(self) -> Tuple[np.ndarray, np.ndarray]:
+        tiles = np.arange(self.size)
+        xs = tiles % self.width
+        ys = tiles // self.width
+        walkable = self.flat == 1
+
+        # one column per direction, a neighbour counts if it's inside the map and walkable
+        targets = np.zeros((self.size, len(NEIGHBOURS)), dtype=np.int64)
+        valid = np.zeros((self.size, len(NEIGHBOURS)), dtype=bool)
+        for column, (dx, dy) in enumerate(NEIGHBOURS):
+            inside = (xs + dx >= 0) & (xs + dx < self.width) & (ys + dy >= 0) & (ys + dy < self.height)
+            target = np.where(inside, tiles + dy * self.width + dx, 0)
+            targets[:, column] = target
+            valid[:, column] = inside & walkable[target]
+
+        indptr = np.zeros(self.size + 1, dtype=np.int64)
+        np.cumsum(valid.sum(axis=1), out=indptr[1:])
+        return indptr, targets[valid]  # row by row, so every tile's neighbours stay together and in order
+
+    def index(self, tile: Tuple[int, int]) -> int:
+        return tile[1] * self.width + tile[0]
+
+    def tile(self, index: int) -> Tuple[int, int]:
+        return self.xs[index], self.ys[index]
+
+    def isWall(self, tile: Tuple[int, int]) -> bool:
+        return self.walls[tile[1] * self.width + tile[0]]
+
+    # compatibility with the old list of lists, costs[y][x]
+    def __getitem__(self, y: int) -> List[int]:
+        return self.rows[y]
+
+    def __len__(self) -> int:
+        return self.height
+
+    def __iter__(self):
+        return iter(self.rows)
@@ -2,9 +2,13 @@ import pyasge
 from game.gamedata import GameData
 from game.gamestates.gamestate import GameStateID
 from game.gameobjects.weaponTypes import GunTypes
+from game.gameobjects.TimerWheel import Stopwatch
 
 
 class UIHandler:
+    # seconds since the transition and the baguette textbox started, read off the game clock
+    time_elapsed = Stopwatch()
+    opacity_timer = Stopwatch()
 
     def __init__(self, game_data: GameData):
         self.data = game_data
@@ -190,9 +194,15 @@ class UIHandler:
         self.baguette_textbox.opacity = 0
 
     def showBaguetteTextbox(self):
-        # is true when baguette is supposed to show on screen
+        # is true when baguette is supposed to show on screen, for a second
+        if not self.summon_baguette_textbox:
+            self.opacity_timer = 0
+            self.data.timers.schedule(1, self.hideBaguetteTextbox)
         self.summon_baguette_textbox = True
 
+    def hideBaguetteTextbox(self):
+        self.summon_baguette_textbox = False
+
     # Simply updates the on-screen number of active enemies
     def setEnemiesNumber(self, enemies):
         self.enemies_UI_text.string = str(enemies)
@@ -225,6 +235,21 @@ class UIHandler:
             self.target = [0, self.data.game_res[1] - self.black_bars[0].height]
             self.time_elapsed = 0
             self.transitioning = True
+            self.data.timers.schedule(0.5, self.transitionMidpoint)
+            self.data.timers.schedule(1.2, self.transitionEnd)
+
+    def transitionMidpoint(self):
+        # reached the midpoint retracts the black bars and outputs a true (if called) for one frame
+        self.target = [-self.black_bars[0].height - 200, self.data.game_res[1] + 200]
+        self.transition_feedback = True
+        self.data.timers.schedule(0, self.transitionFeedbackEnd)
+
+    def transitionFeedbackEnd(self):
+        self.transition_feedback = False
+
+    def transitionEnd(self):
+        # Stops the transition from happening
+        self.transitioning = False
 
     def transitionFeedback(self) -> bool:
         # returns true when the transition is at its midpoint (when screen is completely black)
@@ -249,35 +274,16 @@ class UIHandler:
             self.hearts_UI[len(self.hearts_UI) - 1].scale += self.scale_multiplier * game_time.fixed_timestep / 20
 
         if self.transitioning:
-
-            self.time_elapsed += game_time.fixed_timestep
-
-            # reached the midpoint retracts the black bars and outputs a true (if called)
-            if 0.5 < self.time_elapsed < 0.52:
-                self.target = [-self.black_bars[0].height - 200, self.data.game_res[1] + 200]
-                self.transition_feedback = True
-            else:
-                self.transition_feedback = False
-
-            # Stops the transition from happening
-            if self.time_elapsed > 1.2:
-                self.transitioning = False
-
             # Moves the bars up and down progressively
             self.black_bars[1].y += (self.target[0] - self.black_bars[1].y) / self.speed
             self.black_bars[0].y += (self.target[1] - self.black_bars[0].y) / self.speed
 
         if self.summon_baguette_textbox:
-            self.opacity_timer += game_time.fixed_timestep
-
             # Summons the mighty baguette indicator! (baguette obtained)
             if self.opacity_timer <= 0.2 and self.baguette_textbox.opacity < 0.9:
                 self.baguette_textbox.opacity += game_time.fixed_timestep * 10
             elif self.opacity_timer >= 0.8 and self.baguette_textbox.opacity >= 0:
                 self.baguette_textbox.opacity -= game_time.fixed_timestep * 10
-            elif self.opacity_timer > 1:
-                self.opacity_timer = 0
-                self.summon_baguette_textbox = False
 
     def renderUI(self, state):
         # gets rendered everywhere for the transition animation
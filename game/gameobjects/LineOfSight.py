@@ -0,0 +1,184 @@
+import math
+from collections import OrderedDict
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Location = Tuple[int, int]
+
+
+def line_tiles(start: Location, end: Location) -> Iterator[Location]:
+    """
+    Tiles crossed by the straight line between the middles of two tiles
+
+    Steps one tile at a time towards whichever grid line the line meets
+    first. When it goes exactly through a corner both tiles beside the
+    corner are given as well, so a line can't squeeze between two walls
+    that only touch diagonally.
+    """
+    x, y = start
+    dx = abs(end[0] - start[0])
+    dy = abs(end[1] - start[1])
+    step_x = 1 if end[0] > start[0] else -1
+    step_y = 1 if end[1] > start[1] else -1
+
+    yield x, y
+    ix = 0
+    iy = 0
+    while ix < dx or iy < dy:
+        # compares where the next vertical and horizontal grid lines are crossed
+        decision = (1 + 2 * ix) * dy - (1 + 2 * iy) * dx
+        if decision == 0:
+            yield x + step_x, y
+            yield x, y + step_y
+            x += step_x
+            y += step_y
+            ix += 1
+            iy += 1
+        elif decision < 0:
+            x += step_x
+            ix += 1
+        else:
+            y += step_y
+            iy += 1
+        yield x, y
+
+
+def walkable_line(costs, start: Location, end: Location) -> bool:
+    """ True if every tile on the line between start and end can be walked on (cost 1) """
+    rows = costs.rows
+    for x, y in line_tiles(start, end):
+        if rows[y][x] != 1:
+            return False
+    return True
+
+
+def clear_line(costs, start: Location, end: Location) -> bool:
+    """ True if no tile on the line between start and end is a wall, so a projectile gets through """
+    walls = costs.walls
+    width = costs.width
+    for x, y in line_tiles(start, end):
+        if walls[y * width + x]:
+            return False
+    return True
+
+
+def ray_impact(costs, tile_size, x: float, y: float, direction_x: float, direction_y: float,
+               max_distance: float) -> float:
+    """
+    Distance in pixels from x, y along a unit direction to the first wall tile or the edge of the map
+
+    Digital differential analyser: works out how far along the ray the
+    next vertical and horizontal tile edges are and steps through
+    whichever comes first, so every tile the ray passes through is looked
+    at once however fast the projectile travels. Gives max_distance if
+    nothing is hit before then, 0 if x, y is already in a wall.
+    """
+    tile_width, tile_height = tile_size
+    walls = costs.walls
+    width = costs.width
+    height = costs.height
+    tile_x = math.floor(x / tile_width)
+    tile_y = math.floor(y / tile_height)
+    if not (0 <= tile_x < width and 0 <= tile_y < height) or walls[tile_y * width + tile_x]:
+        return 0.0
+
+    step_x = 1 if direction_x > 0 else -1
+    step_y = 1 if direction_y > 0 else -1
+    if direction_x:
+        next_x = ((tile_x + (step_x > 0)) * tile_width - x) / direction_x
+        delta_x = tile_width / abs(direction_x)
+    else:
+        next_x = delta_x = math.inf
+    if direction_y:
+        next_y = ((tile_y + (step_y > 0)) * tile_height - y) / direction_y
+        delta_y = tile_height / abs(direction_y)
+    else:
+        next_y = delta_y = math.inf
+
+    while True:
+        if next_x < next_y:
+            distance = next_x
+            tile_x += step_x
+            next_x += delta_x
+        else:
+            distance = next_y
+            tile_y += step_y
+            next_y += delta_y
+        if distance >= max_distance:
+            return max_distance
+        if not (0 <= tile_x < width and 0 <= tile_y < height) or walls[tile_y * width + tile_x]:
+            return distance
+
+
+def smooth_path(costs, path: List[Location]) -> List[Location]:
+    """
+    String pulling: drops every tile that can be skipped by walking straight
+
+    Keeps the start and end of the path and, from each kept tile, the
+    furthest following tile it can still walk to in a straight line.
+    """
+    if len(path) < 3:
+        return list(path)
+
+    smoothed = [path[0]]
+    for index in range(1, len(path) - 1):
+        if not walkable_line(costs, smoothed[-1], path[index + 1]):
+            smoothed.append(path[index])
+    smoothed.append(path[-1])
+    return smoothed
+
+
+class SightLines:
+    """
+    Cached line of sight between tiles, for the enemies that shoot at the player
+
+    Walks the tiles between two tile centres (line_tiles) and remembers
+    the answer per (from tile, to tile). Almost every question is asked
+    about the tile the player is on, so the cache is emptied when the
+    player moves to another tile, and when the cost map changes.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self.capacity = capacity
+        self.lines: OrderedDict[Tuple[Location, Location], bool] = OrderedDict()
+        self.costs_version = None
+        self.player: Optional[Location] = None
+
+        # statistics
+        self.hits = 0
+        self.misses = 0
+        self.blocked = 0
+        self.invalidations = 0
+
+    def update(self, game_data, player: Location) -> None:
+        """ Called once a frame with the player's tile """
+        if player != self.player or self.costs_version != game_data.costs_version:
+            self.lines.clear()
+            self.player = player
+            self.costs_version = game_data.costs_version
+            self.invalidations += 1
+
+    def visible(self, game_data, start: Location, end: Location) -> bool:
+        key = (start, end)
+        clear = self.lines.get(key)
+        if clear is not None:
+            self.hits += 1
+            return clear
+
+        self.misses += 1
+        costs = game_data.costs
+        if not (0 <= start[0] < costs.width and 0 <= start[1] < costs.height and
+                0 <= end[0] < costs.width and 0 <= end[1] < costs.height):
+            clear = False
+        else:
+            clear = clear_line(costs, start, end)
+        if not clear:
+            self.blocked += 1
+
+        self.lines[key] = clear
+        if len(self.lines) > self.capacity:
+            self.lines.popitem(last=False)
+        return clear
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "blocked": self.blocked,
+                "invalidations": self.invalidations}
@@ -4,12 +4,16 @@ from game.gamedata import GameData
 from game.gameobjects.SpriteAnimator import SpriteAnimator
 from game.gameobjects.enemyStuff.enemy import Enemy
 from game.component import floatIntersects
-from game.component import spriteIntersects
-from game.gameobjects.projectile import Projectile, DamageType
+from game.gameobjects.damageType import DamageType
 from game.gameobjects.SoundHandler import TrackIndex
+from game.gameobjects.TimerWheel import Stopwatch
 
 
 class Player:
+    # seconds since each was last reset, read off the game clock
+    damage_timer = Stopwatch()
+    attackTimer = Stopwatch()
+    shootTimer = Stopwatch()
 
     def __init__(self, game_data: GameData):
         self.data = game_data
@@ -18,8 +22,6 @@ class Player:
         self.sprite = pyasge.Sprite()
         self.anim = SpriteAnimator(self.sprite, game_data.textures["player"]["healthy"])
         self.sprite.z_order = 120
-        self.virtual_wall_x = 0
-        self.virtual_wall_y = 0
         self.speed = 85
 
         # Health & UI
@@ -41,6 +43,7 @@ class Player:
         self.damaged = False
         self.damaged_type = None
         self.damage_timer = 0
+        self.damage_end = None  # timer that ends the damage shader
 
         # Sword
         self.sword = pyasge.Sprite()
@@ -64,9 +67,6 @@ class Player:
         self.rangeDamage = 25
         self.shootTimer = 0
 
-        self.arrows = []
-        self.arrow_num = -1
-
         # Controller
         if self.data.gamepad.connected:
             self.data.cursor.opacity = 0
@@ -79,7 +79,7 @@ class Player:
                 self.respawn()
 
         # Updates the direction of the sprite using the vector, diagonal movement is possible
-        # Also uses a virtual wall to identify "actual" walls.
+        # Also stops it at the walls of the collision world.
         # It also moves the position of the mouse cursor and the sword in the screen.
         self.updateMovements(game_time, vector_x, vector_y)
 
@@ -116,20 +116,24 @@ class Player:
             else:
                 pass
 
+    def startAttack(self):
+        # swings the sword, the swing ends by itself after 0.4 seconds
+        self.isAttacking = True
+        self.attackTimer = 0
+        self.data.timers.schedule(0.40, self.endAttack)
+
+    def endAttack(self):
+        self.swordAnim.resetAnimation()
+        self.isAttacking = False
+
     def updateSword(self, game_time):
         # Handles melee attacking animation
         if self.isAttacking:
-            self.attackTimer += game_time.fixed_timestep
             self.swordAnim.animateSprite(game_time, 0)
 
             # cooldown bar for the sword
             self.data.UserInterface.setCharge((self.attackTimer * 100) / 0.40)
 
-            if self.attackTimer >= 0.40:
-                self.swordAnim.resetAnimation()
-                self.attackTimer = 0
-                self.isAttacking = False
-
     def UpdateBowAndArrow(self, game_time):
         if self.bowEquipped:
             self.rotateBow()
@@ -139,61 +143,32 @@ class Player:
         if self.isShooting:
             self.drawingString = False
             self.bowAnim.resetAnimation()
-            self.shootTimer += game_time.fixed_timestep
 
             # cooldown bar for the bow
             self.data.UserInterface.setCharge((self.shootTimer * 100) / 0.30)
 
-            if self.shootTimer >= 0.30:
-                self.shootTimer = 0
-                self.isShooting = False
+    def updateMovements(self, game_time, vector_x, vector_y):
+        # The step is cut short where the player would walk into a wall, moving along the wall still works.
+        step = self.speed * game_time.fixed_timestep
+        move_x, move_y = self.data.collision.sweep(self.collisionBox(), vector_x * step, vector_y * step)
 
-        # if arrows have been shot updates them
-        if len(self.arrows):
-            for arrow in self.arrows:
-                arrow.update(game_time)
+        self.sprite.x += move_x
+        self.sword.x += move_x
+        self.bow.x += move_x
+        self.data.cursor.x += move_x
 
-                tile = self.data.game_map.tile(pyasge.Point2D(arrow.sprite.x + arrow.sprite.width / 2,
-                                                              arrow.sprite.y + arrow.sprite.height / 2))
-                if self.data.costs[tile[1]][tile[0]] >= 10:
-                    self.arrows.remove(arrow)
-                    self.arrow_num -= 1
-
-    def updateMovements(self, game_time, vector_x, vector_y):
-        self.tileCollisionCheck()
-
-        if vector_x == 1 and self.virtual_wall_x != 1:
-            self.sprite.x += 1 * self.speed * game_time.fixed_timestep
-            self.sword.x += 1 * self.speed * game_time.fixed_timestep
-            self.bow.x += 1 * self.speed * game_time.fixed_timestep
-            self.data.cursor.x += 1 * self.speed * game_time.fixed_timestep
-
-        elif vector_x == -1 and self.virtual_wall_x != 2:
-            self.sprite.x += -1 * self.speed * game_time.fixed_timestep
-            self.sword.x += -1 * self.speed * game_time.fixed_timestep
-            self.bow.x += -1 * self.speed * game_time.fixed_timestep
-            self.data.cursor.x += -1 * self.speed * game_time.fixed_timestep
-        if vector_y == 1 and self.virtual_wall_y != 1:
-            self.sprite.y += 1 * self.speed * game_time.fixed_timestep
-            self.sword.y += 1 * self.speed * game_time.fixed_timestep
-            self.bow.y += 1 * self.speed * game_time.fixed_timestep
-            self.data.cursor.y += 1 * self.speed * game_time.fixed_timestep
-
-        elif vector_y == -1 and self.virtual_wall_y != 2:
-            self.sprite.y += -1 * self.speed * game_time.fixed_timestep
-            self.sword.y += -1 * self.speed * game_time.fixed_timestep
-            self.bow.y += -1 * self.speed * game_time.fixed_timestep
-            self.data.cursor.y += -1 * self.speed * game_time.fixed_timestep
+        self.sprite.y += move_y
+        self.sword.y += move_y
+        self.bow.y += move_y
+        self.data.cursor.y += move_y
 
     def updateDamageIndicator(self, game_time):
-        # Applies a shader as the player gets hit.
+        # Applies a shader as the player gets hit, for a second (see receiveDamage).
         if self.damaged:
-            self.damage_timer += game_time.fixed_timestep
             self.data.shaders[self.damaged_type.name].uniform("time").set(self.damage_timer)
 
-            if self.damage_timer > 1:
-                self.damaged = False
-                self.damage_timer = 0
+    def endDamage(self):
+        self.damaged = False
 
     def rotateBow(self):
         if not self.data.gamepad.connected:
@@ -221,26 +196,11 @@ class Player:
         self.sword.x = self.sprite.x - 6
         self.sword.y = self.sprite.y - 8
 
-    def tileCollisionCheck(self):
-        # updates the current position of the player
-        self.closestXTile = int((self.sprite.x + self.sprite.width / 2) / 16)
-        self.closestYTile = int((self.sprite.y + self.sprite.height / 2) / 16)
-
-        # checks if one of the nearby tiles in the Y axis is blocking the player
-        if self.data.costs[self.closestYTile - 1][self.closestXTile] >= 10:
-            self.virtual_wall_y = 2
-        elif self.data.costs[self.closestYTile + 1][self.closestXTile] >= 10:
-            self.virtual_wall_y = 1
-        else:
-            self.virtual_wall_y = 0
-
-        # checks if one of the nearby tiles in the X axis is blocking the player
-        if self.data.costs[self.closestYTile][self.closestXTile - 1] >= 10:
-            self.virtual_wall_x = 2
-        elif self.data.costs[self.closestYTile][self.closestXTile + 1] >= 10:
-            self.virtual_wall_x = 1
-        else:
-            self.virtual_wall_x = 0
+    def collisionBox(self):
+        # the sprite's box, a little smaller so the player fits through gaps one tile wide
+        inset = 2
+        return (self.sprite.x + inset, self.sprite.y + inset,
+                self.sprite.x + self.sprite.width - inset, self.sprite.y + self.sprite.height - inset)
 
     def getMidPosition(self):
         return pyasge.Point2D(self.sprite.x + self.sprite.width / 2, self.sprite.y + self.sprite.height / 2)
@@ -263,6 +223,10 @@ class Player:
         self.damage_timer = 0
         self.damaged_type = damage_type
 
+        if self.damage_end is not None:
+            self.damage_end.cancel()
+        self.damage_end = self.data.timers.schedule(1, self.endDamage)
+
     def setPlayerRespawnPoint(self, new_position):
         # Saves the new player spawn-point
         self.respawn_position = new_position
@@ -272,10 +236,7 @@ class Player:
             enemy.receiveDamage(self.meleeDamage, DamageType.normal_damage)
 
     def rangeAttack(self):
-        # Handles everything about the player shooting arrows
-        self.arrow_num += 1
-        self.arrows.append(Projectile(DamageType.normal_damage, self.data.textures["projectile"]["arrow"],
-                                      self.bow.x + 2, self.bow.y + 2))
+        # Handles everything about the player shooting arrows, the arrows themselves fly in data.projectiles
         self.shootTimer = 0
 
         if not self.data.gamepad.connected:
@@ -289,9 +250,13 @@ class Player:
         direction.y /= normalise
 
         self.rotateBow()
-        self.arrows[self.arrow_num].setDirectionFloats(-direction.x, -direction.y)
-        self.arrows[self.arrow_num].setRotation(self.targetRotation)
+        self.data.projectiles.spawn("arrow", self.bow.x + 2, self.bow.y + 2, -direction.x, -direction.y,
+                                    self.rangeDamage, DamageType.normal_damage, rotation=self.targetRotation)
         self.isShooting = True
+        self.data.timers.schedule(0.30, self.endShoot)
+
+    def endShoot(self):
+        self.isShooting = False
 
     def checkCollision(self, enemy):
         #  if self.data.cursor.x < self.getMidPosition().x:
@@ -308,18 +273,12 @@ class Player:
         height = bottom - top
 
         # returns true if the collision between enemy and collision box is true
-        if floatIntersects(left, top, width, height, enemy.sprite.x, enemy.sprite.y,
+        enemy_x, enemy_y = self.data.transforms.position(enemy)   # the enemy's sprite is only moved when rendered
+        if floatIntersects(left, top, width, height, enemy_x, enemy_y,
                            enemy.sprite.width, enemy.sprite.height):
             return True
         return False
 
-    def checkArrowCollisions(self, enemy: Enemy):
-        for arrow in self.arrows:
-            if spriteIntersects(arrow.sprite, enemy.sprite):
-                enemy.receiveDamage(self.rangeDamage, DamageType.normal_damage)
-                self.arrows.remove(arrow)
-                self.arrow_num -= 1
-
     def respawn(self):
         # retracts the active enemies
         self.data.retract_enemies()
@@ -349,9 +308,6 @@ class Player:
         else:
             self.data.renderer.render(self.bow)
 
-        for arrow in self.arrows:
-            self.data.renderer.render(arrow.sprite)
-
         if not self.damaged:
             self.data.renderer.render(self.sprite)
         else:
@@ -26,7 +26,6 @@ class SoundHandler:
     def __init__(self, game_data: GameData):
         self.data = game_data
         self.sound_engine = pyfmodex.System()
-        self.footstep_timer = 0
         self.footstep_instanced = False
         self.current_footstep = False
         self.volume_music = 0.10
@@ -123,25 +122,21 @@ class SoundHandler:
         self.audio_channel_effects.volume = self.volume_sound_effects
 
     def PlayFootsteps(self, game_time: pyasge.GameTime, player_moving):
-        # if the footsteps are playing keep updating timer
-        if self.footstep_instanced:
-            self.footstep_timer += game_time.fixed_timestep
-
-        # there two ifs will alternate to provide a nice sounding footstep effect
-        if player_moving:
-            if 0.30 > self.footstep_timer < 0.36 and not self.footstep_instanced:
-                self.audio_channel_footsteps = self.sound_engine.play_sound(self.footsteps[self.current_footstep])
-                self.audio_channel_footsteps.volume = self.volume_footsteps
-                self.current_footstep = not self.current_footstep
-                self.footstep_instanced = True
-
-        if self.footstep_timer > 0.41 and self.footstep_instanced:
-            try:
-                self.audio_channel_footsteps.stop()
-            except:
-                pass
-            self.footstep_timer = 0
-            self.footstep_instanced = False
+        # the two footstep sounds alternate to provide a nice sounding footstep effect
+        if player_moving and not self.footstep_instanced:
+            self.audio_channel_footsteps = self.sound_engine.play_sound(self.footsteps[self.current_footstep])
+            self.audio_channel_footsteps.volume = self.volume_footsteps
+            self.current_footstep = not self.current_footstep
+            self.footstep_instanced = True
+            self.data.timers.schedule(0.41, self.StopFootstep)
+
+    def StopFootstep(self):
+        # a footstep lasts 0.41 seconds, then the next one can play
+        try:
+            self.audio_channel_footsteps.stop()
+        except:
+            pass
+        self.footstep_instanced = False
 
     def RestartAudio(self):
         # This restart the sound engine completely, may cause a crash but if too many effects get played the sound will
@@ -0,0 +1,93 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+
+class SpatialHash:
+    """
+    Uniform grid broadphase for boxes that move every frame
+
+    Every box is filed under each grid cell it covers, keyed by the cell's
+    row and column packed into one int64, so nothing depends on the size
+    of the map. rebuild() files one set of boxes (the enemies and the
+    player) as a sorted array of keys; candidates() files a second set
+    (the projectiles) and joins the two on their keys with searchsorted,
+    giving every pair of boxes that share a cell once. Only those pairs
+    need an exact test, instead of every box of one set against every box
+    of the other.
+
+    With 16px cells, the size of a tile, an enemy covers a handful of
+    cells and a projectile one to four.
+    """
+
+    def __init__(self, cell_size: int = 16) -> None:
+        self.cell_size = cell_size
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.size = 0
+
+        # statistics, frame is the last rebuild
+        self.frame_pairs = 0        # candidate pairs handed out since the last rebuild
+        self.frame_brute = 0        # pairs testing every box against every other would have taken
+        self.pairs = 0
+        self.brute = 0
+        self.rebuilds = 0
+
+    def cells(self, min_xs, min_ys, max_xs, max_ys) -> Tuple[np.ndarray, np.ndarray]:
+        # one (key, box) entry per cell a box covers
+        size = self.cell_size
+        first_xs = np.floor(np.asarray(min_xs) / size).astype(np.int64)
+        first_ys = np.floor(np.asarray(min_ys) / size).astype(np.int64)
+        widths = np.floor(np.asarray(max_xs) / size).astype(np.int64) - first_xs + 1
+        heights = np.floor(np.asarray(max_ys) / size).astype(np.int64) - first_ys + 1
+        covered = widths * heights
+
+        boxes = np.repeat(np.arange(len(covered)), covered)
+        local = np.arange(len(boxes)) - np.repeat(np.cumsum(covered) - covered, covered)
+        repeated_widths = np.repeat(widths, covered)
+        xs = np.repeat(first_xs, covered) + local % repeated_widths
+        ys = np.repeat(first_ys, covered) + local // repeated_widths
+        return (ys << 32) + xs, boxes
+
+    def rebuild(self, min_xs, min_ys, max_xs, max_ys) -> None:
+        """ Files the boxes that candidates() is asked against, box i gets id i """
+        keys, ids = self.cells(min_xs, min_ys, max_xs, max_ys)
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = ids[order]
+        self.size = len(min_xs)
+        self.frame_pairs = 0
+        self.frame_brute = 0
+        self.rebuilds += 1
+
+    def candidates(self, min_xs, min_ys, max_xs, max_ys) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Pairs of (box, filed id) that share at least one cell, each pair once
+
+        They come sorted by the filed id first and the box second, so the
+        pairs of the first filed box come first.
+        """
+        count = len(min_xs)
+        self.frame_brute += count * self.size
+        self.brute += count * self.size
+        if not count or not self.size:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        keys, boxes = self.cells(min_xs, min_ys, max_xs, max_ys)
+        lows = np.searchsorted(self.keys, keys, side="left")
+        matches = np.searchsorted(self.keys, keys, side="right") - lows
+        total = int(matches.sum())
+        if not total:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+
+        local = np.arange(total) - np.repeat(np.cumsum(matches) - matches, matches)
+        ids = self.ids[np.repeat(lows, matches) + local]
+        pairs = np.unique(ids * count + np.repeat(boxes, matches))   # a pair sharing two cells is kept once
+
+        self.frame_pairs += len(pairs)
+        self.pairs += len(pairs)
+        return pairs % count, pairs // count
+
+    def stats(self) -> Dict[str, int]:
+        return {"rebuilds": self.rebuilds, "frame_pairs": self.frame_pairs, "frame_brute": self.frame_brute,
+                "pairs": self.pairs, "brute": self.brute}
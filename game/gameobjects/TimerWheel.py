@@ -0,0 +1,177 @@
+import math
+import random
+from typing import Dict, List, Optional
+
+
+class Timer:
+    """ A callback waiting on the wheel, cancel() stops it from firing """
+
+    __slots__ = ("deadline", "callback", "args", "cancelled")
+
+    def __init__(self, deadline: int, callback, args) -> None:
+        self.deadline = deadline  # in ticks
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class TimerWheel:
+    """
+    The game clock, and a hierarchical timing wheel of callbacks on it
+
+    Game.update advances the clock once a frame. Anything that wants to
+    know how long ago something happened reads now (see Stopwatch)
+    instead of adding the frame time to a counter of its own, and
+    anything that has to happen after a delay schedules a callback.
+
+    Time is cut into ticks of one fixed timestep. A timer due within the
+    current block of SLOTS ticks waits in a slot of the first wheel; one
+    due further away waits in the second wheel (SLOTS blocks of SLOTS
+    ticks), the third wheel, or the overflow list. When the first wheel
+    comes round, the slot of the second wheel for the block that starts
+    is emptied into it, and so on up. A frame only looks at the slot of
+    the tick it reaches, so waiting timers cost nothing until they fire.
+    """
+
+    SLOTS = 64
+    LEVELS = 3
+
+    def __init__(self, resolution: float = 1 / 60) -> None:
+        self.resolution = resolution
+        self.now = 0.0
+        self.tick = 0
+        self.wheels: List[List[List[Timer]]] = [[[] for i in range(self.SLOTS)] for j in range(self.LEVELS)]
+        self.overflow: List[Timer] = []
+
+        # statistics
+        self.scheduled = 0
+        self.fired = 0
+        self.cancelled = 0
+        self.cascaded = 0
+
+    def advance(self, seconds: float) -> None:
+        """ Moves the clock on and fires every timer that came due, in the order they were due """
+        self.now += seconds
+        target = int(self.now / self.resolution + 1e-9)
+        while self.tick < target:
+            self.tick += 1
+            self.processTick()
+
+    def schedule(self, delay: float, callback, *args) -> Timer:
+        """ Calls callback(*args) once delay seconds have passed, at the earliest on the next tick """
+        deadline = math.ceil((self.now + delay) / self.resolution - 1e-9)
+        timer = Timer(max(deadline, self.tick + 1), callback, args)
+        self.insert(timer)
+        self.scheduled += 1
+        return timer
+
+    def scheduleRandom(self, low: float, high: float, callback, *args) -> Timer:
+        """ schedule() with the delay drawn once between low and high """
+        return self.schedule(random.uniform(low, high), callback, *args)
+
+    def insert(self, timer: Timer) -> None:
+        deadline = timer.deadline
+        tick = self.tick
+        slots = self.SLOTS
+        for level in range(self.LEVELS):
+            span = slots ** (level + 1)
+            if deadline // span == tick // span:
+                self.wheels[level][(deadline // slots ** level) % slots].append(timer)
+                return
+        self.overflow.append(timer)
+
+    def cascade(self, level: int, index: int) -> None:
+        timers = self.wheels[level][index]
+        self.wheels[level][index] = []
+        for timer in timers:
+            self.insert(timer)
+        self.cascaded += len(timers)
+
+    def processTick(self) -> None:
+        tick = self.tick
+        slots = self.SLOTS
+
+        # a new block of the first wheel starts, the wheels above hand it their timers, highest first
+        if tick % slots == 0:
+            block = tick // slots
+            if block % slots == 0:
+                if (block // slots) % slots == 0:
+                    overflow, self.overflow = self.overflow, []
+                    for timer in overflow:
+                        self.insert(timer)
+                self.cascade(2, (block // slots) % slots)
+            self.cascade(1, block % slots)
+
+        due = self.wheels[0][tick % slots]
+        self.wheels[0][tick % slots] = []
+        for timer in due:
+            if timer.cancelled:
+                self.cancelled += 1
+                continue
+            self.fired += 1
+            timer.callback(*timer.args)
+
+    def clear(self, keep=()) -> None:
+        """ Drops every waiting timer, apart from the ones calling a method of an object in keep
+
+        The clock isn't reset, the stopwatches read it. GamePlay clears the
+        wheel when it starts so that the callbacks of the last run's player
+        and enemies don't fire on them after they are gone.
+        """
+        keep = [id(owner) for owner in keep]
+
+        def kept(timers):
+            remaining = []
+            for timer in timers:
+                if not timer.cancelled and id(getattr(timer.callback, "__self__", None)) in keep:
+                    remaining.append(timer)
+                else:
+                    timer.cancel()
+                    self.cancelled += 1
+            return remaining
+
+        for wheel in self.wheels:
+            for index, slot in enumerate(wheel):
+                if slot:
+                    wheel[index] = kept(slot)
+        self.overflow = kept(self.overflow)
+
+    def pending(self) -> int:
+        return sum(len(slot) for wheel in self.wheels for slot in wheel) + len(self.overflow)
+
+    def stats(self) -> Dict[str, float]:
+        return {"now": self.now, "scheduled": self.scheduled, "fired": self.fired, "cancelled": self.cancelled,
+                "cascaded": self.cascaded, "pending": self.pending()}
+
+
+class Stopwatch:
+    """
+    Attribute that reads as the seconds since it was last set, e.g. enemy.attack_timer
+
+    Setting it to 0 restarts it, setting it to 100 makes it read as if it
+    was started 100 seconds ago. It's worked out from the game clock
+    (owner.data.timers) when read, nothing is added to it every frame.
+    """
+
+    def __set_name__(self, owner, name: str) -> None:
+        self.start = "_" + name + "_start"
+        self.wait = "_" + name + "_wait"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        return instance.data.timers.now - instance.__dict__[self.start]
+
+    def __set__(self, instance, value: float) -> None:
+        instance.__dict__[self.start] = instance.data.timers.now - value
+        instance.__dict__[self.wait] = None
+
+    def waited(self, instance, low: float, high: float) -> bool:
+        """ True once a random wait between low and high has passed, drawn once each time the stopwatch is set """
+        wait: Optional[float] = instance.__dict__.get(self.wait)
+        if wait is None:
+            wait = instance.__dict__[self.wait] = random.uniform(low, high)
+        return self.__get__(instance) > wait
@@ -0,0 +1,132 @@
+import atexit
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from typing import Dict, List
+
+
+class AIExecutor:
+    """
+    Ticks the enemies' behaviour trees on a thread pool (GameData.ai_parallel)
+
+    A frame of enemy AI is split in two phases:
+
+    - think, in parallel. The enemies that are due this frame are handed
+      to the pool in chunks and tick their trees. The main thread waits
+      for the pool, so the player, the proximity table and the other
+      enemies' sprites are a snapshot that nothing changes while the trees
+      read them. A tree only writes to its own enemy's attributes (route,
+      timers, path request); anything that touches the sprites, the
+      transform store or the rest of the game goes through defer() and is
+      queued on the enemy. The shared caches a tree can ask (path
+      scheduler, influence map, sight lines, target sampler) are guarded
+      by shared().
+    - apply, serially. Enemy.think() runs the queued actions in enemy
+      order from the usual enemy loop, where it used to tick the tree.
+
+    Only free threaded CPython builds run the think phase on several
+    cores. On normal builds it doesn't overlap with the NumPy heavy
+    stages either: the trees read the proximity table, influence map,
+    sight lines and flow field, so those are finished before run() (the
+    flow field the frame before), and the projectile update deals damage
+    that resets the timers and routes the trees read, so it can only run
+    after the apply phase. run() waits for the pool and with the GIL the
+    trees take turns on it, so there the pool only adds overhead (see the
+    parallel_ai benchmark), which is why ai_parallel is off by default.
+    While the tree profiler is on, or with fewer enemies than
+    min_enemies, the trees are ticked serially as before.
+    """
+
+    def __init__(self, workers=None, min_enemies: int = 8) -> None:
+        self.workers = workers if workers is not None else min(8, os.cpu_count() or 1)
+        self.min_enemies = min_enemies
+        self.pool = None
+        self.lock = threading.RLock()
+        self.local = threading.local()
+
+        # statistics
+        self.frames = 0
+        self.parallel_frames = 0
+        self.thinks = 0
+        self.deferred = 0
+        self.think_seconds = 0.0
+
+    def thinking(self) -> bool:
+        return getattr(self.local, "actions", None) is not None
+
+    def defer(self, action, args) -> None:
+        self.local.actions.append((action, args))
+
+    def think(self, enemies) -> List[list]:
+        # runs on the pool, one chunk of enemies per task
+        queues = []
+        for enemy in enemies:
+            actions = []
+            self.local.actions = actions
+            try:
+                enemy.behaviour.root.tick(enemy, enemy.data, enemy.re_route_timer)
+            finally:
+                self.local.actions = None
+            queues.append(actions)
+        return queues
+
+    def run(self, data, enemies) -> None:
+        """ Think phase, called once a frame before the enemy loop """
+        self.frames += 1
+        # the profiler keeps the time spent in the children of the node being ticked on itself, shared by every
+        # tree, so profiled trees have to tick one at a time and stay on the main thread
+        if not data.ai_parallel or data.bt_profiler is not None or len(enemies) < self.min_enemies:
+            return  # every enemy ticks its own tree in Enemy.think()
+
+        # picking who is due stays serial, the AI scheduler hands out buckets
+        due = []
+        for enemy in enemies:
+            if data.ai_scheduler.due(enemy):
+                due.append(enemy)
+            else:
+                enemy.ai_actions = ()
+
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="enemy-ai")
+            atexit.register(self.close)
+
+        start = time.perf_counter()
+        size = max(1, -(-len(due) // self.workers))  # ceiling, one chunk per worker
+        chunks = [due[index:index + size] for index in range(0, len(due), size)]
+        for chunk, queues in zip(chunks, self.pool.map(self.think, chunks)):
+            for enemy, actions in zip(chunk, queues):
+                enemy.ai_actions = actions
+                self.deferred += len(actions)
+        self.think_seconds += time.perf_counter() - start
+        self.thinks += len(due)
+        self.parallel_frames += 1
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+            atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, float]:
+        gil = sys._is_gil_enabled() if hasattr(sys, "_is_gil_enabled") else True
+        return {"workers": self.workers, "gil": gil, "frames": self.frames, "parallel_frames": self.parallel_frames,
+                "thinks": self.thinks, "deferred": self.deferred, "think_seconds": self.think_seconds}
+
+
+def defer(data, action, *args) -> None:
+    """ Calls action(*args) now, or queues it for the apply phase when called from the parallel think phase """
+    executor = data.ai_executor
+    if executor is not None and executor.thinking():
+        executor.defer(action, args)
+    else:
+        action(*args)
+
+
+def shared(data):
+    """ Lock for the shared caches the behaviour trees use, taken with a with statement """
+    if data.ai_executor is None:
+        return nullcontext()
+    return data.ai_executor.lock
@@ -0,0 +1,79 @@
+import math
+from typing import Dict
+
+
+class AIScheduler:
+    """
+    Decides which enemies tick their behaviour tree this frame (AI level of detail)
+
+    Enemies close to the player think every frame, the further away they
+    are the fewer frames they think on, and enemies outside the camera
+    view only think now and then. Every enemy gets a bucket when it first
+    asks, handed out round robin, and ticks on the frames where
+    (frame + bucket) is a multiple of its tier's interval, so the enemies
+    of a tier are spread evenly over the frames instead of all thinking
+    on the same one. Timers keep running every frame, so the trees see
+    the real time that passed between ticks.
+    """
+
+    # name, furthest distance from the player in pixels, think every n frames
+    TIERS = [("near", 10 * 16, 1),
+             ("mid", 20 * 16, 2),
+             ("far", math.inf, 4)]
+    OFFSCREEN = ("offscreen", 10)
+
+    def __init__(self) -> None:
+        self.frame = 0
+        self.next_bucket = 0
+        self.player = None
+        self.view = None
+
+        # statistics, per tier
+        names = [tier[0] for tier in self.TIERS] + [self.OFFSCREEN[0], "lod_off"]
+        self.ticks: Dict[str, int] = {name: 0 for name in names}
+        self.skips: Dict[str, int] = {name: 0 for name in names}
+
+    def beginFrame(self, player, view) -> None:
+        """ Called once a frame before the enemies update, view is the camera's (min_x, min_y, max_x, max_y) """
+        self.frame += 1
+        self.player = player
+        self.view = view
+
+    def tier(self, enemy):
+        proximity = enemy.data.proximity
+        if proximity is not None and proximity.has(enemy):
+            x, y = proximity.position(enemy)
+            distance = proximity.distance(enemy)
+        else:
+            position = enemy.getMidPosition()
+            x, y = position.x, position.y
+            distance = position.distance(self.player)
+
+        if self.view is not None and not (self.view[0] <= x <= self.view[2] and self.view[1] <= y <= self.view[3]):
+            return self.OFFSCREEN
+
+        for name, furthest, interval in self.TIERS:
+            if distance <= furthest:
+                return name, interval
+        return self.OFFSCREEN
+
+    def due(self, enemy) -> bool:
+        """ True if the enemy should tick its behaviour tree this frame """
+        if not enemy.data.ai_lod or self.player is None:
+            self.ticks["lod_off"] += 1
+            return True
+
+        if enemy.ai_bucket is None:
+            enemy.ai_bucket = self.next_bucket
+            self.next_bucket += 1
+
+        name, interval = self.tier(enemy)
+        if (self.frame + enemy.ai_bucket) % interval:
+            self.skips[name] += 1
+            return False
+
+        self.ticks[name] += 1
+        return True
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: {"ticks": self.ticks[name], "skips": self.skips[name]} for name in self.ticks}
@@ -0,0 +1,146 @@
+import heapq
+from typing import Dict, List, Optional
+from game.gameobjects.enemyStuff.PathFinding import Location
+
+
+class FlowField:
+    """
+    A reverse Dijkstra map shared by every enemy chasing the same tile
+
+    Instead of running one A* per enemy towards the player, the field is
+    flooded once outwards from the goal tile. Every walkable tile that can
+    reach the goal stores the neighbour that is one step closer to it, so
+    any enemy can read its next step with a single dictionary lookup.
+    Like AStarSearch the field works on the CostGrid's flat tile indices
+    and walks its precomputed neighbour lists.
+
+    The field is only flooded again when the goal tile or the cost map
+    changes, and not all at once: flood() is handed part of the path
+    scheduler's expansion budget every frame and carries on where it
+    stopped. The enemies keep following the previous field until the new
+    one is finished and swapped in. A flood that has started is always
+    finished, even if the player has moved on since; the next one then
+    starts from wherever the player is by then, so a player crossing a
+    tile every few frames can't keep the field from ever being ready.
+    """
+
+    def __init__(self) -> None:
+        self.goal: Optional[Location] = None
+        self.costs_version = None
+        self.next_step: Dict[int, Optional[int]] = {}   # by flat tile index
+        self.distance: Dict[int, float] = {}
+        self.builds = 0
+
+        # the field being flooded, frontier is empty when there's none
+        self.flood_goal: Optional[Location] = None
+        self.flood_version = None
+        self.flood_next_step: Dict[int, Optional[int]] = {}
+        self.flood_distance: Dict[int, float] = {}
+        self.frontier = []
+        self.wanted = None  # (goal, costs version) the next flood is for
+
+        # statistics
+        self.expansions = 0
+        self.floods = 0     # calls to flood() that expanded anything
+
+    def ready(self) -> bool:
+        return self.goal is not None
+
+    def update(self, game_data, goal: Location) -> None:
+        # only floods again when the player moved to a new tile or the map got reloaded
+        self.wanted = goal, game_data.costs_version
+        if not self.frontier:
+            self.begin(game_data)
+
+    def begin(self, game_data) -> None:
+        # starts flooding towards the wanted goal, unless the field already points there
+        if self.wanted is None or self.wanted == (self.goal, self.costs_version):
+            return
+
+        goal, self.flood_version = self.wanted
+        self.flood_goal = goal
+        goal_index = game_data.costs.index(goal)
+        self.flood_next_step = {goal_index: None}
+        self.flood_distance = {goal_index: 0}
+        self.frontier = [(0, goal_index)]
+
+    def flood(self, game_data, budget=None) -> int:
+        """ Expands at most budget tiles of the pending field and returns how many it used """
+        if not self.frontier:
+            return 0
+
+        adjacency = game_data.costs.adjacency
+        values = game_data.costs.values
+        next_step = self.flood_next_step
+        distance = self.flood_distance
+        frontier = self.frontier
+        expansions = 0
+
+        while frontier:
+            if budget is not None and expansions >= budget:
+                break   # carries on from here next time
+
+            cost, current = heapq.heappop(frontier)
+            if cost > distance[current]:  # stale queue entry
+                continue
+            expansions += 1
+
+            # moving from node into current costs whatever current costs to walk on
+            new_cost = cost + values[current]
+            for node in adjacency[current]:
+                if node not in distance or new_cost < distance[node]:
+                    distance[node] = new_cost
+                    next_step[node] = current  # points back down the field towards the goal
+                    heapq.heappush(frontier, (new_cost, node))
+
+        self.expansions += expansions
+        self.floods += 1
+        if not frontier:
+            # finished, the enemies switch over to the new field
+            self.goal = self.flood_goal
+            self.costs_version = self.flood_version
+            self.next_step = next_step
+            self.distance = distance
+            self.flood_next_step = {}
+            self.flood_distance = {}
+            self.builds += 1
+            self.begin(game_data)    # the player may have moved on while this one was flooding
+        return expansions
+
+    def step(self, game_data, tile: Location) -> Optional[Location]:
+        """ Returns the next tile towards the goal, or None if the goal can't be reached """
+        costs = game_data.costs
+        index = self.stepIndex(costs, costs.index(tile))
+        return None if index is None else costs.tile(index)
+
+    def stepIndex(self, costs, index: int) -> Optional[int]:
+        if index in self.next_step:
+            return self.next_step[index]
+
+        # enemies standing on a tile that isn't walkable (spikes, edge of a wall) can still
+        # step off it, so picks the walkable neighbour closest to the goal like the A* would
+        best = None
+        for node in costs.adjacency[index]:
+            if node in self.distance and (best is None or self.distance[node] < self.distance[best]):
+                best = node
+        return best
+
+    def path(self, game_data, start: Location) -> List[Location]:
+        """ Follows the field from start to the goal, same format as reconstruct_path """
+        if start == self.goal:
+            return [start]
+
+        costs = game_data.costs
+        current = self.stepIndex(costs, costs.index(start))
+        if current is None:
+            return []
+
+        path: List[Location] = [start]
+        while current is not None:
+            path.append(costs.tile(current))
+            current = self.next_step[current]
+        return path
+
+    def stats(self) -> Dict[str, float]:
+        return {"builds": self.builds, "flooding": bool(self.frontier), "expansions": self.expansions,
+                "expansions_per_flood": self.expansions / self.floods if self.floods else 0.0}
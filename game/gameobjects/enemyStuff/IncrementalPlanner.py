@@ -0,0 +1,238 @@
+import heapq
+from typing import Dict, List, Optional, Set
+from game.gameobjects.enemyStuff.PathFinding import Location
+
+
+class ReplanStats:
+    """ Expansions spent by full searches and by repairs, shared by every enemy's planner """
+
+    def __init__(self) -> None:
+        self.full_searches = 0
+        self.full_expansions = 0
+        self.repairs = 0
+        self.repair_expansions = 0
+
+    def saved(self) -> float:
+        # what the repairs would have cost as full searches of average size, minus what they did cost
+        if not self.full_searches:
+            return 0.0
+        return self.repairs * self.full_expansions / self.full_searches - self.repair_expansions
+
+    def stats(self) -> Dict[str, float]:
+        return {"full_searches": self.full_searches, "full_expansions": self.full_expansions,
+                "repairs": self.repairs, "repair_expansions": self.repair_expansions,
+                "expansions_saved": self.saved()}
+
+
+REPLAN_STATS = ReplanStats()
+
+
+class IncrementalPlanner:
+    """
+    Per enemy search that repairs its last path instead of starting over
+
+    Chasing enemies ask again every second for a path to a player who has
+    usually only moved a tile or two, while they have walked a little way
+    down their last path. The planner keeps its A* search (g values,
+    parents, closed set and frontier) between calls, in the spirit of
+    LPA* / Fringe-Retrieving A*:
+
+    - a goal that drifted only changes the heuristic, the g values still
+      hold, so the frontier is re-keyed and the search carries on until
+      the new goal comes off it, often without expanding anything.
+    - when the enemy stepped onto a tile of the old tree, the subtree
+      hanging from that tile is still a shortest path tree from it. The
+      rest of the tree is dropped and the fringe of the kept subtree
+      becomes the new frontier.
+
+    Any other change, a new cost map, another room or leaving the tree,
+    falls back to a full search.
+
+    The planner is the resumable search of its enemy's path requests:
+    begin() works out what can be kept and step() expands at most budget
+    nodes, like AStarSearch, so the path scheduler spreads repairs and
+    full searches alike over its per frame budget.
+
+    Like AStarSearch the search state is kept by the CostGrid's flat tile
+    indices and expands along its precomputed neighbour lists.
+    """
+
+    def __init__(self, stats: ReplanStats = REPLAN_STATS) -> None:
+        self.stats = stats
+        self.game_data = None
+        self.root: Optional[Location] = None
+        self.goal: Optional[Location] = None
+        self.bounds = None
+        self.costs_version = None
+        self.done = False
+        self.repairing = False
+
+        self.root_index: Optional[int] = None
+        self.goal_index: Optional[int] = None
+        self.cost_so_far: Dict[int, float] = {}
+        self.came_from: Dict[int, Optional[int]] = {}
+        self.closed: Set[int] = set()
+        self.frontier = []
+
+    def plan(self, game_data, start: Location, goal: Location) -> List[Location]:
+        """ Tiles from start to goal in one go, the goal has to be reachable (see ReachabilityIndex.connected) """
+        self.begin(game_data, start, goal)
+        self.step()
+        return self.path()
+
+    def begin(self, game_data, start: Location, goal: Location) -> "IncrementalPlanner":
+        """ Gets the planner ready to search from start to goal, repairing the last search if it can """
+        self.game_data = game_data
+        bounds = game_data.reachability.bounds(goal)
+        start_index = game_data.costs.index(start)
+
+        if self.done and start == self.goal and start_index not in self.closed and \
+                self.costs_version == game_data.costs_version:
+            # the enemy caught up with the old goal, its g value is final as the search stopped on it
+            self.expand(game_data, start_index)
+
+        if self.root is None or self.costs_version != game_data.costs_version or \
+                self.bounds != bounds or start_index not in self.closed:
+            self.reset(game_data, start, goal, bounds)
+            self.repairing = False
+            self.stats.full_searches += 1
+        else:
+            if start != self.root:
+                self.reroot(game_data, start)
+            self.goal = goal
+            self.goal_index = game_data.costs.index(goal)
+            self.rekey(game_data)
+            self.repairing = True
+            self.stats.repairs += 1
+
+        self.done = False
+        return self
+
+    def reset(self, game_data, start: Location, goal: Location, bounds) -> None:
+        self.root = start
+        self.goal = goal
+        self.root_index = game_data.costs.index(start)
+        self.goal_index = game_data.costs.index(goal)
+        self.bounds = bounds
+        self.costs_version = game_data.costs_version
+
+        self.cost_so_far = {self.root_index: 0}
+        self.came_from = {self.root_index: None}
+        self.closed = set()
+        self.frontier = [(self.heuristic(game_data, self.root_index), 0, self.root_index)]
+
+    def heuristic(self, game_data, node: int) -> int:
+        # every step costs 1 and corners can be cut, so the Chebyshev distance never overestimates
+        return max(abs(game_data.costs.xs[node] - self.goal[0]), abs(game_data.costs.ys[node] - self.goal[1]))
+
+    def neighbours(self, game_data, node: int) -> List[int]:
+        # the walkable neighbours inside the goal's area, an enemy on a wall tile could see into the next one
+        costs = game_data.costs
+        min_x, min_y, max_x, max_y = self.bounds
+        return [neighbour for neighbour in costs.adjacency[node]
+                if min_x <= costs.xs[neighbour] <= max_x and min_y <= costs.ys[neighbour] <= max_y]
+
+    def step(self, budget=None) -> int:
+        # A* that leaves the goal on the frontier, so every closed tile keeps all its neighbours
+        # generated and the search can be carried on from here next time
+        expansions = 0
+        goal = self.goal_index
+        while self.frontier and goal not in self.closed:
+            priority, cost, current = self.frontier[0]
+            if current in self.closed or cost > self.cost_so_far[current]:  # stale queue entry
+                heapq.heappop(self.frontier)
+                continue
+
+            if current == goal:
+                break
+
+            if budget is not None and expansions >= budget:
+                self.count(expansions)
+                return expansions  # carries on from here next time
+
+            heapq.heappop(self.frontier)
+            self.expand(self.game_data, current)
+            expansions += 1
+
+        self.done = True
+        self.count(expansions)
+        return expansions
+
+    def count(self, expansions: int) -> None:
+        if self.repairing:
+            self.stats.repair_expansions += expansions
+        else:
+            self.stats.full_expansions += expansions
+
+    def path(self) -> List[Location]:
+        """ Tiles from the root to the goal, same format as reconstruct_path """
+        if self.goal_index not in self.came_from:
+            return []
+
+        tile = self.game_data.costs.tile
+        path = []
+        current = self.goal_index
+        while current is not None:
+            path.append(tile(current))
+            current = self.came_from[current]
+        path.reverse()
+        return path
+
+    def expand(self, game_data, current: int) -> None:
+        self.closed.add(current)
+        cost = self.cost_so_far[current]
+        values = game_data.costs.values
+
+        for node in self.neighbours(game_data, current):
+            if node in self.closed:
+                continue
+            new_cost = cost + values[node]
+            if node not in self.cost_so_far or new_cost < self.cost_so_far[node]:
+                self.cost_so_far[node] = new_cost
+                self.came_from[node] = current
+                heapq.heappush(self.frontier, (new_cost + self.heuristic(game_data, node), new_cost, node))
+
+    def reroot(self, game_data, start: Location) -> None:
+        # keeps the part of the tree below the tile the enemy is standing on
+        children: Dict[int, List[int]] = {}
+        for node in self.closed:
+            parent = self.came_from[node]
+            if parent is not None:
+                children.setdefault(parent, []).append(node)
+
+        start_index = game_data.costs.index(start)
+        shift = self.cost_so_far[start_index]
+        kept: Set[int] = set()
+        cost_so_far: Dict[int, float] = {}
+        came_from: Dict[int, Optional[int]] = {start_index: None}
+        stack = [start_index]
+        while stack:
+            node = stack.pop()
+            kept.add(node)
+            cost_so_far[node] = self.cost_so_far[node] - shift
+            for child in children.get(node, []):
+                came_from[child] = node
+                stack.append(child)
+
+        # the neighbours of the kept tiles become the new frontier
+        values = game_data.costs.values
+        for node in kept:
+            for neighbour in self.neighbours(game_data, node):
+                if neighbour in kept:
+                    continue
+                new_cost = cost_so_far[node] + values[neighbour]
+                if neighbour not in cost_so_far or new_cost < cost_so_far[neighbour]:
+                    cost_so_far[neighbour] = new_cost
+                    came_from[neighbour] = node
+
+        self.root = start
+        self.root_index = start_index
+        self.closed = kept
+        self.cost_so_far = cost_so_far
+        self.came_from = came_from
+
+    def rekey(self, game_data) -> None:
+        # g values don't depend on the goal, only the priorities of the open tiles do
+        self.frontier = [(cost + self.heuristic(game_data, node), cost, node)
+                         for node, cost in self.cost_so_far.items() if node not in self.closed]
+        heapq.heapify(self.frontier)
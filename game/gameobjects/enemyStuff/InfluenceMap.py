@@ -0,0 +1,199 @@
+import math
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from game.gameobjects.CostGrid import WALL_COST
+
+Location = Tuple[int, int]
+
+
+def convolve(grid: np.ndarray, kernel: np.ndarray) -> np.ndarray:
+    """ 2D convolution with zero padding, as a sum of shifted copies of the grid (no SciPy needed) """
+    radius_y = kernel.shape[0] // 2
+    radius_x = kernel.shape[1] // 2
+    padded = np.pad(grid, ((radius_y, radius_y), (radius_x, radius_x)))
+    result = np.zeros(grid.shape, dtype=np.float32)
+    height, width = grid.shape
+    for ky in range(kernel.shape[0]):
+        for kx in range(kernel.shape[1]):
+            if kernel[ky, kx]:
+                result += kernel[ky, kx] * padded[ky:ky + height, kx:kx + width]
+    return result
+
+
+def falloff_kernel(radius: int) -> np.ndarray:
+    """ Square kernel that is 1 in the middle and drops linearly to 0 one tile past the radius """
+    offsets = np.arange(-radius, radius + 1)
+    rings = np.maximum(np.abs(offsets)[:, None], np.abs(offsets)[None, :])
+    return (1 - rings / (radius + 1)).astype(np.float32)
+
+
+class InfluenceMap:
+    """
+    Scores the tiles around the player as firing positions for the rangers
+
+    Three layers over the cost grid are combined:
+
+    - cover, how many walls are close to a tile. It only depends on the
+      cost map, so it's convolved once per cost map.
+    - crowding, a falloff stamped around every enemy and every target a
+      ranger already claimed. Stamps are added and taken away as enemies
+      change tile, which is the same as convolving the occupancy again.
+    - the distance band, best halfway between the closest and furthest
+      rings a ranger wants to stand on. Only the window around the player
+      is ever looked at, so it's worked out for that window, and only
+      again when the player changes tile.
+
+    pick() adds the window of the three layers up, masks out the tiles the
+    ranger can't reach and takes the best one, one NumPy lookup instead of
+    searching paths to random offsets.
+    """
+
+    COVER_RADIUS = 2
+    CROWD_RADIUS = 2
+    COVER_WEIGHT = 0.05    # per nearby wall, weighted by the falloff
+    CROWD_WEIGHT = 0.6
+
+    def __init__(self) -> None:
+        self.costs_version = None
+        self.areas: Optional[np.ndarray] = None
+        self.cover: Optional[np.ndarray] = None
+        self.crowding: Optional[np.ndarray] = None
+        self.crowd_kernel = falloff_kernel(self.CROWD_RADIUS)
+
+        self.player: Optional[Location] = None
+        self.bands: Dict[Tuple[int, int], Tuple[Tuple[int, int, int, int], np.ndarray]] = {}
+        self.occupied: Dict[object, Location] = {}   # tile every enemy is stamped on
+        self.claims: Dict[object, Location] = {}     # targets picked by the rangers
+
+        # statistics
+        self.band_updates = 0
+        self.stamps = 0
+        self.picks = 0
+
+    def validate(self, data) -> None:
+        # the static layers are rebuilt whenever the cost map changes
+        if self.costs_version == data.costs_version:
+            return
+        self.costs_version = data.costs_version
+
+        grid = data.costs.grid
+        self.areas = np.array(data.reachability.components, dtype=np.int32)
+        self.cover = convolve((grid >= WALL_COST).astype(np.float32), falloff_kernel(self.COVER_RADIUS))
+        self.crowding = np.zeros(grid.shape, dtype=np.float32)
+        self.player = None
+        self.bands.clear()
+        self.occupied.clear()
+        self.claims.clear()
+
+    def update(self, data, enemies, player: Location) -> None:
+        """ Called once a frame after the proximity table has been filled, while there are rangers to ask """
+        self.validate(data)
+
+        if player != self.player:
+            self.player = player
+            self.bands.clear()   # built again for the new tile the first time a ranger asks
+
+        tile_width, tile_height = data.game_map.tile_size
+        proximity = data.proximity
+        present = set()
+        for enemy in enemies:
+            present.add(enemy)
+            if proximity is not None and proximity.has(enemy):
+                x, y = proximity.position(enemy)
+            else:
+                position = enemy.getMidPosition()
+                x, y = position.x, position.y
+            self.move(self.occupied, enemy, (int(x / tile_width), int(y / tile_height)))
+
+        # enemies that died or were sent back to their spawns
+        for stamps in (self.occupied, self.claims):
+            for enemy in [enemy for enemy in stamps if enemy not in present]:
+                self.move(stamps, enemy, None)
+
+    def move(self, stamps: Dict[object, Location], enemy, tile: Optional[Location]) -> None:
+        old = stamps.get(enemy)
+        if old == tile:
+            return
+        if old is not None:
+            self.stamp(old, -1)
+            del stamps[enemy]
+        if tile is not None:
+            self.stamp(tile, 1)
+            stamps[enemy] = tile
+
+    def stamp(self, tile: Location, sign: int) -> None:
+        radius = self.CROWD_RADIUS
+        window, kernel = self.clip(tile, radius, self.crowd_kernel)
+        if window is not None:
+            min_x, min_y, max_x, max_y = window
+            self.crowding[min_y:max_y, min_x:max_x] += sign * kernel
+            self.stamps += 1
+
+    def clip(self, tile: Location, radius: int, kernel: np.ndarray):
+        # the part of the map a kernel centred on tile covers, and the matching part of the kernel
+        height, width = self.crowding.shape
+        min_x = max(tile[0] - radius, 0)
+        min_y = max(tile[1] - radius, 0)
+        max_x = min(tile[0] + radius + 1, width)
+        max_y = min(tile[1] + radius + 1, height)
+        if min_x >= max_x or min_y >= max_y:
+            return None, None
+        kernel = kernel[min_y - tile[1] + radius:max_y - tile[1] + radius,
+                        min_x - tile[0] + radius:max_x - tile[0] + radius]
+        return (min_x, min_y, max_x, max_y), kernel
+
+    def band(self, closest: int, furthest: int):
+        # distance band around the player for one ranger type, cached until the player changes tile
+        key = (closest, furthest)
+        band = self.bands.get(key)
+        if band is None:
+            offsets = np.arange(-furthest, furthest + 1)
+            distances = np.hypot(offsets[:, None], offsets[None, :])
+            middle = (closest + furthest) / 2
+            scores = 1 - np.abs(distances - middle) / (furthest - middle + 1)
+            scores[(distances < closest) | (distances > furthest)] = -math.inf
+            band = self.clip(self.player, furthest, scores.astype(np.float32))
+            self.bands[key] = band
+            self.band_updates += 1
+        return band
+
+    def pick(self, data, enemy, closest: int, furthest: int) -> Optional[Location]:
+        """ Best tile closest to furthest tiles from the player that the enemy can reach, None if there isn't one """
+        self.validate(data)
+        if self.player is None:
+            return None
+        self.picks += 1
+
+        start = data.game_map.tile(enemy.getMidPosition())
+        components = data.reachability.startComponents(start)
+        window, scores = self.band(closest, furthest)
+        if window is None or not components:
+            return None
+
+        # the enemy's own stamps shouldn't push it away from where it is or what it picked last time
+        self.move(self.claims, enemy, None)
+        self.move(self.occupied, enemy, None)
+
+        min_x, min_y, max_x, max_y = window
+        scores = scores + self.COVER_WEIGHT * self.cover[min_y:max_y, min_x:max_x] \
+            - self.CROWD_WEIGHT * self.crowding[min_y:max_y, min_x:max_x]
+        areas = self.areas[min_y:max_y, min_x:max_x]
+        reachable = areas == components[0]   # non-walkable tiles are labelled -1
+        for component in components[1:]:
+            reachable |= areas == component
+        scores[~reachable] = -math.inf
+
+        self.move(self.occupied, enemy, start)
+        best = int(np.argmax(scores))
+        if scores.flat[best] == -math.inf:
+            return None
+
+        target = (min_x + best % (max_x - min_x), min_y + best // (max_x - min_x))
+        self.move(self.claims, enemy, target)
+        return target
+
+    def stats(self) -> Dict[str, int]:
+        return {"band_updates": self.band_updates, "stamps": self.stamps, "picks": self.picks,
+                "claims": len(self.claims)}
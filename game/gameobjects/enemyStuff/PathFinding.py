@@ -1,7 +1,11 @@
 import pyasge
 import heapq
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
 from typing import Dict, List, Tuple, TypeVar, Optional
 from game.gamedata import GameData
+from game.gameobjects.LineOfSight import smooth_path
 
 T = TypeVar('T')
 
@@ -27,13 +31,103 @@ class PriorityQueue:
         return heapq.heappop(self.elements)[1]
 
 
-def get_neighbours(game_data, current_node: Location, map_width, map_height) -> List[Location]:
+class PathCache:
+    """
+    Bounded LRU cache of tile paths keyed by (start tile, goal tile)
+
+    Enemies keep asking for the same routes, so finished searches are kept
+    here until the cost map changes. Paths are stored as tuples of tiles
+    and handed out as new lists, callers are free to change what they get.
+
+    Exact (start, goal) pairs rarely come round twice: EnemyPathReset
+    clears a route every second and by then the enemy has walked a few
+    tiles down it. So every cached path is also indexed by the tiles it
+    passes through, and a lookup from any of them gets the rest of that
+    path (with suffixes on). The rest of a path found by the search is
+    as good a route from that tile as the search would find again.
+    """
+
+    def __init__(self, capacity: int = 256, suffixes: bool = True):
+        self.capacity = capacity
+        self.suffixes = suffixes
+        self.paths: OrderedDict[Tuple[Location, Location], Tuple[Location, ...]] = OrderedDict()
+        self.through: Dict[Location, Dict[Location, Tuple[Location, Location]]] = {}  # goal -> tile -> path key
+        self.costs_version = None
+
+        # statistics
+        self.hits = 0
+        self.suffix_hits = 0    # hits that were the rest of a path from an earlier tile
+        self.misses = 0
+        self.evictions = 0
+
+    def validate(self, game_data) -> None:
+        # every path is worthless once the cost map changed
+        if self.costs_version != game_data.costs_version:
+            self.paths.clear()
+            self.through.clear()
+            self.costs_version = game_data.costs_version
+
+    def get(self, game_data, start: Location, goal: Location) -> Optional[List[Location]]:
+        self.validate(game_data)
+
+        key = (start, goal)
+        path = self.paths.get(key)
+        if path is None and self.suffixes:
+            key = self.through.get(goal, {}).get(start)
+            path = self.paths.get(key) if key is not None else None
+            if path is not None:
+                self.suffix_hits += 1
+                path = path[path.index(start):]
+        if path is None:
+            self.misses += 1
+            return None
+
+        self.paths.move_to_end(key)  # most recently used
+        self.hits += 1
+        return list(path)
+
+    def put(self, game_data, start: Location, goal: Location, path: List[Location]) -> None:
+        self.validate(game_data)
+
+        key = (start, goal)
+        if key in self.paths:
+            self.forget(key)
+        self.paths[key] = tuple(path)
+        if self.suffixes:
+            through = self.through.setdefault(goal, {})
+            for tile in path[:-1]:
+                through[tile] = key
+        if len(self.paths) > self.capacity:
+            self.forget(next(iter(self.paths)))  # least recently used
+            self.evictions += 1
+
+    def forget(self, key: Tuple[Location, Location]) -> None:
+        path = self.paths.pop(key)
+        through = self.through.get(key[1])
+        if through is None:
+            return
+        for tile in path:
+            if through.get(tile) == key:
+                del through[tile]
+        if not through:
+            del self.through[key[1]]
+
+    def hitRate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {"size": len(self.paths), "hits": self.hits, "suffix_hits": self.suffix_hits, "misses": self.misses,
+                "evictions": self.evictions, "hit_rate": self.hitRate()}
+
+
+def get_neighbours(game_data, current_node: Location, map_width, map_height, min_x=0, min_y=0) -> List[Location]:
     neighbours = []
     for new_position in [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]:
         node_position = (current_node[0] + new_position[0], current_node[1] + new_position[1])  # each eight neighbours
 
-        if node_position[0] > map_width - 1 or node_position[0] < 0 or \
-                node_position[1] > map_height - 1 or node_position[1] < 0:  # checks neighbour is in the map
+        if node_position[0] > map_width - 1 or node_position[0] < min_x or \
+                node_position[1] > map_height - 1 or node_position[1] < min_y:  # checks neighbour is in the map
             continue
 
         if game_data.costs[node_position[1]][node_position[0]] != 1:  # checks node cost
@@ -50,35 +144,102 @@ def heuristic(a: Location, b: Location) -> float:  # H value under estimate  of
     return abs(x1 - x2) + abs(y1 - y2)
 
 
-def a_star_priority(game_data, start: Location, goal: Location):
-
-    map_width = game_data.game_map.width  # maps size
-    map_height = game_data.game_map.height
-
-    frontier = PriorityQueue()  # Create priority queue
-    frontier.put(start, 0)  # Put in starting node with the highest priority
-    came_from: Dict[Location, Optional[Location]] = {}
-    cost_so_far: Dict[Location, float] = {}
-    came_from[start] = None  # neighbours from nodes being checked
-    cost_so_far[start] = 0
-
-    while not frontier.empty():
-        current: Location = frontier.get()  # Current is now highest priority element from queue
-
-        if current == goal:  # if end is met stops search
-            break
-
-        for node in get_neighbours(game_data, current, map_width, map_height):
-            new_cost = cost_so_far[current] + game_data.costs[node[1]][node[0]]
-            # adds cost of current node to neighbours
-
-            if node not in cost_so_far or new_cost < cost_so_far[node]:  # checks if current cost is cheaper
-                cost_so_far[node] = new_cost
-                priority = new_cost + heuristic(node, goal)  # adds new cost and predicted cost to priority list
-                frontier.put(node, priority)
-                came_from[node] = current  # adds to list of nodes visited
-
-    return came_from  # returns cheapest path
+class AStarSearch:
+    """
+    A single a_star_priority search that can be paused and resumed
+
+    step() expands at most budget nodes and returns how many it used,
+    the search keeps its frontier between calls so a long search can be
+    spread over several frames. done is set once the goal is reached or
+    the frontier runs dry, expansions counts every node it expanded.
+
+    Tiles are handled as flat indices into the CostGrid, so the inner
+    loop walks the precomputed neighbour lists instead of building them.
+    """
+
+    def __init__(self, game_data, start: Location, goal: Location, bounds=None):
+        self.costs = game_data.costs
+        self.start = start
+        self.goal = goal
+        self.done = False
+        self.expansions = 0
+
+        self.start_index = self.costs.index(start)
+        self.goal_index = self.costs.index(goal)
+
+        # clips the search to a box (min_x, min_y, max_x, max_y) e.g. the room's. A search from a walkable
+        # tile can't leave its own area anyway, only one starting on a wall or spikes needs the check
+        self.bounds = None
+        if bounds is not None and self.costs.values[self.start_index] != 1:
+            self.bounds = bounds
+
+        self.frontier = PriorityQueue()  # Create priority queue
+        self.frontier.put(self.start_index, 0)  # Put in starting node with the highest priority
+        self.came_from: Dict[int, Optional[int]] = {}
+        self.cost_so_far: Dict[int, float] = {}
+        self.came_from[self.start_index] = None  # neighbours from nodes being checked
+        self.cost_so_far[self.start_index] = 0
+
+    def step(self, budget=None) -> int:
+        came_from = self.came_from
+        cost_so_far = self.cost_so_far
+        adjacency = self.costs.adjacency
+        values = self.costs.values
+        xs = self.costs.xs
+        ys = self.costs.ys
+        goal = self.goal_index
+        goal_x, goal_y = self.goal
+        expansions = 0
+
+        while not self.frontier.empty():
+            if budget is not None and expansions >= budget:
+                self.expansions += expansions
+                return expansions  # carries on from here next time
+
+            current = self.frontier.get()  # Current is now highest priority element from queue
+            expansions += 1
+
+            if current == goal:  # if end is met stops search
+                break
+
+            for node in adjacency[current]:
+                if self.bounds is not None and not (self.bounds[0] <= xs[node] <= self.bounds[2] and
+                                                    self.bounds[1] <= ys[node] <= self.bounds[3]):
+                    continue
+
+                new_cost = cost_so_far[current] + values[node]
+                # adds cost of current node to neighbours
+
+                if node not in cost_so_far or new_cost < cost_so_far[node]:  # checks if current cost is cheaper
+                    cost_so_far[node] = new_cost
+                    # adds new cost and predicted cost (manhattan distance) to priority list
+                    priority = new_cost + abs(xs[node] - goal_x) + abs(ys[node] - goal_y)
+                    self.frontier.put(node, priority)
+                    came_from[node] = current  # adds to list of nodes visited
+
+        self.done = True
+        self.expansions += expansions
+        return expansions
+
+    def path(self) -> List[Location]:
+        if self.goal_index not in self.came_from:
+            return []
+
+        path = []
+        current = self.goal_index
+        while current is not None:
+            path.append(self.costs.tile(current))
+            current = self.came_from[current]
+        path.reverse()
+        return path
+
+
+def a_star_priority(game_data, start: Location, goal: Location, bounds=None):
+    search = AStarSearch(game_data, start, goal, bounds)
+    search.step()
+    tile = search.costs.tile
+    return {tile(node): None if parent is None else tile(parent)
+            for node, parent in search.came_from.items()}  # returns cheapest path
 
 
 def reconstruct_path(came_from: Dict[Location, Location],
@@ -94,6 +255,248 @@ def reconstruct_path(came_from: Dict[Location, Location],
     return path
 
 
+class JumpPointSearch:
+    """
+    Jump Point Search over the walkable (cost 1) tiles
+
+    On uniform cost areas most of the 8 neighbours A* pushes lead to
+    symmetric paths of the same length. JPS only stops on tiles where the
+    route has to turn (forced neighbours) and scans straight and diagonal
+    lines in between, so far fewer nodes reach the priority queue.
+    Diagonal moves follow the same rule as get_neighbours, corners can be cut.
+    Like AStarSearch it can be paused and resumed with step().
+    """
+
+    def __init__(self, game_data, start: Location, goal: Location, bounds=None):
+        self.game_data = game_data
+        self.start = start
+        self.goal = goal
+        self.done = False
+        self.found = False
+        self.expansions = 0
+
+        if bounds is None:
+            bounds = [0, 0, game_data.game_map.width - 1, game_data.game_map.height - 1]
+        self.min_x, self.min_y, self.max_x, self.max_y = bounds
+
+        self.rows = game_data.costs.rows  # skips the compatibility accessor, walkable() runs a lot
+        self.frontier = [(0, 0, start)]
+        self.came_from: Dict[Location, Optional[Location]] = {start: None}
+        self.cost_so_far: Dict[Location, float] = {start: 0}
+
+    def walkable(self, x: int, y: int) -> bool:
+        return self.min_x <= x <= self.max_x and self.min_y <= y <= self.max_y and self.rows[y][x] == 1
+
+    def step(self, budget=None) -> int:
+        goal = self.goal
+        expansions = 0
+
+        while self.frontier:
+            if budget is not None and expansions >= budget:
+                self.expansions += expansions
+                return expansions  # carries on from here next time
+
+            priority, cost, current = heapq.heappop(self.frontier)
+            if cost > self.cost_so_far[current]:  # stale queue entry
+                continue
+            expansions += 1
+
+            if current == goal:
+                self.found = True
+                break
+
+            for direction in self.directions(current, self.came_from[current]):
+                jump_point = self.jump(current[0] + direction[0], current[1] + direction[1], direction[0], direction[1])
+                if jump_point is None:
+                    continue
+
+                # jump points are joined by straight or diagonal lines, every step costs 1
+                new_cost = cost + max(abs(jump_point[0] - current[0]), abs(jump_point[1] - current[1]))
+                if jump_point not in self.cost_so_far or new_cost < self.cost_so_far[jump_point]:
+                    self.cost_so_far[jump_point] = new_cost
+                    self.came_from[jump_point] = current
+                    estimate = max(abs(jump_point[0] - goal[0]), abs(jump_point[1] - goal[1]))
+                    heapq.heappush(self.frontier, (new_cost + estimate, new_cost, jump_point))
+
+        self.done = True
+        self.expansions += expansions
+        return expansions
+
+    def directions(self, node: Location, parent: Optional[Location]) -> List[Location]:
+        # the start tile tries every direction, any other node only the ones that aren't
+        # reachable as cheaply from its parent: the natural and the forced neighbours
+        x, y = node
+        if parent is None:
+            return [offset for offset in [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+                    if self.walkable(x + offset[0], y + offset[1])]
+
+        dx = (x > parent[0]) - (x < parent[0])
+        dy = (y > parent[1]) - (y < parent[1])
+        directions = []
+
+        if dx and dy:
+            if self.walkable(x, y + dy):
+                directions.append((0, dy))
+            if self.walkable(x + dx, y):
+                directions.append((dx, 0))
+            if self.walkable(x + dx, y + dy):
+                directions.append((dx, dy))
+            if not self.walkable(x - dx, y) and self.walkable(x - dx, y + dy):
+                directions.append((-dx, dy))
+            if not self.walkable(x, y - dy) and self.walkable(x + dx, y - dy):
+                directions.append((dx, -dy))
+        elif dx:
+            if self.walkable(x + dx, y):
+                directions.append((dx, 0))
+            if not self.walkable(x, y + 1) and self.walkable(x + dx, y + 1):
+                directions.append((dx, 1))
+            if not self.walkable(x, y - 1) and self.walkable(x + dx, y - 1):
+                directions.append((dx, -1))
+        else:
+            if self.walkable(x, y + dy):
+                directions.append((0, dy))
+            if not self.walkable(x + 1, y) and self.walkable(x + 1, y + dy):
+                directions.append((1, dy))
+            if not self.walkable(x - 1, y) and self.walkable(x - 1, y + dy):
+                directions.append((-1, dy))
+
+        return directions
+
+    def jump(self, x: int, y: int, dx: int, dy: int) -> Optional[Location]:
+        # keeps moving in one direction until it finds the goal, a forced neighbour or a wall
+        while self.walkable(x, y):
+            if (x, y) == self.goal:
+                return x, y
+
+            if dx and dy:
+                if (self.walkable(x - dx, y + dy) and not self.walkable(x - dx, y)) or \
+                        (self.walkable(x + dx, y - dy) and not self.walkable(x, y - dy)):
+                    return x, y
+                # a diagonal jump stops where one of its straight scans finds something
+                if self.jump(x + dx, y, dx, 0) is not None or self.jump(x, y + dy, 0, dy) is not None:
+                    return x, y
+            elif dx:
+                if (self.walkable(x + dx, y + 1) and not self.walkable(x, y + 1)) or \
+                        (self.walkable(x + dx, y - 1) and not self.walkable(x, y - 1)):
+                    return x, y
+            else:
+                if (self.walkable(x + 1, y + dy) and not self.walkable(x + 1, y)) or \
+                        (self.walkable(x - 1, y + dy) and not self.walkable(x - 1, y)):
+                    return x, y
+
+            x += dx
+            y += dy
+
+        return None
+
+    def path(self) -> List[Location]:
+        if not self.found:
+            return []
+
+        # fills in the tiles between jump points so the path steps one tile at a time
+        jump_points = reconstruct_path(self.came_from, self.start, self.goal)
+        path: List[Location] = [self.start]
+        for target in jump_points[1:]:
+            x, y = path[-1]
+            dx = (target[0] > x) - (target[0] < x)
+            dy = (target[1] > y) - (target[1] < y)
+            while (x, y) != target:
+                x += dx
+                y += dy
+                path.append((x, y))
+        return path
+
+
+class SearchEngine(ABC):
+    """
+    Base class for the tile searches resolve() can switch between
+
+    begin() returns a resumable search (see AStarSearch) and search() runs
+    one to the end. Paths come back in the same format as reconstruct_path,
+    or as an empty list if the goal can't be reached. Engines keep no
+    state, so the path service's workers can share them; every search
+    counts the nodes it expanded itself so engines can be compared.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def begin(self, game_data, start: Location, goal: Location, bounds=None):
+        pass
+
+    def search(self, game_data, start: Location, goal: Location, bounds=None) -> List[Location]:
+        search = self.begin(game_data, start, goal, bounds)
+        search.step()
+        return search.path()
+
+
+class AStarEngine(SearchEngine):
+    """The original 8 neighbour A*"""
+
+    name = "a_star"
+
+    def begin(self, game_data, start: Location, goal: Location, bounds=None) -> AStarSearch:
+        return AStarSearch(game_data, start, goal, bounds)
+
+
+class JumpPointEngine(SearchEngine):
+    """Jump Point Search, see JumpPointSearch"""
+
+    name = "jps"
+
+    def begin(self, game_data, start: Location, goal: Location, bounds=None) -> JumpPointSearch:
+        return JumpPointSearch(game_data, start, goal, bounds)
+
+
+# engines resolve() can be switched between with GameData.path_engine
+SEARCH_ENGINES: Dict[str, SearchEngine] = {
+    AStarEngine.name: AStarEngine(),
+    JumpPointEngine.name: JumpPointEngine(),
+}
+
+
+def compare_engines(game_data, queries: List[Tuple[Location, Location]]) -> Dict[str, Dict[str, float]]:
+    """
+    Runs every query through every engine and reports the nodes each one expanded
+
+    Only queries with a reachable goal should be passed in, see ReachabilityIndex.
+    """
+    results = {}
+    for name, engine in SEARCH_ENGINES.items():
+        expansions = 0
+        path_length = 0
+        timer = time.perf_counter()
+        for start, goal in queries:
+            search = engine.begin(game_data, start, goal)
+            search.step()
+            expansions += search.expansions
+            path_length += len(search.path())
+        results[name] = {"queries": len(queries),
+                         "expansions": expansions,
+                         "path_tiles": path_length,
+                         "seconds": time.perf_counter() - timer}
+    return results
+
+
+def find_path(data: GameData, start: Location, end: Location) -> List[Location]:
+    # returns the tiles from start to end, or an empty list if end can't be reached
+    if data.reachability.connected(start, end):
+        cords_list = data.path_cache.get(data, start, end)
+
+        if cords_list is None:
+            engine = SEARCH_ENGINES[data.path_engine]
+            cords_list = engine.search(data, start, end, data.reachability.bounds(end))  # cheapest start to end route
+            data.path_cache.put(data, start, end, cords_list)
+
+        return cords_list
+
+    if data.path_hierarchical:
+        # end is in another room, plans over the teleporters and only searches the walk to the first one
+        return data.room_graph.firstLeg(data, start, end)
+
+    return []  # doesn't flood the whole map looking for a target in another room
+
+
 def resolve(xy: pyasge.Point2D, data: GameData, enemy):
     # convert point to tile location
     tile_loc = data.game_map.tile(xy)  # last stop on journey
@@ -111,14 +514,31 @@ def resolve(xy: pyasge.Point2D, data: GameData, enemy):
     end = tile_loc
 
     if tile_cost < 5:  # stops from clicking on any tiles over cost of 10
-        path_finding = a_star_priority(data, start, end)
-
-        cords_list = reconstruct_path(path_finding, start, end)  # takes cheapest math and sets the start to end route
-
-        for coordinates in cords_list:
-            tiles_to_visit.append(data.game_map.world(coordinates))  # converts map cords to tiles to visit list
+        cords_list = find_path(data, start, end)
+        tiles_to_visit = world_path(data, cords_list)  # converts map cords to tiles to visit list
 
     path = []
     for tile in tiles_to_visit:  # runs though the list and sets the path
         path.append(tile)
     return path
+
+
+def world_path(data: GameData, tiles: List[Location]):
+    # converts map cords to the points an enemy walks through
+    if data.path_smoothing and len(tiles) > 3:
+        # the last tile is never walked to (see Enemy.fixedUpdate), so the one before it has to stay
+        tiles = smooth_path(data.costs, tiles[:-1]) + tiles[-1:]
+
+    path = []
+    for coordinates in tiles:
+        path.append(data.game_map.world(coordinates))
+    return path
+
+
+def resolve_flow(data: GameData, enemy):
+    # same as resolve() but reads the route towards the player from the shared flow field,
+    # so no search is run no matter how many enemies are chasing. None until the first field is flooded
+    if not data.flow_field.ready():
+        return None
+    start = data.game_map.tile(enemy.getMidPosition())
+    return world_path(data, data.flow_field.path(data, start))
@@ -0,0 +1,172 @@
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from game.gameobjects.enemyStuff.PathFinding import Location, SEARCH_ENGINES
+
+
+class PathRequest:
+    """
+    A path asked for through the PathScheduler
+
+    Works like a future: done() turns True once the search has finished
+    and result() hands out the tiles, in reconstruct_path format or empty
+    if the goal can't be reached. Enemies that no longer need the path
+    should cancel() it so the scheduler stops working on it.
+    """
+
+    def __init__(self, start: Location, goal: Location, search_goal: Optional[Location] = None) -> None:
+        self.start = start
+        self.goal = goal
+        self.search_goal = search_goal  # where the search actually heads, the first pad for another room
+        self.planner = None     # the enemy's IncrementalPlanner, repaired instead of running a new search
+        self.search = None
+        self.costs_version = None
+        self.tiles: Optional[List[Location]] = None
+        self.waiting = 1    # enemies sharing this request
+        self.cancelled = False
+        self.frames = 0     # frames spent in the queue
+
+    def done(self) -> bool:
+        return self.tiles is not None
+
+    def result(self) -> List[Location]:
+        return list(self.tiles)
+
+    def finish(self, tiles: List[Location]) -> None:
+        self.tiles = tiles
+        self.search = None
+
+    def cancel(self) -> None:
+        self.waiting -= 1
+        if self.waiting < 1:
+            self.cancelled = True
+
+
+class PathScheduler:
+    """
+    Queue of path searches sharing a node expansion budget every frame
+
+    A single search can expand thousands of nodes and several enemies
+    tend to re-path in the same frame, so searches aren't run when they
+    are asked for. update() is called once a frame and steps the queued
+    searches in order until the budget is used up, a search that doesn't
+    finish carries on where it stopped next frame. Requests that don't
+    need a search (cached, unreachable) are answered straight away and
+    identical requests waiting in the queue are shared. A request that
+    comes with the enemy's IncrementalPlanner steps the planner instead
+    of starting a search of the path engine.
+
+    The flow field towards the player is flooded out of the same budget,
+    ahead of the queued searches.
+    """
+
+    def __init__(self, budget: int = 500) -> None:
+        self.budget = budget
+        self.queue = deque()
+        self.pending: Dict[Tuple[Location, Location], PathRequest] = {}
+
+        # statistics
+        self.requests = 0
+        self.answered = 0   # answered without queueing
+        self.shared = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.frames = 0
+        self.expansions = 0
+        self.peak_expansions = 0  # most expansions spent in a single frame
+        self.peak_queue = 0
+        self.peak_wait = 0        # most frames a request waited for its path
+
+    def request(self, game_data, start: Location, goal: Location, planner=None) -> PathRequest:
+        self.requests += 1
+
+        request = self.pending.get((start, goal))
+        if request is not None and not request.cancelled:
+            request.waiting += 1
+            self.shared += 1
+            return request
+
+        request = PathRequest(start, goal)
+        if game_data.reachability.connected(start, goal):
+            tiles = game_data.path_cache.get(game_data, start, goal)
+            if tiles is not None:
+                return self.answer(request, tiles)
+            request.search_goal = goal
+            request.planner = planner
+        elif game_data.path_hierarchical:
+            # goal is in another room, only the walk to the first teleporter is searched
+            request.search_goal = game_data.room_graph.legGoal(start, goal)
+
+        if request.search_goal is None:
+            return self.answer(request, [])  # doesn't flood the whole map looking for a target in another room
+
+        self.queue.append(request)
+        self.pending[(start, goal)] = request
+        self.peak_queue = max(self.peak_queue, len(self.queue))
+        return request
+
+    def answer(self, request: PathRequest, tiles: List[Location]) -> PathRequest:
+        self.answered += 1
+        request.finish(tiles)
+        return request
+
+    def update(self, game_data) -> None:
+        """ Steps the queued searches, called once a frame """
+        budget = self.budget
+        engine = SEARCH_ENGINES[game_data.path_engine]
+
+        if game_data.chase_flow_field and game_data.flow_field is not None:
+            # the chasing enemies all wait on the field, so it goes first
+            budget -= game_data.flow_field.flood(game_data, budget)
+
+        while len(self.queue) and budget > 0:
+            request = self.queue[0]
+            if request.cancelled:
+                self.remove(request)
+                self.cancelled += 1
+                continue
+
+            if request.search is None or request.costs_version != game_data.costs_version:
+                # starts the search, or starts it again if the map changed under it
+                request.costs_version = game_data.costs_version
+                if request.planner is not None:
+                    request.search = request.planner.begin(game_data, request.start, request.goal)
+                else:
+                    request.search = engine.begin(game_data, request.start, request.search_goal,
+                                                  game_data.reachability.bounds(request.search_goal))
+
+            used = request.search.step(budget)
+            budget -= used
+
+            if request.search.done:
+                tiles = request.search.path()
+                if request.search_goal == request.goal:
+                    game_data.path_cache.put(game_data, request.start, request.goal, tiles)
+                request.finish(tiles)
+                self.remove(request)
+                self.completed += 1
+                self.peak_wait = max(self.peak_wait, request.frames)
+
+        for request in self.queue:
+            request.frames += 1
+
+        self.frames += 1
+        self.expansions += self.budget - budget
+        self.peak_expansions = max(self.peak_expansions, self.budget - budget)
+
+    def remove(self, request: PathRequest) -> None:
+        self.queue.popleft()
+        if self.pending.get((request.start, request.goal)) is request:
+            del self.pending[(request.start, request.goal)]
+
+    def close(self) -> None:
+        for request in self.queue:
+            request.cancelled = True
+        self.queue.clear()
+        self.pending.clear()
+
+    def stats(self) -> Dict[str, float]:
+        return {"queued": len(self.queue), "requests": self.requests, "answered": self.answered,
+                "shared": self.shared, "completed": self.completed, "cancelled": self.cancelled,
+                "expansions_per_frame": self.expansions / self.frames if self.frames else 0.0,
+                "peak_expansions": self.peak_expansions, "peak_queue": self.peak_queue,
+                "peak_wait": self.peak_wait}
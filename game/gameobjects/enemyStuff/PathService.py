@@ -0,0 +1,243 @@
+import os
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory, util
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from game.gameobjects.CostGrid import CostGrid
+from game.gameobjects.enemyStuff.PathFinding import Location, SEARCH_ENGINES
+from game.gameobjects.enemyStuff.PathScheduler import PathScheduler
+
+
+class SharedCosts:
+    """
+    Copy of the cost map the background searches read from
+
+    The costs are packed one byte per tile in a flat buffer. The thread
+    backend keeps the buffer in a bytearray, the process backend in shared
+    memory which the workers attach to by name. Every side builds its own
+    CostGrid (and neighbour graph) from the buffer whenever the cost map
+    version it was asked to search on changes.
+    """
+
+    def __init__(self, width: int, height: int, shared: bool = False, name: Optional[str] = None) -> None:
+        self.width = width
+        self.height = height
+        self.memory = None
+
+        if name is not None:
+            # pool workers share the game's resource tracker, so attaching doesn't make them owners
+            self.memory = shared_memory.SharedMemory(name=name)
+            buffer = self.memory.buf
+        elif shared:
+            self.memory = shared_memory.SharedMemory(create=True, size=width * height)
+            buffer = self.memory.buf
+        else:
+            buffer = bytearray(width * height)
+
+        self.buffer = np.ndarray((height, width), dtype=np.uint8, buffer=buffer)
+        self.costs: Optional[CostGrid] = None
+        self.costs_version = None
+        self.game_map = SimpleNamespace(width=width, height=height)  # all the searches need besides the costs
+
+    def name(self) -> Optional[str]:
+        return self.memory.name if self.memory is not None else None
+
+    def write(self, costs: CostGrid, costs_version: int) -> None:
+        self.buffer[:] = np.minimum(costs.grid, 255)
+        self.refresh(costs_version)
+
+    def refresh(self, costs_version: int) -> None:
+        # versions only go up, a search left over from an older map doesn't rebuild anything
+        if self.costs_version is None or costs_version > self.costs_version:
+            self.costs = CostGrid(self.buffer)
+            self.costs_version = costs_version
+
+    def close(self, unlink: bool = False) -> None:
+        # the array over the buffer has to go before the shared memory can be closed
+        self.buffer = None
+        self.costs = None
+
+        if self.memory is not None:
+            self.memory.close()
+            if unlink:
+                self.memory.unlink()
+            self.memory = None
+
+
+# the cost map a worker searches on, one per worker process, shared between threads
+_worker_costs: Optional[SharedCosts] = None
+
+
+def _share_costs(costs: SharedCosts) -> None:
+    global _worker_costs
+    _worker_costs = costs
+
+
+def _attach_costs(name: str, width: int, height: int) -> None:
+    costs = SharedCosts(width, height, name=name)
+    _share_costs(costs)
+    # closes the worker's handle when it exits, atexit hooks don't run in forked pool workers
+    util.Finalize(None, costs.close, exitpriority=10)
+
+
+def _search(engine_name: str, start: Location, goal: Location, bounds,
+            costs_version: int) -> Tuple[List[Location], int]:
+    _worker_costs.refresh(costs_version)
+    search = SEARCH_ENGINES[engine_name].begin(_worker_costs, start, goal, bounds)
+    search.step()
+    return search.path(), search.expansions
+
+
+class PathService:
+    """
+    Runs the path searches on a pool of threads or processes
+
+    request() answers like PathScheduler.request() but hands back a
+    concurrent.futures.Future. Searches are sent to the pool together with
+    the bounds and goal worked out on the main thread and run against a
+    SharedCosts copy of the cost map, so nothing in GameData is touched
+    from another thread. update() is called once a frame to collect the
+    finished searches, fill the path cache and resolve the futures.
+
+    The process backend sidesteps the GIL the pure Python searches hold,
+    the thread backend avoids pickling and suits machines with few cores.
+    The enemies' IncrementalPlanners live on the main thread, so requests
+    that come with one run a full search on the pool like any other.
+    """
+
+    def __init__(self, game_data, backend: str = "thread", workers: Optional[int] = None) -> None:
+        self.backend = backend
+        if workers is None:
+            workers = max(1, (os.cpu_count() or 2) - 1)  # leaves a core for the game loop
+        self.workers = workers
+
+        self.shared_costs = SharedCosts(game_data.game_map.width, game_data.game_map.height,
+                                        shared=backend == "process")
+        self.shared_costs.write(game_data.costs, game_data.costs_version)
+        self.costs_version = game_data.costs_version
+
+        if backend == "process":
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_attach_costs,
+                                            initargs=(self.shared_costs.name(), self.shared_costs.width,
+                                                      self.shared_costs.height))
+        else:
+            self.pool = ThreadPoolExecutor(max_workers=workers, initializer=_share_costs,
+                                           initargs=(self.shared_costs,))
+
+        # searches sent to the pool: (pool future, request future, start, goal, search goal, costs version)
+        self.running: List[Tuple[Future, Future, Location, Location, Location, int]] = []
+
+        # statistics
+        self.requests = 0
+        self.answered = 0   # answered without a search
+        self.completed = 0
+        self.cancelled = 0
+        self.stale = 0      # finished after the cost map changed
+        self.expansions = 0
+        self.peak_running = 0
+
+        atexit.register(self.close)
+
+    def request(self, game_data, start: Location, goal: Location, planner=None) -> Future:
+        self.requests += 1
+        self.sync(game_data)
+
+        search_goal = None
+        if game_data.reachability.connected(start, goal):
+            tiles = game_data.path_cache.get(game_data, start, goal)
+            if tiles is not None:
+                return self.answer(tiles)
+            search_goal = goal
+        elif game_data.path_hierarchical:
+            # goal is in another room, only the walk to the first teleporter is searched
+            search_goal = game_data.room_graph.legGoal(start, goal)
+
+        if search_goal is None:
+            return self.answer([])  # doesn't flood the whole map looking for a target in another room
+
+        search = self.pool.submit(_search, game_data.path_engine, start, search_goal,
+                                  game_data.reachability.bounds(search_goal), self.costs_version)
+        request = Future()
+        self.running.append((search, request, start, goal, search_goal, self.costs_version))
+        self.peak_running = max(self.peak_running, len(self.running))
+        return request
+
+    def answer(self, tiles: List[Location]) -> Future:
+        self.answered += 1
+        request = Future()
+        request.set_result(tiles)
+        return request
+
+    def sync(self, game_data) -> None:
+        # copies the cost map across again if it changed since the last search
+        if self.costs_version != game_data.costs_version:
+            self.shared_costs.write(game_data.costs, game_data.costs_version)
+            self.costs_version = game_data.costs_version
+
+    def update(self, game_data) -> None:
+        """ Collects the searches the pool has finished, called once a frame """
+        self.sync(game_data)
+
+        if game_data.chase_flow_field and game_data.flow_field is not None:
+            # the field is read by every chasing enemy, so it's flooded here on the main thread, a slice a frame
+            game_data.flow_field.flood(game_data, game_data.path_budget)
+
+        running = []
+        for search, request, start, goal, search_goal, costs_version in self.running:
+            if request.cancelled():
+                search.cancel()
+                self.cancelled += 1
+                continue
+
+            if not search.done():
+                running.append((search, request, start, goal, search_goal, costs_version))
+                continue
+
+            tiles, expansions = search.result()
+            self.expansions += expansions
+
+            if costs_version != self.costs_version:
+                # the map changed under the search, asks again on the new one
+                self.stale += 1
+                running.append((self.pool.submit(_search, game_data.path_engine, start, search_goal,
+                                                 game_data.reachability.bounds(search_goal), self.costs_version),
+                                request, start, goal, search_goal, self.costs_version))
+                continue
+
+            if search_goal == goal:
+                game_data.path_cache.put(game_data, start, goal, tiles)
+            request.set_result(tiles)
+            self.completed += 1
+
+        self.running = running
+
+    def close(self) -> None:
+        if self.pool is None:
+            return
+
+        for search, request, start, goal, search_goal, costs_version in self.running:
+            search.cancel()
+            request.cancel()
+        self.running.clear()
+
+        self.pool.shutdown(wait=True)
+        self.pool = None
+        self.shared_costs.close(unlink=True)
+        atexit.unregister(self.close)
+
+    def stats(self) -> Dict[str, float]:
+        return {"backend": self.backend, "workers": self.workers, "running": len(self.running),
+                "requests": self.requests, "answered": self.answered, "completed": self.completed,
+                "cancelled": self.cancelled, "stale": self.stale, "expansions": self.expansions,
+                "peak_running": self.peak_running}
+
+
+def path_requests(game_data):
+    """ Makes whatever serves the enemies' path requests, picked by GameData.path_backend """
+    if game_data.path_backend in ("thread", "process"):
+        return PathService(game_data, game_data.path_backend, game_data.path_workers)
+    return PathScheduler(game_data.path_budget)
@@ -0,0 +1,64 @@
+from typing import List
+
+import numpy as np
+
+
+class ProximityTable:
+    """
+    Distance and offset from every active enemy to the player, worked out once a frame
+
+    GamePlay.update fills the table right before the enemies update, with
+    one NumPy pass over all of their positions (from the TransformStore
+    when it's given one). Behaviour tree nodes and
+    attack checks then read an enemy's row instead of building midpoints
+    and calling distance() on their own. Rows are only valid for the frame
+    they were made in, has() tells whether an enemy got one.
+    """
+
+    def __init__(self) -> None:
+        self.frame = 0
+        self.count = 0
+        self.xs: List[float] = []   # enemy midpoints
+        self.ys: List[float] = []
+        self.distances: List[float] = []
+
+    def update(self, enemies, player_position, transforms=None) -> None:
+        self.frame += 1
+        self.count = len(enemies)
+
+        # enemy midpoints, same as Enemy.getMidPosition but without making a Point2D each
+        if transforms is not None:
+            positions = transforms.midpoints(enemies)
+        else:
+            positions = np.empty((self.count, 2))
+            for index, enemy in enumerate(enemies):
+                sprite = enemy.sprite
+                positions[index, 0] = sprite.x + sprite.width / 2
+                positions[index, 1] = sprite.y + sprite.height / 2
+        for index, enemy in enumerate(enemies):
+            enemy.proximity_row = index
+            enemy.proximity_frame = self.frame
+
+        deltas = np.array([player_position.x, player_position.y]) - positions
+        distances = np.hypot(deltas[:, 0], deltas[:, 1])
+
+        # plain lists, reading single values back out of NumPy arrays is slow
+        self.xs = positions[:, 0].tolist()
+        self.ys = positions[:, 1].tolist()
+        self.distances = distances.tolist()
+
+    def has(self, enemy) -> bool:
+        return enemy.proximity_frame == self.frame
+
+    def distance(self, enemy) -> float:
+        return self.distances[enemy.proximity_row]
+
+    def position(self, enemy):
+        return self.xs[enemy.proximity_row], self.ys[enemy.proximity_row]
+
+
+def player_distance(enemy, data) -> float:
+    """ Distance from the enemy to the player, from this frame's proximity table when the enemy is in it """
+    if data.proximity is not None and data.proximity.has(enemy):
+        return data.proximity.distance(enemy)
+    return enemy.getMidPosition().distance(data.player.getMidPosition())
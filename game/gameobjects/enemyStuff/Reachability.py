@@ -0,0 +1,130 @@
+from collections import deque
+from typing import List, Optional, Tuple
+
+Location = Tuple[int, int]
+
+NEIGHBOURS = [(0, -1), (0, 1), (-1, 0), (1, 0), (-1, -1), (-1, 1), (1, -1), (1, 1)]
+
+
+class ReachabilityIndex:
+    """
+    Labels every walkable tile with the connected area and Tiled room it belongs to
+
+    The labels are flooded once from the cost map when the map is loaded,
+    using the same 8 neighbours and walkable rule as the pathfinder. Two
+    tiles can only be joined by a path if they share a label, so asking
+    whether a target is reachable is a lookup instead of a failed A*.
+    """
+
+    def __init__(self, costs, width: int, height: int, room_points) -> None:
+        """
+        Args:
+            costs: the cost map, indexed [y][x]
+            width, height: size of the map in tiles
+            room_points: list of (Room, tile x, tile y) taken from the Tiled objects
+        """
+        self.costs = costs
+        self.width = width
+        self.height = height
+
+        # -1 marks tiles that aren't walkable
+        self.components = [[-1 for i in range(width)] for j in range(height)]
+        self.rooms = [[-1 for i in range(width)] for j in range(height)]
+
+        # per component data, indexed by the component label
+        self.component_room: List[Optional[int]] = []
+        self.component_bounds: List[List[int]] = []  # min_x, min_y, max_x, max_y
+        self.component_tiles: List[List[Location]] = []
+
+        self.label()
+        self.labelRooms(room_points)
+
+    def walkable(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height and self.costs[y][x] == 1
+
+    def label(self) -> None:
+        for y in range(self.height):
+            for x in range(self.width):
+                if self.costs[y][x] == 1 and self.components[y][x] == -1:
+                    self.flood(x, y, len(self.component_tiles))
+
+    def flood(self, start_x: int, start_y: int, label: int) -> None:
+        bounds = [start_x, start_y, start_x, start_y]
+        tiles = []
+        frontier = deque([(start_x, start_y)])
+        self.components[start_y][start_x] = label
+
+        while frontier:
+            x, y = frontier.popleft()
+            tiles.append((x, y))
+            bounds[0] = min(bounds[0], x)
+            bounds[1] = min(bounds[1], y)
+            bounds[2] = max(bounds[2], x)
+            bounds[3] = max(bounds[3], y)
+
+            for offset in NEIGHBOURS:
+                node_x = x + offset[0]
+                node_y = y + offset[1]
+                if self.walkable(node_x, node_y) and self.components[node_y][node_x] == -1:
+                    self.components[node_y][node_x] = label
+                    frontier.append((node_x, node_y))
+
+        self.component_room.append(None)
+        self.component_bounds.append(bounds)
+        self.component_tiles.append(tiles)
+
+    def labelRooms(self, room_points) -> None:
+        # every Tiled object knows its room, the first one landing in a component names it
+        for room, x, y in room_points:
+            for component in self.startComponents((x, y)):
+                if self.component_room[component] is None:
+                    self.component_room[component] = room
+
+        for component, tiles in enumerate(self.component_tiles):
+            room = self.component_room[component]
+            if room is None:
+                continue
+            for x, y in tiles:
+                self.rooms[y][x] = room
+
+    def component(self, tile: Location) -> int:
+        if not (0 <= tile[0] < self.width and 0 <= tile[1] < self.height):
+            return -1
+        return self.components[tile[1]][tile[0]]
+
+    def startComponents(self, tile: Location) -> List[int]:
+        # a search can leave a tile that isn't walkable (spikes, edge of a wall)
+        # through any walkable neighbour, so it belongs to all of theirs
+        component = self.component(tile)
+        if component != -1:
+            return [component]
+
+        components = []
+        for offset in NEIGHBOURS:
+            component = self.component((tile[0] + offset[0], tile[1] + offset[1]))
+            if component != -1 and component not in components:
+                components.append(component)
+        return components
+
+    def connected(self, start: Location, goal: Location) -> bool:
+        """ True if a path from start to goal exists, the goal itself has to be walkable """
+        if start == goal:
+            return True
+
+        goal_component = self.component(goal)
+        if goal_component == -1:
+            return False
+        return goal_component in self.startComponents(start)
+
+    def room(self, tile: Location) -> Optional[int]:
+        """ Tiled room number of a tile, None if it isn't walkable or outside any room """
+        for component in self.startComponents(tile):
+            return self.component_room[component]
+        return None
+
+    def bounds(self, tile: Location) -> Optional[List[int]]:
+        """ Bounding box (min_x, min_y, max_x, max_y) of the area a walkable tile belongs to """
+        component = self.component(tile)
+        if component == -1:
+            return None
+        return self.component_bounds[component]
@@ -0,0 +1,168 @@
+import heapq
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+from game.gameobjects.enemyStuff.PathFinding import Location, SEARCH_ENGINES
+
+
+class RoomGraph:
+    """
+    Abstract graph of the dungeon for long distance queries (HPA* style)
+
+    The rooms of the map are only joined by teleporter pairs, so the
+    teleporter pads are the doorways of the graph. Pads of a pair are
+    linked with a teleport, pads sharing a room are linked with their
+    walking distance, worked out once with a flood from every pad.
+    A long query is planned over these few nodes first and only its
+    first leg, from the start to the first pad, is searched tile by tile.
+    """
+
+    TELEPORT_COST = 1
+    GOAL = -1   # stands in for the goal tile while planning
+
+    def __init__(self, game_data, tile_size) -> None:
+        self.reachability = game_data.reachability
+        self.tile_size = tile_size
+
+        self.pads: List[Location] = []
+        self.pad_pair: List[int] = []
+        self.pad_component: List[int] = []
+        self.pad_distance: List[Dict[Location, int]] = []  # walking distance from the pad to its room's tiles
+        self.edges: List[List[Tuple[int, int]]] = []    # pad index -> (pad index, cost)
+
+        # statistics
+        self.plans = 0
+        self.expansions = 0
+
+        self.addPads(game_data)
+        self.link(game_data)
+
+    def addPads(self, game_data) -> None:
+        tile_width = self.tile_size[0]
+        tile_height = self.tile_size[1]
+
+        # List composition Pair, X, Y, width, height and Room
+        for teleporter in game_data.teleporters:
+            tile = (int((teleporter[1] + teleporter[3] / 2) / tile_width),
+                    int((teleporter[2] + teleporter[4] / 2) / tile_height))
+            tile = self.walkableTile(tile, teleporter[5])
+            if tile is None:
+                continue
+
+            self.pads.append(tile)
+            self.pad_pair.append(teleporter[0])
+            self.pad_component.append(self.reachability.component(tile))
+
+    def walkableTile(self, tile: Location, room: int) -> Optional[Location]:
+        # some pads are drawn over a wall, uses the closest walkable tile of the same room instead
+        for radius in range(0, 3):
+            for y in range(tile[1] - radius, tile[1] + radius + 1):
+                for x in range(tile[0] - radius, tile[0] + radius + 1):
+                    if self.reachability.component((x, y)) != -1 and self.reachability.room((x, y)) == room:
+                        return x, y
+        return None
+
+    def link(self, game_data) -> None:
+        for pad in self.pads:
+            self.pad_distance.append(self.flood(game_data, pad))
+            self.edges.append([])
+
+        for index, pad in enumerate(self.pads):
+            for other in range(len(self.pads)):
+                if other == index:
+                    continue
+                if self.pad_pair[other] == self.pad_pair[index]:
+                    self.edges[index].append((other, self.TELEPORT_COST))
+                elif self.pad_component[other] == self.pad_component[index]:
+                    self.edges[index].append((other, self.pad_distance[index][self.pads[other]]))
+
+    def flood(self, game_data, pad: Location) -> Dict[Location, int]:
+        # breadth first over the CostGrid's neighbour lists, by flat tile index
+        costs = game_data.costs
+        adjacency = costs.adjacency
+        start = costs.index(pad)
+        distance = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            current = frontier.popleft()
+            for node in adjacency[current]:
+                if node not in distance:
+                    distance[node] = distance[current] + 1
+                    frontier.append(node)
+        return {costs.tile(node): steps for node, steps in distance.items()}
+
+    def walkingDistance(self, pad: int, tile: Location) -> Optional[int]:
+        # tiles that aren't walkable are one step away from their closest walkable neighbour
+        distances = self.pad_distance[pad]
+        if tile in distances:
+            return distances[tile]
+
+        best = None
+        for x in range(tile[0] - 1, tile[0] + 2):
+            for y in range(tile[1] - 1, tile[1] + 2):
+                if (x, y) in distances and (best is None or distances[(x, y)] + 1 < best):
+                    best = distances[(x, y)] + 1
+        return best
+
+    def plan(self, start: Location, goal: Location) -> List[int]:
+        """ Returns the pads to walk through from start to goal, empty if there is no way there """
+        self.plans += 1
+        start_components = self.reachability.startComponents(start)
+        goal_component = self.reachability.component(goal)
+
+        came_from: Dict[int, Optional[int]] = {}
+        cost_so_far: Dict[int, float] = {}
+        frontier = []
+
+        for pad, component in enumerate(self.pad_component):
+            if component in start_components:
+                cost = self.walkingDistance(pad, start)
+                if cost is not None:
+                    cost_so_far[pad] = cost
+                    came_from[pad] = None
+                    heapq.heappush(frontier, (cost, pad))
+
+        while frontier:
+            cost, current = heapq.heappop(frontier)
+            if cost > cost_so_far[current]:  # stale queue entry
+                continue
+            self.expansions += 1
+
+            if current == self.GOAL:
+                route = [came_from[current]]
+                while came_from[route[-1]] is not None:
+                    route.append(came_from[route[-1]])
+                route.reverse()
+                return route
+
+            edges = self.edges[current]
+            if self.pad_component[current] == goal_component:
+                # pads in the goal's room lead to the goal itself
+                edges = edges + [(self.GOAL, self.walkingDistance(current, goal))]
+
+            for node, edge_cost in edges:
+                new_cost = cost + edge_cost
+                if node not in cost_so_far or new_cost < cost_so_far[node]:
+                    cost_so_far[node] = new_cost
+                    came_from[node] = current
+                    heapq.heappush(frontier, (new_cost, node))
+
+        return []
+
+    def legGoal(self, start: Location, goal: Location) -> Optional[Location]:
+        """ Tile the first leg from start heads for, the goal itself or the first pad on the way """
+        if self.reachability.connected(start, goal):
+            return goal
+
+        route = self.plan(start, goal)
+        if not len(route):
+            return None
+        return self.pads[route[0]]
+
+    def firstLeg(self, game_data, start: Location, goal: Location) -> List[Location]:
+        """ Tile path from start to the first pad on the way to a goal in another room """
+        leg_goal = self.legGoal(start, goal)
+        if leg_goal is None:
+            return []
+
+        engine = SEARCH_ENGINES[game_data.path_engine]
+        return engine.search(game_data, start, leg_goal, self.reachability.bounds(leg_goal))
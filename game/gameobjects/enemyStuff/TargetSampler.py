@@ -0,0 +1,102 @@
+import random
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+Location = Tuple[int, int]
+
+
+class RingBuckets:
+    """ The tiles of one area sorted by their ring (Chebyshev distance) around a centre tile """
+
+    def __init__(self, tiles: List[Location], starts: List[int]) -> None:
+        self.tiles = tiles
+        self.starts = starts  # tiles of ring r are tiles[starts[r]:starts[r + 1]]
+
+    def span(self, min_ring: int, max_ring: int) -> Tuple[int, int]:
+        last = len(self.starts) - 1
+        return self.starts[min(min_ring, last)], self.starts[min(max_ring + 1, last)]
+
+
+class TargetSampler:
+    """
+    Draws random walkable tiles a few tiles away from a centre, reachable from a start tile
+
+    Teleporting and repositioning enemies used to pick a random offset
+    around the player and then find out whether it could be stood on and
+    reached, trying again when it couldn't. Here the tiles of every area
+    of the ReachabilityIndex are kept in arrays, and the first time a
+    centre is asked about they are sorted into rings around it in one
+    NumPy pass. Every ring is a contiguous slice after that, so drawing a
+    tile between two rings is a single random index, and every tile that
+    can come out is already known to be walkable and reachable.
+
+    The rings of the most recently used centres are kept, the player
+    only changes tile every few frames.
+    """
+
+    def __init__(self, reachability, capacity: int = 64) -> None:
+        self.reachability = reachability
+        self.capacity = capacity
+
+        self.area_tiles: List[List[Location]] = [list(tiles) for tiles in reachability.component_tiles]
+        self.area_xs: List[np.ndarray] = [np.array([tile[0] for tile in tiles], dtype=np.int32)
+                                          for tiles in self.area_tiles]
+        self.area_ys: List[np.ndarray] = [np.array([tile[1] for tile in tiles], dtype=np.int32)
+                                          for tiles in self.area_tiles]
+        self.buckets: OrderedDict[Tuple[int, Location], RingBuckets] = OrderedDict()
+
+        # statistics
+        self.draws = 0
+        self.empty = 0
+        self.builds = 0
+
+    def rings(self, area: int, centre: Location) -> RingBuckets:
+        key = (area, centre)
+        buckets = self.buckets.get(key)
+        if buckets is not None:
+            self.buckets.move_to_end(key)
+            return buckets
+
+        rings = np.maximum(np.abs(self.area_xs[area] - centre[0]), np.abs(self.area_ys[area] - centre[1]))
+        order = np.argsort(rings, kind="stable")
+        sorted_rings = rings[order]
+        largest = int(sorted_rings[-1]) if len(sorted_rings) else 0
+        starts = np.searchsorted(sorted_rings, np.arange(largest + 2)).tolist()
+
+        tiles = self.area_tiles[area]
+        buckets = RingBuckets([tiles[index] for index in order.tolist()], starts)
+        self.buckets[key] = buckets
+        self.builds += 1
+        if len(self.buckets) > self.capacity:
+            self.buckets.popitem(last=False)
+        return buckets
+
+    def sample(self, start: Location, centre: Location, min_ring: int, max_ring: int) -> Optional[Location]:
+        """ Random walkable tile reachable from start, min_ring to max_ring tiles from centre, None if there isn't one """
+        self.draws += 1
+
+        # a start that isn't walkable can touch more than one area, then the draw is spread over them
+        spans = []
+        total = 0
+        for area in self.reachability.startComponents(start):
+            buckets = self.rings(area, centre)
+            first, last = buckets.span(min_ring, max_ring)
+            if last > first:
+                spans.append((buckets, first, last))
+                total += last - first
+
+        if not total:
+            self.empty += 1
+            return None
+
+        pick = random.randrange(total)
+        for buckets, first, last in spans:
+            if pick < last - first:
+                return buckets.tiles[first + pick]
+            pick -= last - first
+        return None
+
+    def stats(self) -> Dict[str, int]:
+        return {"draws": self.draws, "empty": self.empty, "builds": self.builds, "cached": len(self.buckets)}
@@ -0,0 +1,203 @@
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+from game.component import spriteBounds
+
+
+class TransformStore:
+    """
+    Position, direction, speed and route progress of every active enemy, as NumPy columns
+
+    Enemies used to move themselves in fixedUpdate: read the sprite's
+    position, make a Point2D, add direction * speed * dt to it and write
+    it back to the sprite, one enemy at a time. The store is where an
+    enemy's position lives now. integrate() moves every enemy that has
+    more than one waypoint left in a few array operations and hands back
+    the few that used up their next waypoint this step.
+
+    The route itself stays a list on the enemy (the behaviour trees look
+    at it) and only the enemy changes it. The store never reads it, it
+    keeps how many waypoints are left and where the next one is, as it
+    was told by follow(): Enemy.followRoute() after a new or cleared
+    route, Enemy.passWaypoint() for the enemies integrate() handed back.
+
+    The store is the only place an active enemy's position is right.
+    Sprites are only written by sync(), once per rendered frame, and only
+    for the enemies whose box is on screen, so the sprite.x / sprite.y of
+    an enemy off screen is wherever it was last drawn. Anything else has
+    to read position(), midpoint(), bounds() or midpoints() (or
+    Enemy.getMidPosition()), like the proximity table and the projectile
+    hits do.
+    """
+
+    # every per enemy array, grow() and remove() go over these
+    COLUMNS = ("xs", "ys", "direction_xs", "direction_ys", "speeds", "target_xs", "target_ys", "waypoints", "running",
+               "half_sizes", "boxes")
+
+    def __init__(self, capacity: int = 32) -> None:
+        self.count = 0
+        self.enemies: List = []
+        self.xs = np.zeros(capacity)            # top left of the sprite, like sprite.x / sprite.y
+        self.ys = np.zeros(capacity)
+        self.direction_xs = np.zeros(capacity)  # unit vector towards the next waypoint
+        self.direction_ys = np.zeros(capacity)
+        self.speeds = np.zeros(capacity)
+        self.target_xs = np.zeros(capacity)     # next waypoint, route[0]
+        self.target_ys = np.zeros(capacity)
+        self.waypoints = np.zeros(capacity, dtype=np.int32)     # waypoints left, len(route)
+        self.running = np.zeros(capacity, dtype=bool)
+        self.half_sizes = np.zeros((capacity, 2))   # from the top left to the middle, as getMidPosition
+        self.boxes = np.zeros((capacity, 4))        # world bounds relative to the top left
+
+        # statistics
+        self.steps = 0
+        self.arrivals = 0
+        self.synced = 0
+        self.culled = 0
+
+    def grow(self) -> None:
+        capacity = len(self.xs) * 2
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def add(self, enemy, x: float, y: float) -> None:
+        """ Gives an enemy a row, its sprite needs its texture and scale already """
+        if self.count == len(self.xs):
+            self.grow()
+        row = self.count
+        sprite = enemy.sprite
+        sprite.x = x
+        sprite.y = y
+        min_x, min_y, max_x, max_y = spriteBounds(sprite)
+
+        self.xs[row] = x
+        self.ys[row] = y
+        self.direction_xs[row] = 0
+        self.direction_ys[row] = 0
+        self.speeds[row] = enemy.speed
+        self.waypoints[row] = 0
+        self.running[row] = False
+        self.half_sizes[row] = sprite.width / 2, sprite.height / 2
+        self.boxes[row] = min_x - x, min_y - y, max_x - x, max_y - y
+
+        enemy.transform = row
+        self.enemies.append(enemy)
+        self.count += 1
+
+    def remove(self, enemy) -> None:
+        """ Drops the row of an enemy that died or went back to its spawn, the last row takes its place """
+        row = enemy.transform
+        if row is None:
+            return
+        last = self.count - 1
+        if row != last:
+            for name in self.COLUMNS:
+                column = getattr(self, name)
+                column[row] = column[last]
+            moved = self.enemies[last]
+            self.enemies[row] = moved
+            moved.transform = row
+        self.enemies.pop()
+        self.count -= 1
+        enemy.transform = None
+
+    def place(self, enemy, x: float, y: float) -> None:
+        self.xs[enemy.transform] = x
+        self.ys[enemy.transform] = y
+
+    def position(self, enemy) -> Tuple[float, float]:
+        row = enemy.transform
+        return float(self.xs[row]), float(self.ys[row])
+
+    def midpoint(self, enemy) -> Tuple[float, float]:
+        row = enemy.transform
+        return float(self.xs[row] + self.half_sizes[row, 0]), float(self.ys[row] + self.half_sizes[row, 1])
+
+    def direction(self, enemy) -> Tuple[float, float]:
+        row = enemy.transform
+        return float(self.direction_xs[row]), float(self.direction_ys[row])
+
+    def aim(self, enemy, direction_x: float, direction_y: float) -> None:
+        self.direction_xs[enemy.transform] = direction_x
+        self.direction_ys[enemy.transform] = direction_y
+
+    def follow(self, enemy, route) -> None:
+        """ Points the enemy's row at the first waypoint of its new route, or stops it on an empty one """
+        row = enemy.transform
+        self.waypoints[row] = len(route)
+        if route:
+            self.target_xs[row] = route[0].x
+            self.target_ys[row] = route[0].y
+
+    def integrate(self, game_time) -> List:
+        """ Moves every enemy along its route for one fixed step, returns the enemies done with their next waypoint """
+        count = self.count
+        if not count:
+            return []
+        self.steps += 1
+
+        waypoints = self.waypoints[:count]
+        moving = waypoints > 1
+        running = self.running[:count]
+        running[moving] = True
+        running[waypoints == 0] = False
+
+        xs = self.xs[:count]
+        ys = self.ys[:count]
+        reach = self.speeds[:count] * 0.02
+        arrived = moving & (np.hypot(self.target_xs[:count] - xs, self.target_ys[:count] - ys) < reach)
+        stepping = moving & ~arrived
+        distances = self.speeds[:count] * game_time.fixed_timestep
+        xs[stepping] += self.direction_xs[:count][stepping] * distances[stepping]
+        ys[stepping] += self.direction_ys[:count][stepping] * distances[stepping]
+
+        # the few that reached a waypoint, or have only the last one left, have to pop it off their route
+        passed = []
+        for row in np.flatnonzero(arrived | (waypoints == 1)).tolist():
+            if arrived[row]:
+                self.arrivals += 1
+                xs[row] = self.target_xs[row]
+                ys[row] = self.target_ys[row]
+            else:
+                # the last step isn't walked, it's the tile the target is on
+                waypoints[row] = 0
+            passed.append(self.enemies[row])
+        return passed
+
+    def bounds(self, enemies) -> np.ndarray:
+        """ World space boxes (min x, min y, max x, max y) of the given enemies, one row each """
+        rows = [enemy.transform for enemy in enemies]
+        corners = np.column_stack([self.xs[rows], self.ys[rows], self.xs[rows], self.ys[rows]])
+        return corners + self.boxes[rows]
+
+    def midpoints(self, enemies) -> np.ndarray:
+        rows = [enemy.transform for enemy in enemies]
+        return np.column_stack([self.xs[rows], self.ys[rows]]) + self.half_sizes[rows]
+
+    def sync(self, view) -> List:
+        """ Writes the positions of the enemies that are on screen to their sprites and returns those enemies """
+        count = self.count
+        if not count:
+            return []
+        bounds = self.bounds(self.enemies)
+        visible = (bounds[:, 2] > view[0]) & (bounds[:, 0] < view[2]) & \
+                  (bounds[:, 3] > view[1]) & (bounds[:, 1] < view[3])
+
+        shown = []
+        rows = np.flatnonzero(visible)
+        for row, x, y in zip(rows.tolist(), self.xs[rows].tolist(), self.ys[rows].tolist()):
+            enemy = self.enemies[row]
+            enemy.sprite.x = x
+            enemy.sprite.y = y
+            shown.append(enemy)
+        self.synced += len(rows)
+        self.culled += count - len(rows)
+        return shown
+
+    def stats(self) -> Dict[str, int]:
+        return {"enemies": self.count, "steps": self.steps, "arrivals": self.arrivals, "synced": self.synced,
+                "culled": self.culled}
@@ -0,0 +1,95 @@
+import logging
+import time
+from typing import Dict, Tuple
+
+from game.gameobjects.enemyStuff.behaviourtree import ReturnType
+
+logger = logging.getLogger(__name__)
+
+
+class NodeProfile:
+    """ What one node type did for one enemy type """
+
+    __slots__ = ("ticks", "seconds", "self_seconds", "resolves", "statuses")
+
+    def __init__(self) -> None:
+        self.ticks = 0
+        self.seconds = 0.0       # including the children
+        self.self_seconds = 0.0  # without the children
+        self.resolves = 0        # path queries made by the node itself
+        self.statuses: Dict[ReturnType, int] = {status: 0 for status in ReturnType}
+
+
+class TreeProfiler:
+    """
+    Opt-in timing of the behaviour tree nodes (GameData.bt_profile)
+
+    Shared trees built with a profiler get every node's tick wrapped
+    in one that counts the tick, times it and tallies what it returned,
+    per (enemy type, node type). Time spent in the children is taken off
+    a composite's own time, and route_to() / chase_route() call resolved()
+    so the path queries land on the leaf that asked for them. The report
+    is sorted by the nodes' own time, the expensive leaves come first.
+
+    The children's time is carried on the profiler itself while a tree
+    ticks, so it only works for trees ticked one at a time; AIExecutor
+    doesn't use its pool while profiling.
+    """
+
+    def __init__(self) -> None:
+        self.profiles: Dict[Tuple[str, str], NodeProfile] = {}
+        self.child_seconds = 0.0
+        self.child_resolves = 0
+        self.resolves = 0
+
+    def wrap(self, node, tick):
+        node_name = type(node).__name__
+
+        def profiled(enemy, data, timer):
+            key = (type(enemy).__name__, node_name)
+            profile = self.profiles.get(key)
+            if profile is None:
+                profile = self.profiles[key] = NodeProfile()
+
+            outer_seconds = self.child_seconds
+            outer_resolves = self.child_resolves
+            self.child_seconds = 0.0
+            self.child_resolves = 0
+            resolves = self.resolves
+
+            start = time.perf_counter()
+            status = tick(enemy, data, timer)
+            elapsed = time.perf_counter() - start
+
+            made = self.resolves - resolves
+            profile.ticks += 1
+            profile.seconds += elapsed
+            profile.self_seconds += elapsed - self.child_seconds
+            profile.resolves += made - self.child_resolves
+            profile.statuses[status] = profile.statuses.get(status, 0) + 1
+
+            self.child_seconds = outer_seconds + elapsed
+            self.child_resolves = outer_resolves + made
+            return status
+
+        return profiled
+
+    def resolved(self) -> None:
+        self.resolves += 1
+
+    def reset(self) -> None:
+        self.profiles.clear()
+
+    def report(self) -> str:
+        lines = [f"{'enemy':<12} {'node':<18} {'ticks':>8} {'total ms':>10} {'self ms':>9} {'us/tick':>8} "
+                 f"{'success':>8} {'failure':>8} {'running':>8} {'resolves':>9}"]
+        ordered = sorted(self.profiles.items(), key=lambda item: item[1].self_seconds, reverse=True)
+        for (enemy, node), profile in ordered:
+            shares = [profile.statuses[status] / profile.ticks for status in ReturnType]
+            lines.append(f"{enemy:<12} {node:<18} {profile.ticks:>8} {profile.seconds * 1000:>10.2f} "
+                         f"{profile.self_seconds * 1000:>9.2f} {profile.self_seconds / profile.ticks * 1e6:>8.2f} "
+                         f"{shares[0]:>8.0%} {shares[1]:>8.0%} {shares[2]:>8.0%} {profile.resolves:>9}")
+        return "\n".join(lines)
+
+    def log(self) -> None:
+        logger.info("Behaviour tree profile\n%s", self.report())
@@ -1,6 +1,8 @@
 import random
 from enum import IntEnum
-from game.gameobjects.enemyStuff.PathFinding import resolve, get_neighbours
+from game.gameobjects.enemyStuff.PathFinding import resolve_flow, world_path, get_neighbours
+from game.gameobjects.enemyStuff.Proximity import player_distance
+from game.gameobjects.enemyStuff.AIExecutor import shared
 
 
 class NodeType(IntEnum):
@@ -17,6 +19,40 @@ class ReturnType(IntEnum):
     RUNNING = 3
 
 
+def route_to(enemy, data, target):
+    # queues a search on data.path_scheduler and returns the route once it's found,
+    # None while the search is still running (time sliced or on the path service pool).
+    # With path_incremental the scheduler repairs the enemy's last search instead of starting a new one
+    if enemy.path_request is None:
+        end = data.game_map.tile(target)
+        if data.costs[end[1]][end[0]] >= 5:  # stops from clicking on any tiles over cost of 10
+            return []
+
+        start = data.game_map.tile(enemy.getMidPosition())
+        if data.bt_profiler is not None:
+            data.bt_profiler.resolved()
+
+        planner = enemy.planner if data.path_incremental else None
+        with shared(data):
+            enemy.path_request = data.path_scheduler.request(data, start, end, planner)
+
+    if not enemy.path_request.done():
+        return None
+
+    tiles = enemy.path_request.result()
+    enemy.path_request = None
+    return world_path(data, tiles)
+
+
+def chase_route(enemy, data, target):
+    # chasing enemies share the flow field towards the player, everything else runs its own search
+    if data.chase_flow_field:
+        if data.bt_profiler is not None:
+            data.bt_profiler.resolved()
+        return resolve_flow(data, enemy)
+    return route_to(enemy, data, target)
+
+
 class Node:
     def __init__(self):  # parent class
 
@@ -65,7 +101,7 @@ class MoveMelee(Node):
             target = data.player.getMidPosition()
             target_cost = data.game_map.tile(target)
 
-            distance = target.distance(enemy.getMidPosition())
+            distance = player_distance(enemy, data)
 
             if distance > 24:
                 # only pathfinds if the distance between player and enemy is greater than a tile & a half.
@@ -73,7 +109,9 @@ class MoveMelee(Node):
                 if data.costs[target_cost[1]][target_cost[0]] < 6:
                     # only pathfinds if the cost of the player position (target) is walkable (less than 6).
 
-                    enemy.centreRoute((resolve(target, data, enemy)))  # moves enemy using pathfinder
+                    route = chase_route(enemy, data, target)
+                    if route is not None:   # None while the path is still being searched
+                        enemy.centreRoute(route)  # moves enemy using pathfinder
                     return ReturnType.RUNNING
 
         return ReturnType.SUCCESS
@@ -89,7 +127,7 @@ class MoveMage(Node):
             target = data.player.getMidPosition()
             target_cost = data.game_map.tile(target)
 
-            distance = target.distance(enemy.getMidPosition())
+            distance = player_distance(enemy, data)
 
             if distance > 24:
                 # only pathfinds if the distance between player and enemy is greater than a tile & a half.
@@ -97,7 +135,9 @@ class MoveMage(Node):
                 if data.costs[target_cost[1]][target_cost[0]] < 6:
                     # only pathfinds if the cost of target tile is walkable (less than 6).
 
-                    enemy.centreRoute((resolve(target, data, enemy)))
+                    route = chase_route(enemy, data, target)
+                    if route is not None:   # None while the path is still being searched
+                        enemy.centreRoute(route)
                     return ReturnType.RUNNING
 
         return ReturnType.SUCCESS
@@ -109,7 +149,7 @@ class MoveTeleporter(Node):
         super().__init__()
 
     def tick(self, enemy, data, timer):
-        if timer > random.uniform(4, 8):    # teleports at intervals of somewhere between 4 and 8.
+        if enemy.waited("re_route_timer", 4, 8):    # teleports at intervals of somewhere between 4 and 8.
             if enemy.teleport():
                 return ReturnType.RUNNING
 
@@ -124,25 +164,41 @@ class MoveRanger(Node):
     def tick(self, enemy, data, timer):
 
         if not len(enemy.route):
-            target_tile = enemy.generateRangedEnemyTargetOffset()
-            target_world = data.game_map.world(target_tile)
+            if enemy.path_request is not None:
+                # still waiting on the search queued by an earlier tick
+                return self.follow(enemy, route_to(enemy, data, None))
 
-            if timer > random.uniform(1, 3):    # Re-roots at intervals of somewhere between 4 and 8.
+            if enemy.waited("re_route_timer", 1, 3):    # Re-roots at intervals of somewhere between 1 and 3.
 
-                if data.costs[target_tile[1]][target_tile[0]] < 6 and data.costs[target_tile[1]][target_tile[0]] != 0:
-                    # only pathfinds if the cost of target tile is walkable (less than 6).
-                    try:
-                        enemy.centreRoute((resolve(target_world, data, enemy)))
-                        if enemy.route != 0:
-                            enemy.re_route_timer = 0
-                            # Resets re-route timer so timer has to tick up before next re-root.
-                    except:
-                        return ReturnType.SUCCESS
-
-                    return ReturnType.RUNNING
+                target_tile = self.target(enemy, data)
+                if target_tile is not None:
+                    # only pathfinds if a walkable tile around the player can be reached.
+                    return self.follow(enemy, route_to(enemy, data, data.game_map.world(target_tile)))
 
         return ReturnType.SUCCESS
 
+    @staticmethod
+    def target(enemy, data):
+        # best firing position from the influence map, or a random one around the player
+        if data.ranger_influence and data.influence_map is not None:
+            with shared(data):
+                return data.influence_map.pick(data, enemy, enemy.min_offset_distance, enemy.max_offset_distance)
+        return enemy.generateRangedEnemyTargetOffset()
+
+    @staticmethod
+    def follow(enemy, route):
+        if route is None:
+            return ReturnType.RUNNING   # path is still being searched.
+
+        if not len(route):
+            return ReturnType.SUCCESS   # target is in another room.
+
+        enemy.centreRoute(route)
+        enemy.re_route_timer = 0
+        # Resets re-route timer so timer has to tick up before next re-root.
+
+        return ReturnType.RUNNING
+
 
 class AttackMelee(Node):
     def __init__(self):
@@ -153,11 +209,23 @@ class AttackMelee(Node):
         return ReturnType.RUNNING
 
 
+def player_in_sight(enemy, data) -> bool:
+    # a shot with a wall in the way would only be thrown away by the projectile's wall check
+    if not data.sight_check or data.line_of_sight is None:
+        return True
+    with shared(data):
+        return data.line_of_sight.visible(data, data.game_map.tile(enemy.getMidPosition()),
+                                          data.game_map.tile(data.player.getMidPosition()))
+
+
 class AttackRanged(Node):
     def __init__(self):
         super().__init__()
 
     def tick(self, enemy, data, timer):
+        if not player_in_sight(enemy, data):
+            return ReturnType.SUCCESS   # holds fire, the next shot goes as soon as the player is in sight.
+
         if enemy.fireAtPlayer():  # function allowing  mages & other ranged classes to fire attack.
             return ReturnType.RUNNING
         return ReturnType.SUCCESS
@@ -168,7 +236,8 @@ class AttackTeleporter(Node):
         super().__init__()
 
     def tick(self, enemy, data, timer):
-        enemy.fireAtPlayer()  # function allowing teleporters to fire attacking
+        if player_in_sight(enemy, data):
+            enemy.fireAtPlayer()  # function allowing teleporters to fire attacking
         return ReturnType.RUNNING
 
 
@@ -178,7 +247,7 @@ class EnemyPathReset(Node):  # if player is in range of ai enemies
 
     def tick(self, enemy, data, timer):
         if timer > 1:
-            enemy.route.clear()  # dont delete again please
+            enemy.clearRoute()  # dont delete again please
             enemy.re_route_timer = 0
             return ReturnType.RUNNING
 
@@ -190,7 +259,7 @@ class PlayerInRange(Node):  # if player is within a certain range of ai enemies
         super().__init__()
 
     def tick(self, enemy, data, timer):
-        if enemy.getMidPosition().distance(data.player.getMidPosition()) < enemy.attack_player_range:
+        if player_distance(enemy, data) < enemy.attack_player_range:
             return ReturnType.SUCCESS
         return ReturnType.RUNNING
 
@@ -200,7 +269,7 @@ class PlayerInRangeBoss(Node):  # if player is in range of ai enemies
         super().__init__()
 
     def tick(self, enemy, data, timer):
-        if enemy.getMidPosition().distance(data.player.getMidPosition()) < enemy.attack_player_range:
+        if player_distance(enemy, data) < enemy.attack_player_range:
             return ReturnType.SUCCESS
         return ReturnType.FAILURE
 
@@ -219,12 +288,47 @@ class Inverter(Node):
             return ReturnType.SUCCESS
         return ReturnType.RUNNING
 
+SHARED_TREES = {}
+
+
+def shared_tree(definition, profiler=None) -> "BehaviourTree":
+    """
+    Returns the one tree every enemy of a type ticks, for a definition class e.g. BehaviourTreeMelee
+
+    The nodes keep no per enemy state of their own, the route, timers and
+    path request live on the enemy, so a tree is built once per type
+    instead of once per enemy. Given a TreeProfiler, every node's tick is
+    wrapped by it.
+    """
+    key = (definition, profiler)
+    if key not in SHARED_TREES:
+        tree = definition()
+        if profiler is not None:
+            profile(tree.root, profiler)
+        SHARED_TREES[key] = tree
+    return SHARED_TREES[key]
+
+
+def profile(node: Node, profiler) -> None:
+    # the composites call their children's tick attribute, so the wrapper goes on the instance
+    for child in node.children:
+        profile(child, profiler)
+    node.tick = profiler.wrap(node, node.tick)
+
+
+class BehaviourTree:
+    """ Base of the tree definitions, build_tree() hangs the nodes off root """
 
-class BehaviourTreeMelee:
     def __init__(self):
         self.root = Root()
         self.build_tree()
 
+    def build_tree(self):
+        pass
+
+
+class BehaviourTreeMelee(BehaviourTree):
+
     def build_tree(self):
         # first layer of tree
         self.root.children.append(Sequence())
@@ -233,10 +337,7 @@ class BehaviourTreeMelee:
         self.root.children[0].children.append(AttackMelee())
 
 
-class BehaviourTreeMage:
-    def __init__(self):
-        self.root = Root()
-        self.build_tree()
+class BehaviourTreeMage(BehaviourTree):
 
     def build_tree(self):
         # first layer of tree
@@ -247,10 +348,7 @@ class BehaviourTreeMage:
         self.root.children[0].children.append(AttackRanged())
 
 
-class BehaviourTreeTeleporter:
-    def __init__(self):
-        self.root = Root()
-        self.build_tree()
+class BehaviourTreeTeleporter(BehaviourTree):
 
     def build_tree(self):
         # first layer of tree
@@ -259,10 +357,7 @@ class BehaviourTreeTeleporter:
         self.root.children[0].children.append(AttackTeleporter())
 
 
-class BehaviourTreeRanger:
-    def __init__(self):
-        self.root = Root()
-        self.build_tree()
+class BehaviourTreeRanger(BehaviourTree):
 
     def build_tree(self):
         # first layer of tree
@@ -272,11 +367,7 @@ class BehaviourTreeRanger:
         self.root.children[0].children.append(AttackRanged())
 
 
-class BehaviourTreeBoss:
-
-    def __init__(self):
-        self.root = Root()
-        self.build_tree()
+class BehaviourTreeBoss(BehaviourTree):
 
     def build_tree(self):
         # first layer of tree
@@ -5,34 +5,44 @@ from abc import ABC, abstractmethod
 from game.gamedata import GameData
 from game.gameobjects.SpriteAnimator import SpriteAnimator
 from game.gameobjects.enemyStuff.enemyTexturesEnum import EnemyTextures
-from game.component import spriteIntersects, floatIntersects
-from game.gameobjects.projectile import Projectile, DamageType
+from game.component import floatIntersects
+from game.gameobjects.damageType import DamageType
+from game.gameobjects.TimerWheel import Stopwatch
 
+from game.gameobjects.enemyStuff.AIExecutor import defer, shared
+from game.gameobjects.enemyStuff.IncrementalPlanner import IncrementalPlanner
+from game.gameobjects.enemyStuff.Proximity import player_distance
 from game.gameobjects.enemyStuff.behaviourtree import BehaviourTreeMelee, BehaviourTreeMage, \
-    BehaviourTreeTeleporter, BehaviourTreeRanger, BehaviourTreeBoss, resolve
+    BehaviourTreeTeleporter, BehaviourTreeRanger, BehaviourTreeBoss, shared_tree
 
 
 class Enemy(ABC):
+    # seconds since each was last reset, read off the game clock
+    damage_timer = Stopwatch()
+    attack_timer = Stopwatch()
+    re_route_timer = Stopwatch()
 
     @abstractmethod
     def __init__(self, game_data: GameData, spawn) -> None:
         self.data = game_data
         self.sprite = pyasge.Sprite()
         self.sprite.z_order = 100
-        self.position = pyasge.Point2D(0, 0)
+        self.transform = None   # row in data.transforms, where the position lives, from spawn() until it's removed
 
         self.health = 0
         self.speed = 0
         self.damaged = False
         self.damage_timer = 0
+        self.damage_end = None  # timer that ends the damage shader
         self.damaged_type = None
 
         self.melee_attack_damage = 0
         self.attack_timer = 0
 
         self.route = []
-        self.direction = pyasge.Point2D(0, 0)
         self.re_route_timer = 0
+        self.path_request = None    # search waiting on the path scheduler
+        self.planner = IncrementalPlanner()     # keeps the last search around to repair it
 
         self.attack_player_range = 0
         # Range is used for different things depending on type.
@@ -41,9 +51,12 @@ class Enemy(ABC):
         # For Teleporter, it does nothing.
         # For Bug / Boss it is used to determine when the enemy should behave like a Melee or a Ranger.
 
-        self.behaviour = None
+        self.behaviour = None   # tree shared by every enemy of the type
+        self.ai_bucket = None   # frame offset the AIScheduler ticks this enemy on
+        self.ai_actions = None  # left over from the AIExecutor's think phase, run in think()
+        self.proximity_row = None   # this enemy's row in the ProximityTable
+        self.proximity_frame = None  # table frame the row belongs to
         self.anim = None
-        self.running = False    # For animation.
 
         self.spawn_details = spawn  # So that we can retract enemies on death (re-append to self.data.spawns).
 
@@ -53,8 +66,11 @@ class Enemy(ABC):
         return EnemyTextures(texture_num)
 
     def spawn(self, x, y):
-        self.sprite.x = x
-        self.sprite.y = y
+        self.data.transforms.add(self, x, y)
+
+    @property
+    def running(self) -> bool:   # For animation.
+        return self.transform is not None and bool(self.data.transforms.running[self.transform])
 
     def animate(self, game_time: pyasge.GameTime):
         if self.running:
@@ -66,6 +82,10 @@ class Enemy(ABC):
     def centreRoute(self, path: list[pyasge.Point2D]) -> None:
         self.route = path
 
+        if not len(self.route):
+            defer(self.data, self.followRoute)
+            return  # target can't be reached, nothing to follow
+
         for step in self.route:
             # Offsets each step in the route by half of our enemy sprite.
             step.x -= (self.sprite.width * self.sprite.scale) * 0.5
@@ -73,85 +93,99 @@ class Enemy(ABC):
 
         # Need to pop current location to avoid the mage dance (enemies returning to tile middle on updating route).
         self.route.pop(0)
+        defer(self.data, self.followRoute)
 
-        self.setDirection()
+    def clearRoute(self):
+        self.route.clear()
+        defer(self.data, self.followRoute)
 
-    def setDirection(self):
+    def followRoute(self):
+        # hands the new route to the transform store, in the apply phase when the trees think on the AI executor
+        self.data.transforms.follow(self, self.route)
         if len(self.route):
-            if self.route[0] == self.position:
-                return
+            self.setDirection()
+
+    def passWaypoint(self):
+        # the transform store walked this enemy onto its next waypoint (or stopped it a tile short of the last one)
+        self.route.pop(0)
+        self.followRoute()
 
-        self.direction.x = self.route[0].x - self.sprite.x
-        self.direction.y = self.route[0].y - self.sprite.y
-        normalise = math.sqrt(self.direction.x * self.direction.x + self.direction.y * self.direction.y)
-        self.direction.x /= normalise
-        self.direction.y /= normalise
+    def setDirection(self):
+        x, y = self.data.transforms.position(self)
+        if self.route[0].x == x and self.route[0].y == y:
+            return
+
+        direction_x = self.route[0].x - x
+        direction_y = self.route[0].y - y
+        normalise = math.sqrt(direction_x * direction_x + direction_y * direction_y)
+        self.data.transforms.aim(self, direction_x / normalise, direction_y / normalise)
 
         self.flipSprite()
 
-    def flipSprite(self):
-        if self.direction.x < 0:
+    def flipSprite(self, direction_x=None):
+        # faces the way the enemy is walking, or direction_x when given
+        if direction_x is None:
+            direction_x = self.data.transforms.direction(self)[0]
+
+        if direction_x < 0:
             if not self.sprite.isFlippedOnX():
                 self.sprite.flip_flags = pyasge.Sprite.FlipFlags.FLIP_X
 
-        elif self.direction.x > 0:
+        elif direction_x > 0:
             if self.sprite.isFlippedOnX():
                 self.sprite.flip_flags = pyasge.Sprite.FlipFlags.NORMAL
 
     def update(self, game_time: pyasge.GameTime):
-        self.damage_timer += game_time.fixed_timestep
-        self.attack_timer += game_time.fixed_timestep
-        self.re_route_timer += game_time.fixed_timestep
-
         if self.damaged:
-            self.damage_timer += game_time.fixed_timestep
-            self.data.shaders[self.damaged_type.name].uniform("time").set(self.damage_timer)
-
-            if self.damage_timer > 1:
-                self.damage_timer = 0
-                self.damaged = False
+            # the shader runs from 0 to 1 over the half second the damage shows for
+            self.data.shaders[self.damaged_type.name].uniform("time").set(self.damage_timer * 2)
 
-    def fixedUpdate(self, game_time: pyasge.GameTime):
-        self.position = pyasge.Point2D(self.sprite.x, self.sprite.y)
+    def endDamage(self):
+        self.damaged = False
 
-        if len(self.route) > 1:
-            if abs(self.position.distance(self.route[0])) < self.speed * 0.02:
-                self.position = self.route.pop(0)
-                self.setDirection()
-            else:
-                self.position += self.direction * self.speed * game_time.fixed_timestep
+    def waited(self, timer: str, low: float, high: float) -> bool:
+        # True once a random wait between low and high has passed on the named timer, drawn once per reset
+        return getattr(type(self), timer).waited(self, low, high)
 
-            self.sprite.x = self.position.x
-            self.sprite.y = self.position.y
-            self.running = True
+    def think(self):
+        # ticks the behaviour tree, if the AI scheduler says it's this enemy's turn
+        if self.ai_actions is not None:
+            # the tree was already ticked by the AI executor, only what touches the sprites or the game is left
+            actions, self.ai_actions = self.ai_actions, None
+            for action, args in actions:
+                action(*args)
 
-        elif len(self.route) == 1:
-            self.route.pop(0)   # Pop last step in route to avoid pathfinding on top of player / on same tile as player.
+        elif self.data.ai_scheduler.due(self):
+            self.behaviour.root.tick(self, self.data, self.re_route_timer)
 
-        else:
-            self.running = False
+    def fixedUpdate(self, game_time: pyasge.GameTime):
+        # Walking the route is done for all the enemies at once by data.transforms.integrate(),
+        # this is for anything an enemy type does on top of that.
+        pass
 
     def attack(self):
         if self.attack_timer > 1:
-            if self.getMidPosition().distance(self.data.player.getMidPosition()) < self.attack_player_range:
+            if player_distance(self, self.data) < self.attack_player_range:
                 if self.checkCollision():
-                    self.route.clear()
-                    self.data.player.receiveDamage(self.melee_attack_damage, DamageType.normal_damage)
+                    self.clearRoute()
+                    defer(self.data, self.data.player.receiveDamage, self.melee_attack_damage,
+                          DamageType.normal_damage)
                     self.attack_timer = 0
 
     # Collision check for the melee attack.
     def checkCollision(self) -> bool:
 
         # Moves the collision box in front of the sprite and gives it a size.
+        x, y = self.data.transforms.position(self)
         if self.sprite.isFlippedOnX():
             right = self.getMidPosition().x
-            left = self.sprite.x - 16
+            left = x - 16
         else:
-            right = (self.sprite.x + self.sprite.width) + 16
+            right = (x + self.sprite.width) + 16
             left = self.getMidPosition().x
 
-        top = self.sprite.y - 16
-        bottom = (self.sprite.y + self.sprite.width) + 16
+        top = y - 16
+        bottom = (y + self.sprite.width) + 16
         width = right - left
         height = bottom - top
 
@@ -166,8 +200,14 @@ class Enemy(ABC):
         self.damage_timer = 0
         self.damaged = True
 
+        if self.damage_end is not None:
+            self.damage_end.cancel()
+        self.damage_end = self.data.timers.schedule(0.5, self.endDamage)
+
     def getMidPosition(self):
-        return pyasge.Point2D(self.sprite.x + self.sprite.width / 2, self.sprite.y + self.sprite.height / 2)
+        # from the transform store, the sprite of an enemy that is off screen isn't moved
+        x, y = self.data.transforms.midpoint(self)
+        return pyasge.Point2D(x, y)
 
     def render(self):
         if not self.damaged:
@@ -179,117 +219,91 @@ class Enemy(ABC):
 
 
 class RangedEnemy(Enemy):
+    projectile_timer = Stopwatch()
+
     @abstractmethod
     def __init__(self, game_data: GameData, spawn):
         super().__init__(game_data, spawn)
 
-        self.projectiles = []
-        self.projectile_num = -1
         self.projectile_timer = random.randint(0, 50) / 100   # Gives some variation in the intervals in enemy shooting.
         self.projectile_type = None
         self.damage_dealt_type = None
 
         self.ranged_attack_damage = 0
+        self.min_offset_distance = 2
         self.max_offset_distance = 0
         # ^^^ Not all ranged enemies make use of this,
         # but it needs to exist in the base class.
         # Is used for how far from the player to generate a target.
 
     def fireAtPlayer(self):
-        if self.projectile_timer > random.randint(10, 20) / 10:     # More variation in shooting intervals b/w enemies.
+        if self.waited("projectile_timer", 1, 2):    # More variation in shooting intervals b/w enemies.
             self.projectile_timer = 0
-            self.projectile_num += 1
-
-            # Would use switch case but sad.
-            # This will only run for Boss.
-            # Is necessary as Boss randomises projectile type and need to map that to appropriate shader.
-            if self.damage_dealt_type is None:
-                if self.projectile_type == "magic":
-                    self.damage_dealt_type = DamageType.magic_damage
-                elif self.projectile_type == "tusk":
-                    self.damage_dealt_type = DamageType.normal_damage
-                elif self.projectile_type == "potion":
-                    self.damage_dealt_type = DamageType.poison_damage
-
-            self.projectiles.append(Projectile(self.damage_dealt_type,
-                                               self.data.textures["projectile"][self.projectile_type],
-                                               self.getMidPosition().x, self.getMidPosition().y))
-
-            # Creates a direction for the projectile vector.
-            direction = pyasge.Point2D(0, 0)
-            direction.x = self.data.player.sprite.x - self.getMidPosition().x
-            direction.y = self.data.player.sprite.y - self.getMidPosition().y
-
-            normalise = math.sqrt(direction.x * direction.x + direction.y * direction.y)
-            direction.x /= normalise
-            direction.y /= normalise
-
-            self.projectiles[self.projectile_num].setDirection(direction)
+            defer(self.data, self.spawnProjectile)
+
+    def spawnProjectile(self):
+        # Would use switch case but sad.
+        # This will only run for Boss.
+        # Is necessary as Boss randomises projectile type and need to map that to appropriate shader.
+        if self.damage_dealt_type is None:
+            if self.projectile_type == "magic":
+                self.damage_dealt_type = DamageType.magic_damage
+            elif self.projectile_type == "tusk":
+                self.damage_dealt_type = DamageType.normal_damage
+            elif self.projectile_type == "potion":
+                self.damage_dealt_type = DamageType.poison_damage
+
+        # Creates a direction for the projectile vector.
+        direction = pyasge.Point2D(0, 0)
+        direction.x = self.data.player.sprite.x - self.getMidPosition().x
+        direction.y = self.data.player.sprite.y - self.getMidPosition().y
+
+        normalise = math.sqrt(direction.x * direction.x + direction.y * direction.y)
+        direction.x /= normalise
+        direction.y /= normalise
+
+        # The projectile flies in data.projectiles with everyone else's, it's dropped if this enemy goes away.
+        self.data.projectiles.spawn(self.projectile_type, self.getMidPosition().x, self.getMidPosition().y,
+                                    direction.x, direction.y, self.ranged_attack_damage, self.damage_dealt_type,
+                                    owner=self)
 
     def teleport(self) -> bool:
         target_location = self.generateRangedEnemyTargetOffset()
 
-        cost = self.data.costs[target_location[1]][target_location[0]]
-        teleport_point = self.data.game_map.world(target_location)
+        if target_location is None:
+            return False
+            # No walkable tile in range of the player can be reached from here,
+            # the player is in another room.
 
-        if cost < 6 and cost != 0:  # Checks cost is not collidable & is not outside of the rooms.
-            try:
-                resolve(teleport_point, self.data, self)
-            except:
-                return False
-                # If the pathfinding crashes, enemy is not in same room as player...
-                # & so that target is not a viable teleport option.
+        defer(self.data, self.moveTo, target_location)
+        return True
 
-            self.sprite.x = teleport_point.x - self.sprite.width / 2
-            self.sprite.y = teleport_point.y - self.sprite.height / 2
+    def moveTo(self, target_location):
+        teleport_point = self.data.game_map.world(target_location)
 
-            self.direction.x = self.data.player.sprite.x - self.sprite.x
-            self.flipSprite()
+        x = teleport_point.x - self.sprite.width / 2
+        y = teleport_point.y - self.sprite.height / 2
+        self.data.transforms.place(self, x, y)
 
-            self.re_route_timer = 0
+        self.flipSprite(self.data.player.sprite.x - x)  # Faces the player.
 
-            return True
-        return False
+        self.re_route_timer = 0
 
-    def generateRangedEnemyTargetOffset(self):
+    def generateRangedEnemyTargetOffset(self, start=None):
+        # Draws a walkable tile min_offset_distance to max_offset_distance tiles from the player,
+        # that can be reached from start
+        # (the enemy's own tile by default). None if there isn't one.
         player = self.data.game_map.tile(self.data.player.getMidPosition())
-        x_tile_offset = random.randint(2, self.max_offset_distance)
-        y_tile_offset = random.randint(2, self.max_offset_distance)
-
-        if random.randint(0, 1) == 1:
-            x_tile_offset = -x_tile_offset
+        if start is None:
+            start = self.data.game_map.tile(self.getMidPosition())
 
-        if random.randint(0, 1) == 1:
-            y_tile_offset = - y_tile_offset
-
-        return int(player[0] + x_tile_offset), int(player[1] + y_tile_offset)
+        with shared(self.data):
+            return self.data.target_sampler.sample(start, player, self.min_offset_distance, self.max_offset_distance)
 
     def update(self, game_time: pyasge.GameTime):
         super().update(game_time)
 
-        self.projectile_timer += game_time.fixed_timestep
-        self.behaviour.root.tick(self, self.data, self.re_route_timer)
-
-        for projectile in self.projectiles:
-            projectile.update(game_time)
-
-            tile = self.data.game_map.tile(pyasge.Point2D(projectile.getMidPosition().x,
-                                                          projectile.getMidPosition().y))
-
-            if self.data.costs[tile[1]][tile[0]] >= 10:     # Checks if projectile collided with an obstacle.
-                self.projectiles.remove(projectile)
-                self.projectile_num -= 1
-
-            elif spriteIntersects(self.data.player.sprite, projectile.sprite):  # Check for player collision.
-                self.data.player.receiveDamage(self.ranged_attack_damage, projectile.damage_type)
-                self.projectiles.remove(projectile)
-                self.projectile_num -= 1
-
-    def render(self):
-        super().render()
-
-        for projectile in self.projectiles:
-            projectile.render(self.data.renderer)
+        self.think()
 
 
 class Melee(Enemy):
@@ -301,7 +315,7 @@ class Melee(Enemy):
         self.melee_attack_damage = 1
         self.attack_player_range = 3 * 16   # 3 Tiles
 
-        self.behaviour = BehaviourTreeMelee()
+        self.behaviour = shared_tree(BehaviourTreeMelee, self.data.bt_profiler)
         self.anim = SpriteAnimator(self.sprite, self.data.textures["melee"][self.randomTexture(1, 4).name])
         # ^^^ Randomly grabs a melee sprite.
         self.spawn(spawn[2], spawn[3])
@@ -309,7 +323,7 @@ class Melee(Enemy):
 
     def update(self, game_time: pyasge.GameTime):
         super().update(game_time)
-        self.behaviour.root.tick(self, self.data, self.re_route_timer)  # does this belong in update or fixedUpdate?
+        self.think()  # does this belong in update or fixedUpdate?
         self.animate(game_time)
 
 
@@ -324,7 +338,7 @@ class Mage(RangedEnemy):
         self.damage_dealt_type = DamageType.magic_damage
         self.projectile_type = "magic"
 
-        self.behaviour = BehaviourTreeMage()
+        self.behaviour = shared_tree(BehaviourTreeMage, self.data.bt_profiler)
         self.anim = SpriteAnimator(self.sprite, self.data.textures["mage"][self.randomTexture(5, 6).name])
         self.spawn(spawn[2], spawn[3])
         # ^^^ Must happen after setting up SpriteAnimator as size is changed within SpriteAnimator.
@@ -344,7 +358,7 @@ class Teleporter(RangedEnemy):
         self.damage_dealt_type: DamageType = DamageType.poison_damage
         self.projectile_type = "potion"
 
-        self.behaviour = BehaviourTreeTeleporter()
+        self.behaviour = shared_tree(BehaviourTreeTeleporter, self.data.bt_profiler)
         self.anim = SpriteAnimator(self.sprite, self.data.textures["teleporter"]["cloaked"])
         self.spawn(spawn[2], spawn[3])
         # ^^^ Must happen after setting up SpriteAnimator as size is changed within SpriteAnimator.
@@ -372,7 +386,7 @@ class Ranger(RangedEnemy):
         self.damage_dealt_type: DamageType = DamageType.normal_damage
         self.projectile_type = "tusk"
 
-        self.behaviour = BehaviourTreeRanger()
+        self.behaviour = shared_tree(BehaviourTreeRanger, self.data.bt_profiler)
         self.anim = SpriteAnimator(self.sprite, self.data.textures["ranger"][self.randomTexture(8, 9).name])
         self.spawn(spawn[2], spawn[3])
 
@@ -384,13 +398,12 @@ class Ranger(RangedEnemy):
 class BigBoss(RangedEnemy):
     def __init__(self, game_data: GameData, spawn) -> None:
         super().__init__(game_data, spawn)
-        self.behaviour = BehaviourTreeBoss()
+        self.behaviour = shared_tree(BehaviourTreeBoss, self.data.bt_profiler)
         self.health = 250
         self.speed = 82.5
         self.melee_attack_damage = 20
         self.ranged_attack_damage = 5
         self.rapid_fire_mode = False
-        self.rapid_fire_timer = 0
         self.attack_player_range = 6 * 16   # 6 Tiles
         self.max_offset_distance = 15  # This offset is for teleportation.
         self.anim = SpriteAnimator(self.sprite, self.data.textures["boss"]["bug"])
@@ -415,52 +428,36 @@ class BigBoss(RangedEnemy):
         super().update(game_time)
         self.animate(game_time)
 
-        if self.rapid_fire_mode:
-            self.rapid_fire_timer += game_time.fixed_timestep
-            if self.rapid_fire_timer > 3:
-                self.rapid_fire_timer = 0
-                self.rapid_fire_mode = False
+    def endRapidFire(self):
+        self.rapid_fire_mode = False
 
     def fixedUpdate(self, game_time: pyasge.GameTime):
         super().fixedUpdate(game_time)
         current_tile = self.data.game_map.tile(self.getMidPosition())
 
         if self.data.costs[current_tile[1]][current_tile[0]] > 9 or self.data.costs[current_tile[1]][current_tile[0]] == 0:
+            # Stuck inside a wall, so goes back next to the player.
+            # If the wall has no walkable tiles around it, one reachable from the player is used instead.
+            target_location = self.generateRangedEnemyTargetOffset(current_tile)
+            if target_location is None:
+                target_location = self.generateRangedEnemyTargetOffset(self.data.game_map.tile(
+                    self.data.player.getMidPosition()))
 
-            teleported = False
-            while not teleported:
-                # Has to loop to find viable teleport target.
-                target_location = self.generateRangedEnemyTargetOffset()
-
-                teleport_point = self.data.game_map.world(target_location)
-                try:
-                    resolve(teleport_point, self.data, self)
-                except:
-                    return False
-                # If the pathfinding crashes, enemy is not in same room as player...
-                # & so that target is not a viable teleport option.
-
-                self.sprite.x = teleport_point.x - self.sprite.width / 2
-                self.sprite.y = teleport_point.y - self.sprite.height / 2
-
-                self.direction.x = self.data.player.sprite.x - self.sprite.x
-                self.flipSprite()
-
-                self.re_route_timer = 0
-                self.route.clear()
-
-                teleported = True
+            if target_location is not None:
+                self.moveTo(target_location)
+                self.clearRoute()
 
     def receiveDamage(self, damage, damage_type: DamageType):
         super().receiveDamage(damage, damage_type)
 
-        teleported = False
-        while not teleported:
-            teleported = self.teleport()
-            # Has to loop to find viable teleport target.
+        self.teleport()
+        # The sampler only gives reachable targets, so one draw is enough.
+        # It only fails when the player isn't in the Boss' room.
 
-        self.route.clear()  # Forces pathfinding to re-route.
+        self.clearRoute()  # Forces pathfinding to re-route.
 
+        if not self.rapid_fire_mode:
+            self.data.timers.schedule(3, self.endRapidFire)     # Rapid fire lasts 3 seconds from the first hit.
         self.rapid_fire_mode = True
         self.projectile_timer = 100
         # Above 2 lines initiate rapid fire mode.
@@ -9,6 +9,12 @@ import pyasge
 import pytmx
 from pytmx import TiledTileLayer
 
+from game.gameobjects.CollisionWorld import CollisionWorld
+from game.gameobjects.CostGrid import CostGrid
+from game.gameobjects.enemyStuff.Reachability import ReachabilityIndex
+from game.gameobjects.enemyStuff.RoomGraph import RoomGraph
+from game.gameobjects.enemyStuff.TargetSampler import TargetSampler
+
 
 # Quick sort alogithm for the teleporters
 # needed for correct function if the teleporters are not in order in the tilemap files
@@ -70,6 +76,55 @@ def other_library_loader(renderer: pyasge.Renderer, filename, colorkey, **kwargs
     return extract_image
 
 
+def build_costs(tmxdata):
+    """Builds the cost map, indexed [y][x] or by flat index, from the layers responsible for the walkable area"""
+    # it initialises a list and fills it with 0s
+    costs = [[0 for i in range(tmxdata.width)] for j in range(tmxdata.height)]
+
+    # creates a list containing the two layers who are responsible for the walkable area of the map
+    cost_layers = []
+    cost_layers.append(tmxdata.layernames["Collidables"])
+    cost_layers.append(tmxdata.layernames["SpikesVisuals"])
+    cost_layers.append(tmxdata.layernames["Floor"])
+    # cycles trough the tiles in those layers and gets the "cost" value
+    for layer in cost_layers:
+        for x, y, tile in layer.tiles():
+            # update the cost map with using the layer cost
+            costs[y][x] += layer.properties["cost"]
+
+    # packs it in a NumPy grid and works out every tile's walkable neighbours once
+    return CostGrid(costs)
+
+
+def build_collision(tmxdata, tile_size):
+    """Builds the static collision world from the tiles of the Collidables layer"""
+    solid = np.zeros((tmxdata.height, tmxdata.width), dtype=bool)
+    for x, y, tile in tmxdata.layernames["Collidables"].tiles():
+        solid[y, x] = True
+    return CollisionWorld(solid, tile_size)
+
+
+def build_navigation(data, width, height, tile_size):
+    """Builds the lookups the enemy pathfinding needs from the cost map and the map objects"""
+    # labels the walkable areas of the cost map with the room they belong to
+    # every object in the map knows its Room, so their tiles are used to name the areas
+    room_points = []
+    for checkpoint in data.checkpoints:
+        room_points.append([checkpoint[0], int((checkpoint[1] + checkpoint[3] / 2) / tile_size[0]),
+                            int((checkpoint[2] + checkpoint[4] / 2) / tile_size[1])])
+    for spawn in data.spawns:
+        room_points.append([spawn[0], int(spawn[2] / tile_size[0]), int(spawn[3] / tile_size[1])])
+    for teleporter in data.teleporters:
+        room_points.append([teleporter[5], int((teleporter[1] + teleporter[3] / 2) / tile_size[0]),
+                            int((teleporter[2] + teleporter[4] / 2) / tile_size[1])])
+
+    data.reachability = ReachabilityIndex(data.costs, width, height, room_points)
+    # teleport and reposition targets are drawn from the tiles of these areas
+    data.target_sampler = TargetSampler(data.reachability)
+    # the rooms are only joined by teleporters, these make the graph for planning across rooms
+    data.room_graph = RoomGraph(data, tile_size)
+
+
 class GameMap:
     """
     The GameMap is the heart of soul of the game world.
@@ -148,19 +203,10 @@ class GameMap:
         for obj in self.tmxdata.layernames["Spikes"]:
             self.data.spikes.append([obj.x, obj.y, obj.width, obj.height, obj.Room])
 
-        # it initialises a list and fills it with 0s
-        self.data.costs = [[0 for i in range(self.tmxdata.width)] for j in range(self.tmxdata.height)]
-
-        # creates a list containing the two layers who are responsible for the walkable area of the map
-        cost_layers = []
-        cost_layers.append(self.tmxdata.layernames["Collidables"])
-        cost_layers.append(self.tmxdata.layernames["SpikesVisuals"])
-        cost_layers.append(self.tmxdata.layernames["Floor"])
-        # cycles trough the tiles in those layers and gets the "cost" value
-        for layer in cost_layers:
-            for x, y, tile in layer.tiles():
-                # update the cost map with using the layer cost
-                self.data.costs[y][x] += layer.properties["cost"]
+        self.data.costs = build_costs(self.tmxdata)
+        self.data.costs_version += 1    # lets the pathfinding caches know the map changed
+        self.data.collision = build_collision(self.tmxdata, self.tile_size)
+        build_navigation(self.data, self.width, self.height, self.tile_size)
 
         # appends all the visible tiles to the tile_map list for rendering
         for layer in self.tmxdata.visible_layers:
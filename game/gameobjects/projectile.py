@@ -1,41 +1,299 @@
+from typing import Dict, List, Optional
+
+import numpy as np
 import pyasge
+
+from game.component import spriteBounds
 from game.gameobjects.damageType import DamageType
-from game.gameobjects.SpriteAnimator import SpriteAnimator
+from game.gameobjects.LineOfSight import ray_impact
+from game.gameobjects.SpatialHash import SpatialHash
+
+PLAYER = 0  # owner of the player's arrows, the enemies get their own owner numbers from 1
+
+
+class ProjectileKind:
+    """ What every projectile of one texture (arrow, magic, tusk, potion) shares """
+
+    def __init__(self, name: str, texture_dict) -> None:
+        self.name = name
+        self.texture_dict = texture_dict
+        self.frames = texture_dict["frames"]
+        self.frame_interval = texture_dict["frame_interval"]
+        self.half_width = texture_dict["width"] / 2
+        self.half_height = texture_dict["height"] / 2
+        self.frame_xs = [texture_dict["start_x"] + (texture_dict["width"] + texture_dict["gap"]) * i
+                         for i in range(self.frames)]
+        self.free: List[pyasge.Sprite] = []     # sprites of projectiles that are gone, ready to be reused
+
+    def sprite(self) -> pyasge.Sprite:
+        # same set up the SpriteAnimator used to do, the frames are picked in ProjectilePool.render
+        if self.free:
+            return self.free.pop()
+        td = self.texture_dict
+        sprite = pyasge.Sprite()
+        sprite.loadTexture(td["filepath"])
+        sprite.scale = td["scale"]
+        sprite.width = td["width"]
+        sprite.height = td["height"]
+        sprite.z_order = 95
+        sprite.src_rect[pyasge.Sprite.SourceRectIndex.START_X] = self.frame_xs[0]
+        sprite.src_rect[pyasge.Sprite.SourceRectIndex.START_Y] = td["start_y"]
+        sprite.src_rect[pyasge.Sprite.SourceRectIndex.LENGTH_X] = td["width"]
+        sprite.src_rect[pyasge.Sprite.SourceRectIndex.LENGTH_Y] = td["height"]
+        return sprite
+
+
+class ProjectilePool:
+    """
+    Every projectile in flight, the enemies' and the player's arrows, as NumPy arrays
+
+    Each shooter used to keep a list of Projectile objects with a sprite
+    and an animator each, moved and checked one by one. Here a projectile
+    is a row in a set of arrays (position, velocity, age, deadline, owner,
+    kind, damage, damage type) and update() moves and ages all of them in
+    a handful of array operations. The wall a projectile will fly into
+    is found once when it's fired, by casting a ray over the cost grid
+    (ray_impact), and it's dropped when its age reaches that time. The
+    rows that died are dropped by compacting the arrays once at the end,
+    so the live projectiles always fill the first count rows.
+
+    Hits go through a SpatialHash of the enemies and the player, rebuilt
+    every update: only the projectiles sharing a tile sized cell with a
+    body are tested against its box, all the pairs in one go. Boxes
+    ignore the rotation of the arrows.
+
+    Sprites only exist for rendering. render() hands a sprite to every
+    live projectile that doesn't have one yet, reusing the ones of dead
+    projectiles of the same kind, and writes the position and animation
+    frame to it, so a boss in rapid fire mostly costs rows in the arrays.
+    """
+
+    SPEED = 150
+    LIFETIME = 5.0  # seconds, projectiles that never hit a wall are dropped after this long
+
+    # every per projectile array, grow() and compact() go over these
+    COLUMNS = ("xs", "ys", "vxs", "vys", "ages", "lifetimes", "impacts", "rotations", "owners", "kind", "damage",
+               "damage_types", "alive")
+
+    def __init__(self, data, capacity: int = 64) -> None:
+        self.data = data
+        self.kinds: List[ProjectileKind] = []
+        self.kind_ids: Dict[str, int] = {}
+        self.owner_ids: Dict[object, int] = {}
+        self.next_owner = PLAYER + 1
+
+        self.count = 0
+        self.xs = np.zeros(capacity, dtype=np.float32)     # top left of the sprite
+        self.ys = np.zeros(capacity, dtype=np.float32)
+        self.vxs = np.zeros(capacity, dtype=np.float32)    # pixels per second
+        self.vys = np.zeros(capacity, dtype=np.float32)
+        self.ages = np.zeros(capacity, dtype=np.float32)
+        self.lifetimes = np.zeros(capacity, dtype=np.float32)   # age at which it hits a wall or expires
+        self.impacts = np.zeros(capacity, dtype=bool)           # whether that's a wall
+        self.rotations = np.zeros(capacity, dtype=np.float32)
+        self.owners = np.zeros(capacity, dtype=np.int32)
+        self.kind = np.zeros(capacity, dtype=np.int16)
+        self.damage = np.zeros(capacity, dtype=np.float32)
+        self.damage_types = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.sprites: List[Optional[pyasge.Sprite]] = [None] * capacity
+        self.broadphase = SpatialHash(data.game_map.tile_size[0])
+
+        # per kind, looked up with the kind column
+        self.half_widths = np.zeros(0, dtype=np.float32)
+        self.half_heights = np.zeros(0, dtype=np.float32)
+        self.half_boxes_x = np.zeros(0, dtype=np.float32)
+        self.half_boxes_y = np.zeros(0, dtype=np.float32)
+
+        # statistics
+        self.spawned = 0
+        self.hits = 0
+        self.walls = 0
+        self.expired = 0
+        self.peak = 0
+
+    def kindId(self, name: str) -> int:
+        kind_id = self.kind_ids.get(name)
+        if kind_id is None:
+            kind = ProjectileKind(name, self.data.textures["projectile"][name])
+            kind_id = self.kind_ids[name] = len(self.kinds)
+            self.kinds.append(kind)
+            scale = kind.texture_dict["scale"]
+            self.half_widths = np.append(self.half_widths, np.float32(kind.half_width))
+            self.half_heights = np.append(self.half_heights, np.float32(kind.half_height))
+            self.half_boxes_x = np.append(self.half_boxes_x, np.float32(kind.half_width * scale))
+            self.half_boxes_y = np.append(self.half_boxes_y, np.float32(kind.half_height * scale))
+        return kind_id
+
+    def ownerId(self, owner) -> int:
+        if owner is None:
+            return PLAYER
+        owner_id = self.owner_ids.get(owner)
+        if owner_id is None:
+            owner_id = self.owner_ids[owner] = self.next_owner
+            self.next_owner += 1
+        return owner_id
+
+    def grow(self) -> None:
+        capacity = len(self.xs) * 2
+        for name in self.COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self.sprites.extend([None] * (capacity - len(self.sprites)))
+
+    def spawn(self, name: str, x: float, y: float, direction_x: float, direction_y: float, damage,
+              damage_type: DamageType, owner=None, rotation: Optional[float] = None) -> None:
+        """ Fires a projectile of the given texture from x, y along a unit direction, owner None is the player """
+        if self.count == len(self.xs):
+            self.grow()
+        row = self.count
+        self.xs[row] = x
+        self.ys[row] = y
+        self.vxs[row] = direction_x * self.SPEED
+        self.vys[row] = direction_y * self.SPEED
+        self.ages[row] = 0
+        self.rotations[row] = rotation if rotation is not None else 0.0
+        self.owners[row] = self.ownerId(owner)
+        kind_id = self.kind[row] = self.kindId(name)
+        self.damage[row] = damage
+        self.damage_types[row] = damage_type
+        self.alive[row] = True
+
+        # the wall it will fly into is found now, along the path of its middle, instead of every frame
+        kind = self.kinds[kind_id]
+        reach = self.SPEED * self.LIFETIME
+        distance = ray_impact(self.data.costs, self.data.game_map.tile_size, x + kind.half_width,
+                              y + kind.half_height, direction_x, direction_y, reach)
+        self.lifetimes[row] = distance / self.SPEED
+        self.impacts[row] = distance < reach
+        self.count += 1
+        self.spawned += 1
+        self.peak = max(self.peak, self.count)
+
+    def update(self, game_time: pyasge.GameTime, player, enemies) -> None:
+        """ Moves every projectile, drops the ones that hit a wall or ran out of time and deals the hits """
+        count = self.count
+        if not count:
+            return
+        timestep = game_time.fixed_timestep
+
+        xs = self.xs[:count]
+        ys = self.ys[:count]
+        xs += self.vxs[:count] * timestep
+        ys += self.vys[:count] * timestep
+        ages = self.ages[:count]
+        ages += timestep
+        alive = self.alive[:count]
+
+        # walls and lifetime, the deadlines were worked out when they were fired
+        ended = alive & (ages >= self.lifetimes[:count])
+        walls = np.count_nonzero(ended & self.impacts[:count])
+        self.walls += int(walls)
+        self.expired += int(np.count_nonzero(ended)) - int(walls)
+        alive &= ~ended
+
+        kind = self.kind[:count]
+        mid_xs = xs + self.half_widths[kind]
+        mid_ys = ys + self.half_heights[kind]
+
+        # hits, the broadphase pairs the live projectiles with the enemies and the player that share a cell
+        bodies = list(enemies)
+        if player is not None:
+            bodies.append(player)
+        rows = np.flatnonzero(alive)
+        if bodies and len(rows):
+            bounds = np.empty((len(bodies), 4), dtype=np.float32)
+            if enemies and self.data.transforms is not None:
+                bounds[:len(enemies)] = self.data.transforms.bounds(enemies)   # the sprites lag behind
+            else:
+                bounds[:len(enemies)] = [spriteBounds(enemy.sprite) for enemy in enemies]
+            if player is not None:
+                bounds[-1] = spriteBounds(player.sprite)
+            self.broadphase.rebuild(bounds[:, 0], bounds[:, 1], bounds[:, 2], bounds[:, 3])
 
+            kind = kind[rows]
+            mid_xs = mid_xs[rows]
+            mid_ys = mid_ys[rows]
+            half_xs = self.half_boxes_x[kind]
+            half_ys = self.half_boxes_y[kind]
+            boxes, ids = self.broadphase.candidates(mid_xs - half_xs, mid_ys - half_ys,
+                                                    mid_xs + half_xs, mid_ys + half_ys)
 
-class Projectile:
+            # arrows only hit enemies and the enemies' projectiles only hit the player, then the exact box test
+            box_bounds = bounds[ids]
+            hit = ((self.owners[rows[boxes]] == PLAYER) != (ids == len(enemies))) & \
+                (mid_xs[boxes] + half_xs[boxes] > box_bounds[:, 0]) & \
+                (mid_xs[boxes] - half_xs[boxes] < box_bounds[:, 2]) & \
+                (mid_ys[boxes] + half_ys[boxes] > box_bounds[:, 1]) & \
+                (mid_ys[boxes] - half_ys[boxes] < box_bounds[:, 3])
 
-    def __init__(self, damage_type: DamageType, texture_dict, x, y):
-        self.damage_type = damage_type
+            # pairs come in the order of the bodies, a projectile touching two enemies hits the first one
+            for row, body in zip(rows[boxes[hit]].tolist(), ids[hit].tolist()):
+                if alive[row]:
+                    alive[row] = False
+                    bodies[body].receiveDamage(float(self.damage[row]), DamageType(int(self.damage_types[row])))
+                    self.hits += 1
 
-        self.sprite = pyasge.Sprite()
-        self.anim = SpriteAnimator(self.sprite, texture_dict)
-        self.sprite.z_order = 95
-        self.sprite.x = x
-        self.sprite.y = y
-        self.speed = 150
-        self.vect_x = 0
-        self.vect_y = 0
+        self.compact()
 
-    def setDirection(self, direction: pyasge.Point2D):
-        self.vect_x = direction.x
-        self.vect_y = direction.y
+    def compact(self) -> None:
+        # moves the live rows to the front, in the order they were fired
+        count = self.count
+        alive = self.alive[:count]
+        live = np.flatnonzero(alive)
+        if len(live) == count:
+            return
 
-    def setDirectionFloats(self, x, y):
-        self.vect_x = x
-        self.vect_y = y
+        for row in np.flatnonzero(~alive).tolist():
+            sprite = self.sprites[row]
+            if sprite is not None:
+                self.kinds[self.kind[row]].free.append(sprite)
 
-    def setRotation(self, target_rotation):
-        self.sprite.rotation = target_rotation
+        remaining = len(live)
+        for name in self.COLUMNS:
+            column = getattr(self, name)
+            column[:remaining] = column[live]
+        self.alive[remaining:count] = False
+        sprites = self.sprites
+        sprites[:remaining] = [sprites[row] for row in live.tolist()]
+        sprites[remaining:count] = [None] * (count - remaining)
+        self.count = remaining
 
-    def getMidPosition(self):
-        return pyasge.Point2D(self.sprite.x + self.sprite.width / 2, self.sprite.y + self.sprite.height / 2)
+    def discard(self, owner) -> None:
+        """ Drops the projectiles of an enemy that died or was sent back to its spawn """
+        owner_id = self.owner_ids.pop(owner, None)
+        if owner_id is not None and self.count:
+            self.alive[:self.count] &= self.owners[:self.count] != owner_id
+            self.compact()
 
-    def update(self, game_time: pyasge.GameTime):
-        self.anim.animateSprite(game_time, 0)
+    def clear(self) -> None:
+        self.alive[:self.count] = False
+        self.compact()
+        self.owner_ids.clear()
 
-        self.sprite.x += self.vect_x * self.speed * game_time.fixed_timestep
-        self.sprite.y += self.vect_y * self.speed * game_time.fixed_timestep
+    def render(self, renderer) -> None:
+        """ Writes the live projectiles to their sprites and renders them """
+        start_x = pyasge.Sprite.SourceRectIndex.START_X
+        kinds = self.kinds
+        for row, (x, y, age, rotation, kind_id) in enumerate(zip(
+                self.xs[:self.count].tolist(), self.ys[:self.count].tolist(), self.ages[:self.count].tolist(),
+                self.rotations[:self.count].tolist(), self.kind[:self.count].tolist())):
+            kind = kinds[kind_id]
+            sprite = self.sprites[row]
+            if sprite is None:
+                sprite = self.sprites[row] = kind.sprite()
+                sprite.rotation = rotation
+            sprite.x = x
+            sprite.y = y
+            if kind.frames > 1:
+                frame = int(age / kind.frame_interval) % kind.frames
+                sprite.src_rect[start_x] = kind.frame_xs[frame]
+            renderer.render(sprite)
 
-    def render(self, renderer):
-        renderer.render(self.sprite)
+    def stats(self) -> Dict[str, int]:
+        stats = {"live": self.count, "peak": self.peak, "spawned": self.spawned, "hits": self.hits,
+                 "walls": self.walls, "expired": self.expired}
+        stats.update(self.broadphase.stats())
+        return stats
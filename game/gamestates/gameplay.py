@@ -1,15 +1,30 @@
+import logging
 import pyasge
 from game.gamedata import GameData
 from game.gamestates.gamestate import GameState
 from game.gamestates.gamestate import GameStateID
 from game.gameobjects.enemyStuff import enemy
+from game.gameobjects.enemyStuff.enemy import Ranger, BigBoss
 from game.gameobjects.enemyStuff.enemyTypeEnum import EnemyTypes
+from game.gameobjects.enemyStuff.FlowField import FlowField
+from game.gameobjects.enemyStuff.PathFinding import PathCache
+from game.gameobjects.enemyStuff.PathService import path_requests
+from game.gameobjects.enemyStuff.IncrementalPlanner import REPLAN_STATS
+from game.gameobjects.enemyStuff.AIScheduler import AIScheduler
+from game.gameobjects.enemyStuff.Proximity import ProximityTable
+from game.gameobjects.enemyStuff.InfluenceMap import InfluenceMap
+from game.gameobjects.LineOfSight import SightLines
+from game.gameobjects.enemyStuff.AIExecutor import AIExecutor
+from game.gameobjects.enemyStuff.Transforms import TransformStore
+from game.gameobjects.projectile import ProjectilePool
 from game.gameobjects.weaponTypes import GunTypes
 from game.gameobjects.Player import Player
 from game.component import floatIntersects, spriteIntersects
 from game.gameobjects.damageType import DamageType
 from game.gameobjects.SoundHandler import TrackIndex
 
+logger = logging.getLogger(__name__)
+
 
 class GamePlay(GameState):
 
@@ -18,6 +33,9 @@ class GamePlay(GameState):
         self.id = GameStateID.GAMEPLAY
         self.data.renderer.setClearColour(pyasge.COLOURS.BLACK)
 
+        # the last run's player and enemies are gone, only the UI and the sound keep their timers
+        self.data.timers.clear(keep=(self.data.UserInterface, self.data.GameAudio))
+
         self.player = Player(data)
         self.data.player = self.player  # Creates a reference / pointer to the player for the enemy behaviour trees.
         self.player_movement = [0, 0]
@@ -43,6 +61,20 @@ class GamePlay(GameState):
         self.shader_timer = 0
 
         self.active_enemies = []
+        self.data.transforms = TransformStore()  # Positions and routes of the active enemies, moved all at once
+        self.data.projectiles = ProjectilePool(self.data)  # Every projectile in flight, the enemies' and the arrows
+        self.data.flow_field = FlowField()   # Shared route towards the player for all the chasing enemies
+        self.data.path_cache = PathCache()   # Recently found routes, enemies keep asking for the same ones
+        if self.data.path_scheduler is not None:
+            self.data.path_scheduler.close()  # Stops the searches left over from the last game
+        self.data.path_scheduler = path_requests(self.data)  # Spreads the searches over frames or worker threads
+        self.data.ai_scheduler = AIScheduler()  # Picks which enemies think this frame
+        self.data.proximity = ProximityTable()  # Distances from the enemies to the player, worked out once a frame
+        self.data.influence_map = InfluenceMap()  # Scores the tiles around the player as firing positions for rangers
+        self.data.line_of_sight = SightLines()  # Whether the enemies can shoot at the player without hitting a wall
+        if self.data.ai_executor is not None:
+            self.data.ai_executor.close()  # Stops the threads left over from the last game
+        self.data.ai_executor = AIExecutor(self.data.ai_workers)  # Ticks the behaviour trees on a thread pool
         self.data.retract_enemies = self.returnEnemies  # Stores a function to the returnEnemies function so that enemies can be returned within
 
     def click_handler(self, event: pyasge.ClickEvent) -> None:
@@ -66,7 +98,7 @@ class GamePlay(GameState):
                 self.data.UserInterface.initWeaponSprite(GunTypes.BOW)
                 self.player.switchWeapons()
             if not self.player.isAttacking and not self.player.isShooting:
-                self.player.isAttacking = True
+                self.player.startAttack()
                 for enem in self.active_enemies:
                     self.player.attack(enem)
 
@@ -80,7 +112,7 @@ class GamePlay(GameState):
                 if self.player.bowEquipped:
                     self.player.switchWeapons()
                 if not self.player.isAttacking:
-                    self.player.isAttacking = True
+                    self.player.startAttack()
                     for enemy in self.active_enemies:
                         self.player.attack(enemy)
 
@@ -149,6 +181,15 @@ class GamePlay(GameState):
             if event.key == pyasge.KEYS.KEY_D and self.player_movement[0] != -1:
                 self.player_movement[0] = 0
 
+        # Logs the behaviour tree profile so far, when profiling is on
+        if event.action == pyasge.KEYS.KEY_PRESSED and event.key == pyasge.KEYS.KEY_F9:
+            if self.data.bt_profiler is not None:
+                self.data.bt_profiler.log()
+
+        # Prints how often the path cache answered and what the path searches cost so far
+        if event.action == pyasge.KEYS.KEY_PRESSED and event.key == pyasge.KEYS.KEY_F10:
+            self.printPathStats()
+
         # Interact button
         if event.action == pyasge.KEYS.KEY_RELEASED:
             if event.key == pyasge.KEYS.KEY_E:
@@ -171,6 +212,16 @@ class GamePlay(GameState):
         if event.key == pyasge.KEYS.KEY_PERIOD:
             self.data.bread = 4
 
+    def printPathStats(self):
+        # F10, the path cache's hit rate is what tells whether it's worth its memory
+        cache = self.data.path_cache.stats()
+        logger.info("path cache: %.0f%% hits (%d of %d lookups, %d from the middle of a kept path), "
+                    "%d paths kept, %d evicted", cache["hit_rate"] * 100, cache["hits"],
+                    cache["hits"] + cache["misses"], cache["suffix_hits"], cache["size"], cache["evictions"])
+        logger.info("path requests: %s", self.data.path_scheduler.stats())
+        logger.info("flow field: %s", self.data.flow_field.stats())
+        logger.info("replanning: %s", REPLAN_STATS.stats())
+
     def chestInteract(self):
         # this handles the chests, one restores life, the other gives the player an additional baguette
         if self.active_chest[1] == 1:  # if type is a health chest.
@@ -241,6 +292,8 @@ class GamePlay(GameState):
                     break
 
     def fixed_update(self, game_time: pyasge.GameTime) -> None:
+        for enemi in self.data.transforms.integrate(game_time):
+            enemi.passWaypoint()
         for enemi in self.active_enemies:
             enemi.fixedUpdate(game_time)
 
@@ -270,17 +323,45 @@ class GamePlay(GameState):
         if self.room_current is not self.previous_room:
             self.roomChecksReloader()
 
+        # Points the flow field at the player's tile, the path scheduler floods it a slice a frame
+        if self.data.chase_flow_field and len(self.active_enemies):
+            self.data.flow_field.update(self.data, self.data.game_map.tile(self.player.getMidPosition()))
+
+        # Lets the AI scheduler know where the player and the camera are before the enemies think
+        view = self.camera.view
+        self.data.ai_scheduler.beginFrame(self.player.getMidPosition(),
+                                          (view.min_x, view.min_y, view.max_x, view.max_y))
+
+        # Works out how far every enemy is from the player in one go, the trees and attacks read it from here
+        self.data.proximity.update(self.active_enemies, self.player.getMidPosition(), self.data.transforms)
+        player_tile = self.data.game_map.tile(self.player.getMidPosition())
+        if self.data.ranger_influence and any(isinstance(active_enemy, (Ranger, BigBoss))
+                                              for active_enemy in self.active_enemies):
+            # only the rangers' trees pick from it, nothing needs the stamps while none of them are around
+            self.data.influence_map.update(self.data, self.active_enemies, player_tile)
+        self.data.line_of_sight.update(self.data, player_tile)
+
+        # Ticks the behaviour trees in parallel when enabled, the enemy loop below then applies what they decided
+        self.data.ai_executor.run(self.data, self.active_enemies)
+
+        # Moves all the projectiles and deals their hits, arrows that kill an enemy remove it in the loop below
+        self.data.projectiles.update(game_time, self.player, self.active_enemies)
+
         # Enemy updater
         for enemy in self.active_enemies:
             enemy.update(game_time)
 
-            # collision check for arrows
-            self.player.checkArrowCollisions(enemy)
-
             if enemy.health < 1:
+                if enemy.path_request is not None:
+                    enemy.path_request.cancel()
+                self.data.projectiles.discard(enemy)
+                self.data.transforms.remove(enemy)
                 self.active_enemies.remove(enemy)
                 self.data.UserInterface.setEnemiesNumber(len(self.active_enemies))
 
+        # Runs the queued path searches until this frame's budget is used up
+        self.data.path_scheduler.update(self.data)
+
         # Checks collision with the spikes
         self.check_spikes(game_time)
         self.updateCheckpoint()
@@ -396,6 +477,10 @@ class GamePlay(GameState):
         # (for when the player dies)
         for enem in self.active_enemies:
             self.data.spawns.append(enem.spawn_details)
+            if enem.path_request is not None:
+                enem.path_request.cancel()
+            self.data.projectiles.discard(enem)
+            self.data.transforms.remove(enem)
 
         self.active_enemies.clear()
         self.room_current = self.last_checkpoint
@@ -411,8 +496,11 @@ class GamePlay(GameState):
         self.data.renderer.setProjectionMatrix(self.camera.view)
         self.data.game_map.render(self.data.renderer, game_time)
 
-        for active_enemy in self.active_enemies:
+        # only the enemies on screen get their sprites moved to where they are, and rendered
+        view = self.camera.view
+        for active_enemy in self.data.transforms.sync((view.min_x, view.min_y, view.max_x, view.max_y)):
             active_enemy.render()
+        self.data.projectiles.render(self.data.renderer)
 
         self.player.render()
 
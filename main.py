@@ -6,11 +6,15 @@ This script sets the game's settings up before then creating a
 new instance of a PyASGE game. It will then continue to run the
 game until the signal to exit is given.
 """
+import logging
 import pyasge
 from game.game import MyASGEGame
 
 
 def main() -> None:
+    # the F9 / F10 debug keys log the behaviour tree profile and the path statistics
+    logging.basicConfig(level=logging.INFO, format="%(name)s: %(message)s")
+
     # set up the game settings first
     settings = pyasge.GameSettings()
     settings.window_width = 1920
@@ -0,0 +1,55 @@
+"""
+Shared fixtures for the tests, run from the repository root with:
+    python -m pytest
+"""
+from types import SimpleNamespace
+
+import pytest
+
+from game.gameobjects.CostGrid import CostGrid, WALL_COST
+from game.gameobjects.enemyStuff.Reachability import ReachabilityIndex
+
+# two rooms with a wall between them, "." is floor and "#" is wall
+TWO_ROOMS = [
+    "############",
+    "#.....#....#",
+    "#.....#....#",
+    "#..#..#....#",
+    "#..#..#.##.#",
+    "#.....#....#",
+    "############",
+]
+
+# one room to search across, with walls in the way
+MAZE = [
+    "####################",
+    "#..........#.......#",
+    "#.######...#..###..#",
+    "#......#...#....#..#",
+    "#..#...#......#.#..#",
+    "#..#...####...#....#",
+    "#..#..........#....#",
+    "#..######..####..#.#",
+    "#.........#......#.#",
+    "####################",
+]
+
+
+def tile_map(rows, room_points=()):
+    """ A stand-in GameData with the cost map, CostGrid and ReachabilityIndex of an ASCII map """
+    grid = [[WALL_COST if cell == "#" else 1 for cell in row] for row in rows]
+    costs = CostGrid(grid)
+    reachability = ReachabilityIndex(costs, costs.width, costs.height, list(room_points))
+    game_map = SimpleNamespace(width=costs.width, height=costs.height, tile_size=[16, 16])
+    return SimpleNamespace(costs=costs, costs_version=0, reachability=reachability, game_map=game_map,
+                           path_engine="a_star", teleporters=[])
+
+
+@pytest.fixture
+def two_rooms():
+    return tile_map(TWO_ROOMS, [(1, 1, 1), (2, 8, 1)])
+
+
+@pytest.fixture
+def maze():
+    return tile_map(MAZE, [(1, 1, 1)])
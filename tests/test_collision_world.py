@@ -0,0 +1,99 @@
+import random
+
+import numpy as np
+
+from game.gameobjects.CollisionWorld import CollisionWorld
+
+TILE = 16
+
+# "#" are the Collidables tiles
+WALLS = [
+    "##########",
+    "#........#",
+    "#..##....#",
+    "#..##....#",
+    "#.......##",
+    "#........#",
+    "##########",
+]
+
+
+def world():
+    solid = np.array([[cell == "#" for cell in row] for row in WALLS])
+    return CollisionWorld(solid, (TILE, TILE))
+
+
+def old_check(box, move_x, move_y):
+    # the neighbour tile check Player used before, from the tile under the middle of the box
+    tile_x = int((box[0] + box[2]) / 2 / TILE)
+    tile_y = int((box[1] + box[3]) / 2 / TILE)
+    if move_x and WALLS[tile_y][tile_x + (1 if move_x > 0 else -1)] == "#":
+        move_x = 0
+    if move_y and WALLS[tile_y + (1 if move_y > 0 else -1)][tile_x] == "#":
+        move_y = 0
+    return move_x, move_y
+
+
+def box_at(tile_x, tile_y, size=12):
+    # a box of the player's size in the middle of a tile
+    x = tile_x * TILE + (TILE - size) / 2
+    y = tile_y * TILE + (TILE - size) / 2
+    return x, y, x + size, y + size
+
+
+def overlaps_wall(box):
+    for tile_y, row in enumerate(WALLS):
+        for tile_x, cell in enumerate(row):
+            if cell == "#" and box[0] < (tile_x + 1) * TILE - 1e-6 and box[2] > tile_x * TILE + 1e-6 and \
+                    box[1] < (tile_y + 1) * TILE - 1e-6 and box[3] > tile_y * TILE + 1e-6:
+                return True
+    return False
+
+
+def test_rectangles_cover_exactly_the_walls():
+    collision = world()
+    for tile_y, row in enumerate(WALLS):
+        for tile_x, cell in enumerate(row):
+            assert collision.solid(tile_x, tile_y) == (cell == "#")
+            rect_id = collision.rect_ids[tile_y * collision.width + tile_x]
+            assert (rect_id != -1) == (cell == "#")
+    assert len(collision.rects) < sum(row.count("#") for row in WALLS)
+
+
+def test_open_moves_go_through_like_the_old_check():
+    collision = world()
+    for tile_x, tile_y in [(6, 2), (6, 3), (7, 2)]:
+        box = box_at(tile_x, tile_y)
+        for move in [(1.5, 0), (-1.5, 0), (0, 1.5), (0, -1.5), (1.5, -1.5)]:
+            assert old_check(box, *move) == move
+            assert collision.sweep(box, *move) == move
+
+
+def test_a_wall_next_door_stops_the_box_flush_instead_of_a_tile_short():
+    collision = world()
+    box = box_at(2, 2)  # the pillar is the tile to the right
+    assert old_check(box, 5, 0) == (0, 0)
+    assert collision.sweep(box, 5, 0) == (2, 0)    # closes the 2 pixel gap
+    assert collision.sweep(box, -5, 0) == (-5, 0)
+
+    box = box_at(5, 1)
+    assert old_check(box, 0, -5) == (0, 0)
+    assert collision.sweep(box, 0, -5) == (0, -2)
+
+
+def test_the_box_slides_along_a_wall():
+    collision = world()
+    box = box_at(5, 5)
+    move_x, move_y = collision.sweep(box, 3, 5)
+    assert (move_x, move_y) == (3, 2)
+
+
+def test_random_walks_never_end_inside_a_wall():
+    rng = random.Random(11)
+    collision = world()
+    for walker in range(50):
+        box = box_at(rng.choice([1, 5, 6, 7]), rng.choice([1, 4, 5]))
+        for step in range(100):
+            move_x, move_y = collision.sweep(box, rng.uniform(-4, 4), rng.uniform(-4, 4))
+            box = (box[0] + move_x, box[1] + move_y, box[2] + move_x, box[3] + move_y)
+            assert not overlaps_wall(box)
@@ -0,0 +1,76 @@
+import random
+
+import pytest
+
+pytest.importorskip("pyasge")
+
+from game.gameobjects.enemyStuff.IncrementalPlanner import IncrementalPlanner, ReplanStats  # noqa: E402
+from game.gameobjects.enemyStuff.PathFinding import SEARCH_ENGINES  # noqa: E402
+
+
+def cost(game_data, path):
+    # what the planner minimises, every tile stepped onto after the first
+    return sum(game_data.costs[y][x] for x, y in path[1:])
+
+
+def a_star(game_data, start, goal):
+    return SEARCH_ENGINES["a_star"].search(game_data, start, goal, game_data.reachability.bounds(goal))
+
+
+def walk(game_data, path):
+    for first, second in zip(path, path[1:]):
+        assert max(abs(first[0] - second[0]), abs(first[1] - second[1])) == 1
+        assert game_data.costs[second[1]][second[0]] == 1
+
+
+def test_a_fresh_plan_costs_the_same_as_a_star(maze):
+    planner = IncrementalPlanner(ReplanStats())
+    path = planner.plan(maze, (1, 1), (18, 8))
+    assert path[0] == (1, 1) and path[-1] == (18, 8)
+    walk(maze, path)
+    assert cost(maze, path) == cost(maze, a_star(maze, (1, 1), (18, 8)))
+
+
+def test_repairs_after_a_reroot_cost_the_same_as_a_star(maze):
+    rng = random.Random(7)
+    stats = ReplanStats()
+    planner = IncrementalPlanner(stats)
+    tiles = maze.reachability.component_tiles[0]
+    start, goal = (1, 1), (18, 8)
+    path = planner.plan(maze, start, goal)
+
+    for i in range(40):
+        # the enemy walks a few tiles down its path and the player drifts a tile
+        start = path[min(rng.randint(1, 3), len(path) - 1)]
+        goal = rng.choice([tile for tile in tiles if max(abs(tile[0] - goal[0]), abs(tile[1] - goal[1])) == 1])
+
+        path = planner.plan(maze, start, goal)
+        assert path[0] == start and path[-1] == goal
+        walk(maze, path)
+        assert cost(maze, path) == cost(maze, a_star(maze, start, goal))
+
+    assert stats.repairs > 0
+    assert stats.full_searches + stats.repairs == 41
+
+
+def test_a_new_cost_map_starts_a_full_search(maze):
+    stats = ReplanStats()
+    planner = IncrementalPlanner(stats)
+    path = planner.plan(maze, (1, 1), (18, 8))
+    maze.costs_version += 1
+    planner.plan(maze, path[2], (18, 8))
+    assert stats.full_searches == 2 and stats.repairs == 0
+
+
+def test_stepped_repairs_match_a_repair_in_one_go(maze):
+    whole = IncrementalPlanner(ReplanStats())
+    stepped = IncrementalPlanner(ReplanStats())
+    path = whole.plan(maze, (1, 1), (18, 8))
+    stepped.plan(maze, (1, 1), (18, 8))
+
+    expected = whole.plan(maze, path[3], (16, 8))
+    stepped.begin(maze, path[3], (16, 8))
+    while not stepped.done:
+        stepped.step(2)
+    assert stepped.repairing
+    assert cost(maze, stepped.path()) == cost(maze, expected)
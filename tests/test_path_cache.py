@@ -0,0 +1,51 @@
+import pytest
+
+pytest.importorskip("pyasge")
+
+from game.gameobjects.enemyStuff.PathFinding import PathCache  # noqa: E402
+
+PATH = [(1, 1), (2, 2), (3, 2), (4, 3), (5, 3)]
+
+
+def test_stored_paths_are_handed_out_as_copies(maze):
+    cache = PathCache()
+    cache.put(maze, PATH[0], PATH[-1], PATH)
+    path = cache.get(maze, PATH[0], PATH[-1])
+    assert path == PATH
+    path.append((9, 9))
+    assert cache.get(maze, PATH[0], PATH[-1]) == PATH
+    assert cache.hits == 2
+
+
+def test_a_new_cost_map_drops_every_path(maze):
+    cache = PathCache()
+    cache.put(maze, PATH[0], PATH[-1], PATH)
+    maze.costs_version += 1
+    assert cache.get(maze, PATH[0], PATH[-1]) is None
+    assert cache.get(maze, PATH[2], PATH[-1]) is None
+    assert cache.stats()["size"] == 0
+    assert cache.misses == 2
+
+
+def test_a_tile_along_a_kept_path_gets_the_rest_of_it(maze):
+    cache = PathCache()
+    cache.put(maze, PATH[0], PATH[-1], PATH)
+    assert cache.get(maze, PATH[2], PATH[-1]) == PATH[2:]
+    assert cache.suffix_hits == 1
+    assert cache.get(maze, PATH[2], (1, 8)) is None     # another goal
+
+    exact = PathCache(suffixes=False)
+    exact.put(maze, PATH[0], PATH[-1], PATH)
+    assert exact.get(maze, PATH[2], PATH[-1]) is None
+
+
+def test_least_recently_used_paths_are_evicted(maze):
+    cache = PathCache(capacity=2)
+    cache.put(maze, (1, 1), (2, 1), [(1, 1), (2, 1)])
+    cache.put(maze, (1, 2), (2, 1), [(1, 2), (2, 1)])
+    cache.get(maze, (1, 1), (2, 1))
+    cache.put(maze, (3, 1), (4, 1), [(3, 1), (4, 1)])
+
+    assert cache.get(maze, (1, 2), (2, 1)) is None
+    assert cache.get(maze, (1, 1), (2, 1)) == [(1, 1), (2, 1)]
+    assert cache.evictions == 1
@@ -0,0 +1,62 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("pyasge")
+
+from game.gameobjects.projectile import ProjectilePool  # noqa: E402
+
+
+def pool_with(rows, capacity=4):
+    # fills the columns by hand, row i gets x i so the rows can be told apart after compacting
+    pool = ProjectilePool(SimpleNamespace(game_map=SimpleNamespace(tile_size=[16, 16])), capacity)
+    pool.kinds = [SimpleNamespace(free=[])]
+    for row in range(rows):
+        if pool.count == len(pool.xs):
+            pool.grow()
+        pool.xs[row] = row
+        pool.ys[row] = row * 10
+        pool.owners[row] = row % 3
+        pool.alive[row] = True
+        pool.count += 1
+    return pool
+
+
+def test_compact_keeps_the_live_rows_in_order():
+    pool = pool_with(7)
+    pool.alive[[1, 2, 5]] = False
+    pool.compact()
+
+    assert pool.count == 4
+    assert pool.xs[:4].tolist() == [0, 3, 4, 6]
+    assert pool.ys[:4].tolist() == [0, 30, 40, 60]
+    assert pool.owners[:4].tolist() == [0, 0, 1, 0]
+    assert pool.alive[:4].all() and not pool.alive[4:].any()
+
+
+def test_compact_hands_the_sprites_of_dead_rows_back_to_their_kind():
+    pool = pool_with(3)
+    sprites = [object(), None, object()]
+    pool.sprites[:3] = sprites
+    pool.alive[0] = False
+    pool.compact()
+
+    assert pool.sprites[:3] == [None, sprites[2], None]
+    assert pool.kinds[0].free == [sprites[0]]
+
+
+def test_grow_keeps_every_column():
+    pool = pool_with(9, capacity=4)
+    assert len(pool.xs) == 16
+    assert all(len(getattr(pool, name)) == 16 for name in ProjectilePool.COLUMNS)
+    assert pool.xs[:9].tolist() == list(range(9))
+
+
+def test_discard_drops_an_owners_rows():
+    pool = pool_with(6)
+    owner = object()
+    pool.owner_ids[owner] = 1
+    pool.discard(owner)
+    assert pool.count == 4
+    assert 1 not in pool.owners[:4].tolist()
+    assert pool.xs[:4].tolist() == [0, 2, 3, 5]
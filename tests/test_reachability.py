@@ -0,0 +1,32 @@
+def test_tiles_of_the_same_room_are_connected(two_rooms):
+    reachability = two_rooms.reachability
+    assert reachability.connected((1, 1), (5, 5))
+    assert reachability.connected((7, 1), (10, 5))
+    assert reachability.room((1, 1)) == 1
+    assert reachability.room((10, 5)) == 2
+
+
+def test_rooms_split_by_a_wall_are_not_connected(two_rooms):
+    assert not two_rooms.reachability.connected((1, 1), (10, 5))
+    assert not two_rooms.reachability.connected((10, 5), (1, 1))
+
+
+def test_goal_has_to_be_walkable(two_rooms):
+    assert not two_rooms.reachability.connected((1, 1), (3, 3))    # the pillar
+    assert not two_rooms.reachability.connected((1, 1), (-1, 2))   # off the map
+
+
+def test_a_start_on_a_wall_leaves_through_its_walkable_neighbours(two_rooms):
+    reachability = two_rooms.reachability
+    assert reachability.connected((3, 3), (1, 1))
+    # the dividing wall touches both rooms
+    assert reachability.connected((6, 2), (1, 1))
+    assert reachability.connected((6, 2), (10, 5))
+    assert reachability.connected((0, 0), (1, 1))
+    assert not reachability.connected((0, 0), (10, 5))
+
+
+def test_bounds_are_the_area_of_the_component(two_rooms):
+    assert two_rooms.reachability.bounds((1, 1)) == [1, 1, 5, 5]
+    assert two_rooms.reachability.bounds((10, 5)) == [7, 1, 10, 5]
+    assert two_rooms.reachability.bounds((6, 1)) is None
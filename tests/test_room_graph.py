@@ -0,0 +1,48 @@
+import pytest
+
+pytest.importorskip("pyasge")
+
+from game.gameobjects.enemyStuff.RoomGraph import RoomGraph  # noqa: E402
+
+# pair, x, y, width and height in pixels, room
+PADS = [(0, 32, 16, 16, 16, 1), (0, 128, 80, 16, 16, 2)]
+
+
+@pytest.fixture
+def graph(two_rooms):
+    two_rooms.teleporters = PADS
+    return RoomGraph(two_rooms, two_rooms.game_map.tile_size)
+
+
+def test_pads_land_on_their_tiles(graph):
+    assert graph.pads == [(2, 1), (8, 5)]
+    assert graph.pad_component[0] != graph.pad_component[1]
+
+
+def test_first_leg_to_another_room_ends_on_the_pad(two_rooms, graph):
+    path = graph.firstLeg(two_rooms, (1, 5), (10, 1))
+    assert path[0] == (1, 5)
+    assert path[-1] == (2, 1)
+    assert all(two_rooms.reachability.room(tile) == 1 for tile in path)
+    assert len(path) == 5   # four diagonal steps up and across
+
+
+def test_first_leg_from_the_other_side_heads_for_its_own_pad(two_rooms, graph):
+    path = graph.firstLeg(two_rooms, (10, 1), (1, 5))
+    assert path[0] == (10, 1)
+    assert path[-1] == (8, 5)
+    assert all(two_rooms.reachability.room(tile) == 2 for tile in path)
+
+
+def test_first_leg_in_the_same_room_is_the_whole_path(two_rooms, graph):
+    path = graph.firstLeg(two_rooms, (1, 1), (5, 5))
+    assert path[0] == (1, 1)
+    assert path[-1] == (5, 5)
+    assert graph.plans == 0     # nothing to plan over the pads
+
+
+def test_no_leg_without_a_way_there(two_rooms):
+    two_rooms.teleporters = PADS[:1]    # the other end of the pair is missing
+    graph = RoomGraph(two_rooms, two_rooms.game_map.tile_size)
+    assert graph.legGoal((1, 5), (10, 1)) is None
+    assert graph.firstLeg(two_rooms, (1, 5), (10, 1)) == []
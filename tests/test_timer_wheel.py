@@ -0,0 +1,88 @@
+from game.gameobjects.TimerWheel import TimerWheel
+
+
+def fired_ticks(delays, step=1.0):
+    # a wheel ticking once a second, returns the tick every timer fired on
+    wheel = TimerWheel(resolution=1.0)
+    fired = {}
+    for delay in delays:
+        wheel.schedule(delay, lambda delay=delay: fired.setdefault(delay, wheel.tick))
+
+    end = max(delays) + 1
+    while wheel.now < end:
+        wheel.advance(step)
+    return wheel, fired
+
+
+def test_timers_fire_on_their_tick_on_every_level():
+    slots = TimerWheel.SLOTS
+    delays = [1, 5, slots - 1, slots, slots + 3, slots * 7 + 11, slots ** 2 - 1, slots ** 2, slots ** 2 + slots + 1,
+              slots ** 2 * 5 + 17]
+    wheel, fired = fired_ticks(delays)
+    assert fired == {delay: delay for delay in delays}
+    assert wheel.pending() == 0
+    assert wheel.cascaded > 0
+
+
+def test_timers_past_the_last_wheel_wait_in_the_overflow():
+    slots = TimerWheel.SLOTS
+    far = slots ** TimerWheel.LEVELS + 5
+    wheel = TimerWheel(resolution=1.0)
+    fired = []
+    wheel.schedule(far, lambda: fired.append(wheel.tick))
+    assert wheel.overflow
+
+    wheel.advance(far - 1)
+    assert fired == []
+    wheel.advance(1)
+    assert fired == [far]
+    assert wheel.pending() == 0
+
+
+def test_timers_fire_in_deadline_order_over_a_big_step():
+    delays = [300, 2, 70, 4100, 65]
+    wheel = TimerWheel(resolution=1.0)
+    order = []
+    for delay in delays:
+        wheel.schedule(delay, order.append, delay)
+    wheel.advance(5000)
+    assert order == sorted(delays)
+
+
+def test_cancelled_timers_dont_fire():
+    wheel = TimerWheel(resolution=1.0)
+    fired = []
+    timer = wheel.schedule(100, fired.append, "cancelled")
+    wheel.schedule(100, fired.append, "kept")
+    timer.cancel()
+    wheel.advance(200)
+    assert fired == ["kept"]
+    assert wheel.cancelled == 1
+
+
+class Owner:
+    def __init__(self, fired, name):
+        self.fired = fired
+        self.name = name
+
+    def fire(self):
+        self.fired.append(self.name)
+
+
+def test_clear_only_keeps_the_timers_of_the_kept_owners():
+    slots = TimerWheel.SLOTS
+    wheel = TimerWheel(resolution=1.0)
+    fired = []
+    kept, dropped = Owner(fired, "kept"), Owner(fired, "dropped")
+    for delay in [3, slots + 3, slots ** 2 + 3, slots ** TimerWheel.LEVELS + 3]:
+        wheel.schedule(delay, kept.fire)
+        wheel.schedule(delay, dropped.fire)
+    wheel.schedule(3, fired.append, "function")
+    wheel.advance(1)
+
+    wheel.clear(keep=[kept])
+    assert wheel.now == 1
+    assert wheel.pending() == 4
+    assert wheel.cancelled == 5
+    wheel.advance(slots ** TimerWheel.LEVELS + 5)
+    assert fired == ["kept"] * 4
@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+import pytest
+
+pyasge = pytest.importorskip("pyasge")
+
+from game.gameobjects.enemyStuff.Transforms import TransformStore  # noqa: E402
+
+STEP = SimpleNamespace(fixed_timestep=1 / 60)
+
+
+def walker(store, x, y, route):
+    # what Enemy does with the store, without the sprite flipping
+    sprite = pyasge.Sprite()
+    sprite.width = 16
+    sprite.height = 16
+    enemy = SimpleNamespace(sprite=sprite, speed=60, transform=None,
+                            route=[SimpleNamespace(x=x, y=y) for x, y in route])
+    store.add(enemy, x, y)
+    store.follow(enemy, enemy.route)
+    aim(store, enemy)
+    return enemy
+
+
+def aim(store, enemy):
+    if enemy.route:
+        x, y = store.position(enemy)
+        dx, dy = enemy.route[0].x - x, enemy.route[0].y - y
+        length = (dx * dx + dy * dy) ** 0.5
+        if length:
+            store.aim(enemy, dx / length, dy / length)
+
+
+def walk(store, steps):
+    for step in range(steps):
+        for enemy in store.integrate(STEP):
+            enemy.route.pop(0)
+            store.follow(enemy, enemy.route)
+            aim(store, enemy)
+
+
+def test_enemies_walk_their_route_and_stop_a_waypoint_short():
+    store = TransformStore()
+    enemy = walker(store, 0, 0, [(10, 0), (10, 10), (20, 10)])
+    walk(store, 60)
+
+    assert store.position(enemy) == (10, 10)
+    assert enemy.route == []
+    assert store.waypoints[enemy.transform] == 0
+    assert store.arrivals == 2
+
+
+def test_the_store_never_changes_a_route_itself():
+    store = TransformStore()
+    enemy = walker(store, 0, 0, [(10, 0), (10, 10), (20, 10)])
+    route = list(enemy.route)
+    for step in range(60):
+        store.integrate(STEP)
+    assert enemy.route == route
+
+
+def test_only_enemies_on_screen_get_their_sprite_moved():
+    store = TransformStore()
+    near = walker(store, 0, 0, [(50, 0), (50, 0)])
+    far = walker(store, 1000, 0, [(1050, 0), (1050, 0)])
+    walk(store, 30)
+
+    assert store.sync((0, 0, 100, 100)) == [near]
+    assert (near.sprite.x, near.sprite.y) == store.position(near)
+    assert far.sprite.x == 1000     # stale, the store has the real position
+    assert store.position(far)[0] > 1000